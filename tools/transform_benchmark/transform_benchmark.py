@@ -0,0 +1,123 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from __future__ import print_function
+
+import sys
+import time
+
+from oslo_config import cfg
+
+from vitrage.common.constants import DatasourceAction
+from vitrage.common.constants import DatasourceProperties as DSProps
+from vitrage.datasources.cinder.volume import CINDER_VOLUME_DATASOURCE
+from vitrage.datasources.heat.stack import HEAT_STACK_DATASOURCE
+from vitrage.datasources.nagios import NAGIOS_DATASOURCE
+from vitrage.datasources.nova.host import NOVA_HOST_DATASOURCE
+from vitrage.datasources.nova.instance import NOVA_INSTANCE_DATASOURCE
+from vitrage.datasources.nova.zone import NOVA_ZONE_DATASOURCE
+from vitrage.datasources.zabbix import ZABBIX_DATASOURCE
+from vitrage.entity_graph.transformer_manager import TransformerManager
+from vitrage.opts import register_opts
+from vitrage.tests.mocks import mock_driver
+
+"""
+Transformers Benchmark Tool:
+
+Measures how many events per second the transformers of each datasource
+transform. The events are generated by vitrage/tests/mocks/trace_generator.py
+and transformed by a TransformerManager, without an entity graph.
+
+Run 'python -m tools.transform_benchmark.transform_benchmark [EVENTS_NUM]'
+from the root of the repository.
+"""
+
+DEFAULT_EVENTS_NUM = 10000
+HOSTS_NUM = 32
+SNAPSHOT = {DSProps.DATASOURCE_ACTION: DatasourceAction.SNAPSHOT}
+
+DATASOURCES = [NOVA_ZONE_DATASOURCE,
+               NOVA_HOST_DATASOURCE,
+               NOVA_INSTANCE_DATASOURCE,
+               CINDER_VOLUME_DATASOURCE,
+               HEAT_STACK_DATASOURCE,
+               NAGIOS_DATASOURCE,
+               ZABBIX_DATASOURCE]
+
+
+def create_conf():
+    conf = cfg.ConfigOpts()
+    conf.register_opts([
+        cfg.ListOpt('types', default=DATASOURCES),
+        cfg.ListOpt('path', default=['vitrage.datasources']),
+    ], group='datasources')
+    for datasource in conf.datasources.types:
+        register_opts(conf, datasource, conf.datasources.path)
+    return conf
+
+
+def create_streams(events_num):
+    """The generators of the event streams, by stream name"""
+    hosts = HOSTS_NUM
+    return [
+        ('nova.zone snapshot', mock_driver.simple_zone_generators(
+            2, hosts, snapshot_events=events_num, snap_vals=SNAPSHOT)),
+        ('nova.host snapshot', mock_driver.simple_host_generators(
+            2, hosts, snapshot_events=events_num, snap_vals=SNAPSHOT)),
+        ('nova.instance snapshot', mock_driver.simple_instance_generators(
+            hosts, hosts * 4, snapshot_events=events_num,
+            snap_vals=SNAPSHOT)),
+        ('nova.instance update', mock_driver.simple_instance_generators(
+            hosts, hosts * 4, update_events=events_num)),
+        ('cinder.volume snapshot', mock_driver.simple_volume_generators(
+            hosts, hosts * 4, snapshot_events=events_num,
+            snap_vals=SNAPSHOT)),
+        ('heat.stack snapshot', mock_driver.simple_stack_generators(
+            hosts, hosts * 4, snapshot_events=events_num,
+            snap_vals=SNAPSHOT)),
+        ('nagios snapshot', mock_driver.simple_nagios_alarm_generators(
+            hosts, events_num)),
+        ('zabbix snapshot', mock_driver.simple_zabbix_alarm_generators(
+            hosts, events_num)),
+    ]
+
+
+def create_events(generators):
+    events = mock_driver.generate_sequential_events_list(generators)
+    for event in events:
+        # The notifications of nova are enriched by the driver with their
+        # entity type, before they are transformed
+        event.setdefault(DSProps.ENTITY_TYPE,
+                         NOVA_INSTANCE_DATASOURCE)
+    return events
+
+
+def run_benchmark(transformer_manager, events):
+    start_time = time.time()
+    for event in events:
+        transformer_manager.transform(event)
+    return len(events) / max(time.time() - start_time, 1e-9)
+
+
+def main(events_num=DEFAULT_EVENTS_NUM):
+    transformer_manager = TransformerManager(create_conf())
+    print('%-25s %10s %15s' % ('stream', 'events', 'events/sec'))
+    for name, generators in create_streams(events_num):
+        events = create_events(generators)
+        events_per_sec = run_benchmark(transformer_manager, events)
+        print('%-25s %10d %15.0f' % (name, len(events), events_per_sec))
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:2]]))
@@ -24,10 +24,7 @@ from pecan.core import abort
 
 from vitrage.api.controllers.rest import RootRestController
 from vitrage.api.policy import enforce
-from vitrage.common.constants import VertexProperties as VProps
-
-# noinspection PyProtectedMember
-from vitrage.datasources.transformer_base import CLUSTER_ID
+from vitrage.common.exception import VitrageError
 
 
 LOG = log.getLogger(__name__)
@@ -37,7 +34,7 @@ LOG = log.getLogger(__name__)
                     info={}, hide_args=False, trace_private=False)
 class TopologyController(RootRestController):
 
-    @pecan.expose('json')
+    @pecan.expose(content_type='application/json')
     def post(self, depth=None, graph_type='graph', query=None, root=None,
              all_tenants=False):
         all_tenants = bool_from_string(all_tenants)
@@ -76,18 +73,11 @@ class TopologyController(RootRestController):
                                                    query=query,
                                                    root=root,
                                                    all_tenants=all_tenants)
-            LOG.debug(graph_data)
-            graph = json.loads(graph_data)
-            if graph_type == 'graph':
-                return graph
-            if graph_type == 'tree':
-                node_id = CLUSTER_ID
-                if root:
-                    for node in graph['nodes']:
-                        if node[VProps.VITRAGE_ID] == root:
-                            node_id = node[VProps.ID]
-                            break
-                return RootRestController.as_tree(graph, node_id)
+            if graph_data is None:
+                raise VitrageError('No topology was found')
+            # The api handler returns the graph already in the format of
+            # the graph_type, so it is returned as is
+            return graph_data
 
         except Exception as e:
             to_unicode = encodeutils.exception_to_unicode(e)
@@ -16,9 +16,10 @@ import json
 from oslo_log import log
 from osprofiler import profiler
 
-from vitrage.api_handler.apis.base import ALARM_QUERY
 from vitrage.api_handler.apis.base import ALARMS_ALL_QUERY
+from vitrage.api_handler.apis.base import cached_response
 from vitrage.api_handler.apis.base import EntityGraphApisBase
+from vitrage.api_handler.project_view import ProjectView
 from vitrage.common.constants import EntityCategory
 from vitrage.common.constants import VertexProperties as VProps
 from vitrage.entity_graph.mappings.operational_alarm_severity import \
@@ -32,10 +33,13 @@ LOG = log.getLogger(__name__)
                     info={}, hide_args=False, trace_private=False)
 class AlarmApis(EntityGraphApisBase):
 
-    def __init__(self, entity_graph, conf):
+    def __init__(self, entity_graph, conf, project_view=None):
         self.entity_graph = entity_graph
         self.conf = conf
+        self.project_view = project_view or ProjectView(entity_graph)
+        self.response_cache = self._create_response_cache(conf)
 
+    @cached_response
     def get_alarms(self, ctx, vitrage_id, all_tenants):
         LOG.debug("AlarmApis get_alarms - vitrage_id: %s, all_tenants=%s",
                   str(vitrage_id), all_tenants)
@@ -43,22 +47,21 @@ class AlarmApis(EntityGraphApisBase):
         project_id = ctx.get(self.TENANT_PROPERTY, None)
         is_admin_project = ctx.get(self.IS_ADMIN_PROJECT_PROPERTY, False)
 
-        if not vitrage_id or vitrage_id == 'all':
-            if all_tenants:
-                alarms = self.entity_graph.get_vertices(
-                    query_dict=ALARMS_ALL_QUERY)
+        with self.entity_graph.read_only_views():
+            if not vitrage_id or vitrage_id == 'all':
+                if all_tenants:
+                    alarms = self.entity_graph.get_vertices(
+                        query_dict=ALARMS_ALL_QUERY)
+                else:
+                    alarms = self._get_project_alarms(project_id,
+                                                      is_admin_project)
             else:
-                alarms = self._get_alarms(project_id, is_admin_project)
-                alarms += self._get_alarms_via_resource(project_id,
-                                                        is_admin_project)
-                alarms = set(alarms)
-        else:
-            query = {VProps.VITRAGE_CATEGORY: EntityCategory.ALARM,
-                     VProps.VITRAGE_IS_DELETED: False}
-            alarms = self.entity_graph.neighbors(vitrage_id,
-                                                 vertex_attr_filter=query)
+                query = {VProps.VITRAGE_CATEGORY: EntityCategory.ALARM,
+                         VProps.VITRAGE_IS_DELETED: False}
+                alarms = self.entity_graph.neighbors(vitrage_id,
+                                                     vertex_attr_filter=query)
 
-        return json.dumps({'alarms': [v.properties for v in alarms]})
+        return json.dumps({'alarms': [dict(v.properties) for v in alarms]})
 
     def get_alarm_counts(self, ctx, all_tenants):
         LOG.debug("AlarmApis get_alarm_counts - all_tenants=%s", all_tenants)
@@ -67,13 +70,10 @@ class AlarmApis(EntityGraphApisBase):
         is_admin_project = ctx.get(self.IS_ADMIN_PROJECT_PROPERTY, False)
 
         if all_tenants:
-            alarms = self.entity_graph.get_vertices(
-                query_dict=ALARMS_ALL_QUERY)
+            alarm_counts = self.project_view.all_alarm_counts()
         else:
-            alarms = self._get_alarms(project_id, is_admin_project)
-            alarms += self._get_alarms_via_resource(project_id,
-                                                    is_admin_project)
-            alarms = set(alarms)
+            alarm_counts = self.project_view.alarm_counts(project_id,
+                                                          is_admin_project)
 
         counts = {OperationalAlarmSeverity.SEVERE: 0,
                   OperationalAlarmSeverity.CRITICAL: 0,
@@ -81,35 +81,16 @@ class AlarmApis(EntityGraphApisBase):
                   OperationalAlarmSeverity.OK: 0,
                   OperationalAlarmSeverity.NA: 0}
 
-        for alarm in alarms:
-            severity = alarm.get(VProps.VITRAGE_OPERATIONAL_SEVERITY)
-            if severity:
-                counts[severity] += 1
+        for severity in counts:
+            counts[severity] = alarm_counts.get(severity, 0)
 
         return json.dumps(counts)
 
-    def _get_alarms(self, project_id, is_admin_project):
-        """Finds all the alarms with project_id
-
-        Finds all the alarms which has the project_id. In case the tenant is
-        admin then project_id can also be None.
-
-        :type project_id: string
-        :type is_admin_project: boolean
-        :rtype: list
-        """
-
-        alarm_query = self._get_query_with_project(EntityCategory.ALARM,
-                                                   project_id,
-                                                   is_admin_project)
-        alarms = self.entity_graph.get_vertices(query_dict=alarm_query)
-        return self._filter_alarms(alarms, project_id)
+    def _get_project_alarms(self, project_id, is_admin_project):
+        """Finds all the alarms of the project
 
-    def _get_alarms_via_resource(self, project_id, is_admin_project):
-        """Finds all the alarms with project_id on their resource
-
-        Finds all the resource which has project_id and return all the alarms
-        on those resources project_id. In case the tenant is admin then
+        Finds the alarms which has the project_id, and the alarms on the
+        resources which has the project_id. In case the tenant is admin then
         project_id can also be None.
 
         :type project_id: string
@@ -117,17 +98,7 @@ class AlarmApis(EntityGraphApisBase):
         :rtype: list
         """
 
-        resource_query = self._get_query_with_project(EntityCategory.RESOURCE,
-                                                      project_id,
-                                                      is_admin_project)
-
-        alarms = []
-        resources = self.entity_graph.get_vertices(query_dict=resource_query)
-
-        for resource in resources:
-            new_alarms = \
-                self.entity_graph.neighbors(
-                    resource.vertex_id, vertex_attr_filter=ALARM_QUERY)
-            alarms = alarms + new_alarms
-
-        return alarms
+        alarm_ids = self.project_view.alarm_ids(project_id, is_admin_project)
+        alarms = [self.entity_graph.get_vertex(alarm_id)
+                  for alarm_id in alarm_ids]
+        return [alarm for alarm in alarms if alarm]
@@ -12,11 +12,15 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import functools
+import json
+
 from oslo_log import log
 
 from vitrage.common.constants import EdgeProperties as EProps
 from vitrage.common.constants import EntityCategory
 from vitrage.common.constants import VertexProperties as VProps
+from vitrage.common.utils import LRUCache
 from vitrage.datasources.nova.host import NOVA_HOST_DATASOURCE
 from vitrage.datasources.nova.instance import NOVA_INSTANCE_DATASOURCE
 from vitrage.datasources.nova.zone import NOVA_ZONE_DATASOURCE
@@ -26,6 +30,8 @@ from vitrage.keystone_client import get_client as ks_client
 
 LOG = log.getLogger(__name__)
 
+DEFAULT_RESPONSE_CACHE_SIZE = 100
+
 
 # Used for Sunburst to show only specific resources
 TREE_TOPOLOGY_QUERY = {
@@ -71,12 +77,6 @@ ALARMS_ALL_QUERY = {
     ]
 }
 
-ALARM_QUERY = {
-    VProps.VITRAGE_CATEGORY: EntityCategory.ALARM,
-    VProps.VITRAGE_IS_DELETED: False,
-    VProps.VITRAGE_IS_PLACEHOLDER: False
-}
-
 EDGE_QUERY = {'==': {EProps.VITRAGE_IS_DELETED: False}}
 
 RESOURCES_ALL_QUERY = {
@@ -88,10 +88,61 @@ RESOURCES_ALL_QUERY = {
 }
 
 
+class ResponseCache(LRUCache):
+    """Cache of api responses, per entity graph version
+
+    The cache is cleared once the entity graph changes.
+    """
+
+    def __init__(self, maxsize):
+        super(ResponseCache, self).__init__(maxsize)
+        self.graph_version = None
+
+    def clear_if_changed(self, graph_version):
+        if graph_version != self.graph_version:
+            self.clear()
+            self.graph_version = graph_version
+
+
+def cached_response(func):
+    """Return the cached response of an api call, if the graph did not change
+
+    The responses are cached by the arguments of the call, the tenant and
+    the entity graph version, in the response_cache of the apis.
+    """
+    @functools.wraps(func)
+    def cached_func(apis, ctx, *args, **kwargs):
+        cache = apis.response_cache
+        if cache is None:
+            return func(apis, ctx, *args, **kwargs)
+
+        graph_version = apis.entity_graph.version
+        cache.clear_if_changed(graph_version)
+        key = (func.__name__,
+               graph_version,
+               ctx.get(EntityGraphApisBase.TENANT_PROPERTY, None),
+               ctx.get(EntityGraphApisBase.IS_ADMIN_PROJECT_PROPERTY, False),
+               json.dumps([args, kwargs], sort_keys=True))
+        response = cache.get(key, cache)
+        if response is cache:
+            response = func(apis, ctx, *args, **kwargs)
+            cache.put(key, response)
+        LOG.debug('%s response cache - hits: %d, misses: %d',
+                  func.__name__, cache.hits, cache.misses)
+        return response
+    return cached_func
+
+
 class EntityGraphApisBase(object):
     TENANT_PROPERTY = 'tenant'
     IS_ADMIN_PROJECT_PROPERTY = 'is_admin'
 
+    @staticmethod
+    def _create_response_cache(conf):
+        cache_size = conf.entity_graph.api_response_cache_size if conf \
+            else DEFAULT_RESPONSE_CACHE_SIZE
+        return ResponseCache(cache_size) if cache_size else None
+
     @staticmethod
     def _get_query_with_project(vitrage_category, project_id, is_admin):
         """Generate query with tenant data
@@ -125,36 +176,28 @@ class EntityGraphApisBase(object):
 
         return query
 
-    def _filter_alarms(self, alarms, project_id):
-        """Remove wrong alarms from the list
+    def _is_alarm_of_other_project(self, alarm, project_id):
+        """Checks if the alarm or the resource it sits on is of other project
 
-        Removes alarms where the project_id of the resource they sit on is
-        different than the project_id sent as a parameter
-
-        :type alarms: list
+        :type alarm: vertex
         :type project_id: string
-        :rtype: list
+        :rtype: boolean
         """
 
-        alarms_to_remove = []
-
-        for alarm in alarms:
-            alarm_project_id = alarm.get(VProps.PROJECT_ID, None)
-            if not alarm_project_id:
-                cat_filter = {VProps.VITRAGE_CATEGORY: EntityCategory.RESOURCE}
-                alarms_resource = \
-                    self.entity_graph.neighbors(alarm.vertex_id,
-                                                vertex_attr_filter=cat_filter)
-                if len(alarms_resource) > 0:
-                    resource_project_id = \
-                        alarms_resource[0].get(VProps.PROJECT_ID, None)
-                    if resource_project_id and \
-                            resource_project_id != project_id:
-                        alarms_to_remove.append(alarm)
-            elif alarm_project_id != project_id:
-                alarms_to_remove.append(alarm)
-
-        return [x for x in alarms if x not in alarms_to_remove]
+        alarm_project_id = alarm.get(VProps.PROJECT_ID, None)
+        if alarm_project_id:
+            return alarm_project_id != project_id
+
+        cat_filter = {VProps.VITRAGE_CATEGORY: EntityCategory.RESOURCE}
+        alarms_resource = \
+            self.entity_graph.neighbors(alarm.vertex_id,
+                                        vertex_attr_filter=cat_filter)
+        if len(alarms_resource) > 0:
+            resource_project_id = \
+                alarms_resource[0].get(VProps.PROJECT_ID, None)
+            if resource_project_id and resource_project_id != project_id:
+                return True
+        return False
 
     def _is_alarm_of_current_project(self,
                                      entity,
@@ -12,14 +12,21 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from collections import deque
+from collections import OrderedDict
+
 from oslo_log import log
 from osprofiler import profiler
 
-from vitrage.api_handler.apis.base import ALARMS_ALL_QUERY
-from vitrage.api_handler.apis.base import EDGE_QUERY
+from vitrage.api_handler.apis.base import cached_response
 from vitrage.api_handler.apis.base import EntityGraphApisBase
-from vitrage.api_handler.apis.base import RCA_QUERY
+from vitrage.api_handler.project_view import ProjectView
+from vitrage.common.constants import EdgeLabel
+from vitrage.common.constants import EdgeProperties as EProps
+from vitrage.common.constants import EntityCategory
+from vitrage.common.constants import VertexProperties as VProps
 from vitrage.graph import Direction
+from vitrage.graph.driver.json_output import iter_node_link_json
 
 
 LOG = log.getLogger(__name__)
@@ -29,123 +36,133 @@ LOG = log.getLogger(__name__)
                     info={}, hide_args=False, trace_private=False)
 class RcaApis(EntityGraphApisBase):
 
-    def __init__(self, entity_graph, conf):
+    def __init__(self, entity_graph, conf, project_view=None):
         self.entity_graph = entity_graph
         self.conf = conf
+        self.project_view = project_view or ProjectView(entity_graph)
+        self.response_cache = self._create_response_cache(conf)
 
+    @cached_response
     def get_rca(self, ctx, root, all_tenants):
         LOG.debug("RcaApis get_rca - root: %s, all_tenants=%s",
                   str(root), all_tenants)
 
         project_id = ctx.get(self.TENANT_PROPERTY, None)
         is_admin_project = ctx.get(self.IS_ADMIN_PROJECT_PROPERTY, False)
-        ga = self.entity_graph.algo
-
-        found_graph_out = ga.graph_query_vertices(root,
-                                                  query_dict=RCA_QUERY,
-                                                  direction=Direction.OUT,
-                                                  edge_query_dict=EDGE_QUERY)
-        found_graph_in = ga.graph_query_vertices(root,
-                                                 query_dict=RCA_QUERY,
-                                                 direction=Direction.IN,
-                                                 edge_query_dict=EDGE_QUERY)
-
-        if all_tenants:
-            unified_graph = found_graph_in
-            unified_graph.union(found_graph_out)
-        else:
-            unified_graph = \
-                self._get_rca_for_specific_project(ga,
-                                                   found_graph_in,
-                                                   found_graph_out,
-                                                   root,
-                                                   project_id,
-                                                   is_admin_project)
-
-        alarms = unified_graph.get_vertices(query_dict=ALARMS_ALL_QUERY)
-        unified_graph.update_vertices(alarms)
-
-        json_graph = unified_graph.json_output_graph(
-            inspected_index=self._find_rca_index(unified_graph, root))
-
-        return json_graph
-
-    def _get_rca_for_specific_project(self,
-                                      ga,
-                                      found_graph_in,
-                                      found_graph_out,
-                                      root,
-                                      project_id,
-                                      is_admin_project):
-        """Filter the RCA for root entity with consideration of project_id
-
-        Filter the RCA for root by:
-        1. filter the alarms deduced from the root alarm (found_graph_in)
-        2. filter the alarms caused the root alarm (found_graph_out)
-        And in the end unify 1 and 2
-
-        :type ga: NXAlgorithm
-        :type found_graph_in: NXGraph
-        :type found_graph_out: NXGraph
+
+        with self.entity_graph.read_only_views():
+            alarms = self._find_rca_alarms(root,
+                                           all_tenants,
+                                           project_id,
+                                           is_admin_project)
+            causes_edges = self._find_causes_edges(alarms)
+            # the root alarm is the first of the nodes
+            return ''.join(iter_node_link_json(
+                ((alarm.vertex_id, alarm.properties)
+                 for alarm in alarms.values()),
+                ((edge.source_id, edge.target_id, edge.label, edge.properties)
+                 for edge in causes_edges),
+                inspected_index=0))
+
+    def _find_rca_alarms(self, root, all_tenants, project_id,
+                         is_admin_project):
+        """Find the alarms caused by the root alarm, and that caused it
+
+        Walks the 'causes' edges in both directions, in a single breadth
+        first traversal.
+        In case of a specific project:
+        1. Of the alarms caused by the root alarm, only the alarms of the
+           project (or on a resource of the project) are returned.
+        2. Of the alarms that caused the root alarm, only a single chain of
+           causing alarms is followed, up to the first alarm which is not of
+           the project. In case the tenant is admin then project_id can also
+           be None.
+
         :type root: string
+        :type all_tenants: boolean
         :type project_id: string
         :type is_admin_project: boolean
-        :rtype: NXGraph
+        :return: the alarms by their vitrage ids, the root alarm first
+        :rtype: OrderedDict
         """
 
-        filtered_alarms_out = \
-            self._filter_alarms(found_graph_out.get_vertices(), project_id)
-        filtered_found_graph_out = ga.subgraph(
-            [node.vertex_id for node in filtered_alarms_out])
-        filtered_found_graph_in = \
-            self._filter_rca_causing_entities(ga,
-                                              found_graph_in,
-                                              root,
-                                              project_id,
-                                              is_admin_project)
-        filtered_found_graph_out.union(filtered_found_graph_in)
-
-        return filtered_found_graph_out
-
-    def _filter_rca_causing_entities(self,
-                                     ga,
-                                     rca_graph,
-                                     root_id,
-                                     project_id,
-                                     is_admin_project):
-        """Filter the RCA entities which caused this alarm
-
-        Shows only the causing alarms which has the same project_id and also
-        the first alarm that has a different project_id. In case the tenant is
-        admin then project_id can also be None.
-
-        :type ga: NXAlgorithm
-        :type rca_graph: NXGraph
-        :type root_id: string
-        :type project_id: string
-        :type is_admin_project: boolean
-        :rtype: NXGraph
+        alarms = OrderedDict()
+        root_alarm = self.entity_graph.get_vertex(root)
+        if not self._is_active_alarm(root_alarm):
+            LOG.info('get_rca: root %s is not an active alarm', str(root))
+            return alarms
+
+        alarms[root] = root_alarm
+        queue = deque((root_alarm, direction)
+                      for direction in (Direction.OUT, Direction.IN))
+        visited = set((root, direction) for _, direction in queue)
+
+        while queue:
+            alarm, direction = queue.popleft()
+            for edge, neighbor in self._causes_neighbors(alarm, direction):
+                if (neighbor.vertex_id, direction) in visited:
+                    continue
+                visited.add((neighbor.vertex_id, direction))
+
+                if all_tenants:
+                    include, expand = True, True
+                elif direction == Direction.OUT:
+                    include = not self._is_rca_alarm_of_other_project(
+                        neighbor, project_id)
+                    expand = True
+                else:
+                    include = True
+                    expand = self._is_alarm_of_current_project(
+                        neighbor, project_id, is_admin_project)
+
+                if include and neighbor.vertex_id not in alarms:
+                    alarms[neighbor.vertex_id] = neighbor
+                if expand:
+                    queue.append((neighbor, direction))
+                if not all_tenants and direction == Direction.IN:
+                    # follow a single chain of causing alarms
+                    break
+
+        return alarms
+
+    def _causes_neighbors(self, alarm, direction):
+        """The active alarms connected by active 'causes' edges
+
+        :rtype: iterator of (edge, alarm) tuples
         """
-
-        entities = [root_id]
-        current_entity_id = root_id
-
-        while len(rca_graph.neighbors(current_entity_id,
-                                      direction=Direction.IN)) > 0:
-            current_entity = rca_graph.neighbors(current_entity_id,
-                                                 direction=Direction.IN)[0]
-            current_entity_id = current_entity.vertex_id
-            entities.append(current_entity.vertex_id)
-            if not self._is_alarm_of_current_project(current_entity,
-                                                     project_id,
-                                                     is_admin_project):
-                break
-
-        return ga.subgraph(entities)
+        for n_id in self.entity_graph.neighbor_ids(alarm.vertex_id,
+                                                   label=EdgeLabel.CAUSES,
+                                                   direction=direction):
+            if direction == Direction.OUT:
+                edge = self.entity_graph.get_edge(alarm.vertex_id, n_id,
+                                                  EdgeLabel.CAUSES)
+            else:
+                edge = self.entity_graph.get_edge(n_id, alarm.vertex_id,
+                                                  EdgeLabel.CAUSES)
+            if not edge or edge.get(EProps.VITRAGE_IS_DELETED):
+                continue
+            neighbor = self.entity_graph.get_vertex(n_id)
+            if self._is_active_alarm(neighbor):
+                yield edge, neighbor
+
+    def _find_causes_edges(self, alarms):
+        return [edge
+                for alarm in alarms.values()
+                for edge, caused_alarm in self._causes_neighbors(
+                    alarm, Direction.OUT)
+                if caused_alarm.vertex_id in alarms]
+
+    def _is_rca_alarm_of_other_project(self, alarm, project_id):
+        if not alarm.get(VProps.PROJECT_ID):
+            of_other_project = \
+                self.project_view.is_on_resource_of_other_project(
+                    alarm.vertex_id, project_id, True)
+            if of_other_project is not None:
+                return of_other_project
+        return self._is_alarm_of_other_project(alarm, project_id)
 
     @staticmethod
-    def _find_rca_index(found_graph, root):
-        for root_index, vertex in enumerate(found_graph._g):
-            if vertex == root:
-                return root_index
-        return 0
+    def _is_active_alarm(vertex):
+        return vertex is not None and \
+            vertex.get(VProps.VITRAGE_CATEGORY) == EntityCategory.ALARM and \
+            not vertex.get(VProps.VITRAGE_IS_DELETED)
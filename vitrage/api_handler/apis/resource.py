@@ -18,7 +18,7 @@ from osprofiler import profiler
 
 from vitrage.api_handler.apis.base import EntityGraphApisBase
 from vitrage.api_handler.apis.base import RESOURCES_ALL_QUERY
-from vitrage.common.constants import EntityCategory
+from vitrage.api_handler.project_view import ProjectView
 from vitrage.common.constants import VertexProperties as VProps
 
 
@@ -29,9 +29,10 @@ LOG = log.getLogger(__name__)
                     info={}, hide_args=False, trace_private=False)
 class ResourceApis(EntityGraphApisBase):
 
-    def __init__(self, entity_graph, conf):
+    def __init__(self, entity_graph, conf, project_view=None):
         self.entity_graph = entity_graph
         self.conf = conf
+        self.project_view = project_view or ProjectView(entity_graph)
 
     def get_resources(self, ctx, resource_type=None, all_tenants=False):
         LOG.debug('ResourceApis get_resources - resource_type: %s,'
@@ -41,22 +42,41 @@ class ResourceApis(EntityGraphApisBase):
         is_admin_project = ctx.get(self.IS_ADMIN_PROJECT_PROPERTY, False)
 
         if all_tenants:
-            resource_query = RESOURCES_ALL_QUERY
+            query = copy.deepcopy(RESOURCES_ALL_QUERY)
+            if resource_type:
+                type_query = {'==': {VProps.VITRAGE_TYPE: resource_type}}
+                query['and'].append(type_query)
+            resources = self.entity_graph.get_vertices(query_dict=query)
         else:
-            resource_query = self._get_query_with_project(
-                EntityCategory.RESOURCE,
-                project_id,
-                is_admin_project)
-        query = copy.deepcopy(resource_query)
+            resources = self._get_project_resources(project_id,
+                                                    is_admin_project,
+                                                    resource_type)
 
-        if resource_type:
-            type_query = {'==': {VProps.VITRAGE_TYPE: resource_type}}
-            query['and'].append(type_query)
-
-        resources = self.entity_graph.get_vertices(query_dict=query)
         return json.dumps({'resources': [resource.properties
                                          for resource in resources]})
 
+    def _get_project_resources(self,
+                               project_id,
+                               is_admin_project,
+                               resource_type):
+        """Finds all the resources of the project
+
+        In case the tenant is admin then project_id can also be None.
+
+        :type project_id: string
+        :type is_admin_project: boolean
+        :type resource_type: string
+        :rtype: list
+        """
+
+        resource_ids = self.project_view.resource_ids(project_id,
+                                                      is_admin_project)
+        resources = [self.entity_graph.get_vertex(resource_id)
+                     for resource_id in resource_ids]
+        return [resource for resource in resources if resource and
+                (not resource_type or
+                 resource.get(VProps.VITRAGE_TYPE) == resource_type)]
+
     def show_resource(self, ctx, vitrage_id):
         LOG.debug('Show resource with vitrage_id: %s', str(vitrage_id))
 
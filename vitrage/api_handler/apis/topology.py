@@ -16,9 +16,11 @@ from oslo_log import log
 from osprofiler import profiler
 
 from vitrage.api_handler.apis.base import ALARMS_ALL_QUERY
+from vitrage.api_handler.apis.base import cached_response
 from vitrage.api_handler.apis.base import EDGE_QUERY
 from vitrage.api_handler.apis.base import EntityGraphApisBase
 from vitrage.api_handler.apis.base import TOPOLOGY_AND_ALARMS_QUERY
+from vitrage.api_handler.project_view import ProjectView
 from vitrage.common.constants import EdgeProperties as EProps
 from vitrage.common.constants import EntityCategory
 from vitrage.common.constants import VertexProperties as VProps
@@ -33,10 +35,13 @@ LOG = log.getLogger(__name__)
                     info={}, hide_args=False, trace_private=False)
 class TopologyApis(EntityGraphApisBase):
 
-    def __init__(self, entity_graph, conf):
+    def __init__(self, entity_graph, conf, project_view=None):
         self.entity_graph = entity_graph
         self.conf = conf
+        self.project_view = project_view or ProjectView(entity_graph)
+        self.response_cache = self._create_response_cache(conf)
 
+    @cached_response
     def get_topology(self, ctx, graph_type, depth, query, root, all_tenants):
         LOG.debug("TopologyApis get_topology - root: %s, all_tenants=%s",
                   str(root), all_tenants)
@@ -73,6 +78,8 @@ class TopologyApis(EntityGraphApisBase):
                                             query_dict=current_query,
                                             depth=depth,
                                             edge_query_dict=EDGE_QUERY)
+            if graph_type == 'tree':
+                return graph.json_output_tree(root_id)
         # By default the graph_type is 'graph'
         else:
             if all_tenants:
@@ -113,21 +120,15 @@ class TopologyApis(EntityGraphApisBase):
         """
 
         if query:
-            q = query
+            tmp_graph = ga.create_graph_from_matching_vertices(
+                query_dict=query)
         else:
-            alarm_query = self._get_query_with_project(EntityCategory.ALARM,
-                                                       project_id,
-                                                       is_admin=True)
+            entities = self.project_view.resource_ids(project_id,
+                                                      is_admin_project)
+            entities.update(self.project_view.own_alarm_ids(
+                project_id, include_no_project=True))
+            tmp_graph = ga.subgraph(entities)
 
-            resource_query = \
-                self._get_query_with_project(EntityCategory.RESOURCE,
-                                             project_id,
-                                             is_admin_project)
-
-            default_query = {'or': [resource_query, alarm_query]}
-            q = default_query
-
-        tmp_graph = ga.create_graph_from_matching_vertices(query_dict=q)
         graph = self._create_graph_of_connected_components(ga, tmp_graph, root)
         edge_query = {EProps.VITRAGE_IS_DELETED: False}
         self._remove_unnecessary_elements(ga,
@@ -167,20 +168,33 @@ class TopologyApis(EntityGraphApisBase):
 
         for alarm in graph.get_vertices(query_dict=ALARMS_ALL_QUERY):
             if not alarm.get(VProps.PROJECT_ID, None):
-                cat_filter = {VProps.VITRAGE_CATEGORY: EntityCategory.RESOURCE}
-                resource_neighbors = \
-                    self.entity_graph.neighbors(alarm.vertex_id,
-                                                vertex_attr_filter=cat_filter)
-                if len(resource_neighbors) > 0:
-                    resource_proj_id = \
-                        resource_neighbors[0].get(VProps.PROJECT_ID, None)
-                    cond1 = is_admin_project and resource_proj_id and \
-                        resource_proj_id != current_project_id
-                    cond2 = not is_admin_project and \
-                        (not resource_proj_id or
-                         resource_proj_id != current_project_id)
-                    if cond1 or cond2:
-                        graph.remove_vertex(alarm)
+                of_other_project = \
+                    self.project_view.is_on_resource_of_other_project(
+                        alarm.vertex_id, current_project_id, is_admin_project)
+                if of_other_project is None:
+                    of_other_project = self._is_on_resource_of_other_project(
+                        alarm, current_project_id, is_admin_project)
+                if of_other_project:
+                    graph.remove_vertex(alarm)
+
+    def _is_on_resource_of_other_project(self,
+                                         alarm,
+                                         current_project_id,
+                                         is_admin_project):
+        cat_filter = {VProps.VITRAGE_CATEGORY: EntityCategory.RESOURCE}
+        resource_neighbors = \
+            self.entity_graph.neighbors(alarm.vertex_id,
+                                        vertex_attr_filter=cat_filter)
+        if len(resource_neighbors) > 0:
+            resource_proj_id = \
+                resource_neighbors[0].get(VProps.PROJECT_ID, None)
+            cond1 = is_admin_project and resource_proj_id and \
+                resource_proj_id != current_project_id
+            cond2 = not is_admin_project and \
+                (not resource_proj_id or
+                 resource_proj_id != current_project_id)
+            return cond1 or cond2
+        return False
 
     def _create_graph_of_connected_components(self, ga, tmp_graph, root):
         return ga.subgraph(self._topology_for_unrooted_graph(ga,
@@ -191,8 +205,8 @@ class TopologyApis(EntityGraphApisBase):
         """Finds topology for unrooted subgraph
 
         1. Finds all the connected component subgraphs in subgraph.
-        2. For each component, finds the path from one of the VMs (if exists)
-           to the root entity.
+        2. For each component, finds the containment path from one of the
+           VMs (if exists) to the root entity.
         3. Unify all the entities found and return them
 
         :type ga: NXAlgorithm
@@ -203,9 +217,6 @@ class TopologyApis(EntityGraphApisBase):
 
         entities = []
 
-        root_vertex = \
-            self.entity_graph.get_vertex(root)
-
         local_connected_component_subgraphs = \
             ga.connected_component_subgraphs(subgraph)
 
@@ -214,10 +225,10 @@ class TopologyApis(EntityGraphApisBase):
             instance_in_component_subgraph = \
                 self._find_instance_in_graph(component_subgraph)
             if instance_in_component_subgraph:
-                paths = ga.all_simple_paths(root_vertex.vertex_id,
-                                            instance_in_component_subgraph)
-                for path in paths:
-                    entities += path
+                path = self.entity_graph.containment_path(
+                    instance_in_component_subgraph)
+                if root in path:
+                    entities += path[:path.index(root) + 1]
 
         return set(entities)
 
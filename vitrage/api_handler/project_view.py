@@ -0,0 +1,330 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from collections import Counter
+from collections import defaultdict
+import threading
+
+from oslo_log import log
+
+from vitrage.common.constants import EntityCategory
+from vitrage.common.constants import VertexProperties as VProps
+
+LOG = log.getLogger(__name__)
+
+# The vertex properties that the view depends on
+VIEW_KEYS = (VProps.VITRAGE_CATEGORY,
+             VProps.PROJECT_ID,
+             VProps.VITRAGE_OPERATIONAL_SEVERITY,
+             VProps.VITRAGE_IS_DELETED,
+             VProps.VITRAGE_IS_PLACEHOLDER)
+
+
+class ProjectView(object):
+    """The resources and alarms of each project in the entity graph
+
+    Maintained from the graph notifications, so the tenant scoped apis do
+    not have to query the whole graph and the neighbors of every resource.
+
+    Only resources and alarms that are neither deleted nor placeholders are
+    included. The entity graph marks the vertices as deleted before it
+    removes them, so removals do not need to be notified.
+    For every alarm, the view keeps the resources it is connected to, and
+    the project ids of these resources (including deleted ones).
+
+    The alarms are also counted per operational severity, for every scope
+    an alarm is visible in, see _alarm_scopes. The count of all the alarms
+    includes the placeholder alarms, like ALARMS_ALL_QUERY.
+
+    The view is notified only about new elements and changes of VIEW_KEYS,
+    of edges and of resources and alarms.
+    """
+
+    def __init__(self, entity_graph):
+        self._graph = entity_graph
+        self._lock = threading.RLock()
+        self._resources = defaultdict(set)
+        self._alarms = defaultdict(set)
+        self._alarm_project = {}
+        self._alarm_resources = {}
+        self._resource_alarms = defaultdict(set)
+        self._resource_project = {}
+        self._alarm_severity = {}
+        self._counted_alarms = {}
+        self._all_counts = Counter()
+        self._all_alarm_severity = {}
+        self._project_counts = defaultdict(Counter)
+        self._admin_counts = defaultdict(Counter)
+        self._all_admin_counts = Counter()
+        with self._lock:
+            entity_graph.subscribe(self._on_graph_change,
+                                   categories=(EntityCategory.RESOURCE,
+                                               EntityCategory.ALARM),
+                                   changed_keys=VIEW_KEYS)
+            with entity_graph.read_only_views():
+                for vertex in entity_graph.get_vertices():
+                    self._update_vertex(vertex)
+
+    def resource_ids(self, project_id, is_admin_project):
+        """The resources of the project
+
+        In case the tenant is admin, also resources without a project
+        """
+        with self._lock:
+            return self._union(self._resources,
+                               self._project_ids(project_id, is_admin_project))
+
+    def alarm_ids(self, project_id, is_admin_project):
+        """The alarms of the project, directly or via their resources
+
+        Alarms without a project are included for an admin tenant, unless
+        they are on a resource of another project.
+        """
+        with self._lock:
+            alarms = set(self._alarms.get(project_id, ()))
+            if is_admin_project:
+                alarms.update(
+                    a for a in self._alarms.get(None, ())
+                    if not self._other_projects(a, project_id, True))
+            for resource_id in self.resource_ids(project_id,
+                                                 is_admin_project):
+                alarms.update(self._resource_alarms.get(resource_id, ()))
+            return alarms
+
+    def own_alarm_ids(self, project_id, include_no_project=False):
+        """The alarms whose project_id is the project
+
+        Ignores the resources of the alarms
+        """
+        with self._lock:
+            return self._union(self._alarms,
+                               self._project_ids(project_id,
+                                                 include_no_project))
+
+    def alarm_counts(self, project_id, is_admin_project):
+        """Count the alarms of alarm_ids per operational severity
+
+        :rtype: dict
+        """
+        with self._lock:
+            if is_admin_project:
+                counts = self._all_admin_counts.copy()
+                counts.update(self._admin_counts.get(project_id, {}))
+            else:
+                counts = self._project_counts.get(project_id, Counter())
+            return dict(counts)
+
+    def all_alarm_counts(self):
+        """Count all the alarms per operational severity
+
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._all_counts)
+
+    def is_on_resource_of_other_project(self, alarm_id, project_id,
+                                        is_admin_project):
+        """Checks if the alarm is on a resource of another project
+
+        In case the tenant is admin, resources without a project are not
+        considered to be of another project.
+
+        :return: None if the alarm is not in the view
+        """
+        with self._lock:
+            if alarm_id not in self._alarm_resources:
+                return None
+            return self._other_projects(alarm_id, project_id,
+                                        is_admin_project)
+
+    def _other_projects(self, alarm_id, project_id, is_admin_project):
+        for resource_id in self._alarm_resources.get(alarm_id, ()):
+            resource_project_id = self._resource_project.get(resource_id)
+            if resource_project_id != project_id and \
+                    (resource_project_id or not is_admin_project):
+                return True
+        return False
+
+    @staticmethod
+    def _project_ids(project_id, is_admin_project):
+        return [project_id, None] if is_admin_project else [project_id]
+
+    @staticmethod
+    def _union(ids_by_project, project_ids):
+        ids = set()
+        for project_id in project_ids:
+            ids.update(ids_by_project.get(project_id, ()))
+        return ids
+
+    def _on_graph_change(self, before, current, is_vertex, graph, *args,
+                         **kwargs):
+        with self._lock:
+            if is_vertex:
+                self._update_vertex(current)
+            else:
+                self._update_edge(current)
+
+    @staticmethod
+    def _is_active(vertex):
+        return vertex.get(VProps.VITRAGE_IS_DELETED) is False and \
+            vertex.get(VProps.VITRAGE_IS_PLACEHOLDER) is False
+
+    def _update_vertex(self, vertex):
+        v_id = vertex.vertex_id
+        category = vertex.get(VProps.VITRAGE_CATEGORY)
+        project_id = vertex.get(VProps.PROJECT_ID)
+        active = self._is_active(vertex)
+        self._count_in_all_alarms(
+            v_id,
+            category == EntityCategory.ALARM and
+            vertex.get(VProps.VITRAGE_IS_DELETED) is False,
+            vertex.get(VProps.VITRAGE_OPERATIONAL_SEVERITY))
+
+        if category == EntityCategory.RESOURCE:
+            self._update_resource(v_id, project_id, active)
+        elif category == EntityCategory.ALARM:
+            self._update_alarm(
+                v_id, project_id,
+                vertex.get(VProps.VITRAGE_OPERATIONAL_SEVERITY), active)
+
+    def _update_resource(self, resource_id, project_id, active):
+        old_project_id = self._resource_project.get(resource_id)
+        self._resources.get(old_project_id, set()).discard(resource_id)
+        if active:
+            self._resources[project_id].add(resource_id)
+        alarms = self._resource_alarms.get(resource_id)
+        if active or alarms:
+            self._resource_project[resource_id] = project_id
+        else:
+            self._forget_resource(resource_id)
+        for alarm_id in alarms or ():
+            self._count_alarm(alarm_id)
+
+    def _update_alarm(self, alarm_id, project_id, severity, active):
+        was_active = alarm_id in self._alarm_project
+        if was_active:
+            self._alarms[self._alarm_project.pop(alarm_id)].discard(alarm_id)
+            del self._alarm_severity[alarm_id]
+        if not active:
+            if was_active:
+                self._remove_alarm_links(alarm_id)
+                self._count_alarm(alarm_id)
+            return
+
+        self._alarm_project[alarm_id] = project_id
+        self._alarm_severity[alarm_id] = severity
+        self._alarms[project_id].add(alarm_id)
+        if not was_active:
+            self._alarm_resources[alarm_id] = set()
+            resources = self._graph.neighbors(
+                alarm_id,
+                vertex_attr_filter={
+                    VProps.VITRAGE_CATEGORY: EntityCategory.RESOURCE})
+            for resource in resources:
+                self._add_alarm_link(alarm_id, resource)
+        self._count_alarm(alarm_id)
+
+    def _update_edge(self, edge):
+        if edge.source_id in self._alarm_resources:
+            alarm_id, other_id = edge.source_id, edge.target_id
+        elif edge.target_id in self._alarm_resources:
+            alarm_id, other_id = edge.target_id, edge.source_id
+        else:
+            return
+        if other_id in self._alarm_resources[alarm_id]:
+            return
+        other = self._graph.get_vertex(other_id)
+        if other and \
+                other.get(VProps.VITRAGE_CATEGORY) == EntityCategory.RESOURCE:
+            self._add_alarm_link(alarm_id, other)
+            self._count_alarm(alarm_id)
+
+    def _add_alarm_link(self, alarm_id, resource):
+        resource_id = resource.vertex_id
+        self._alarm_resources[alarm_id].add(resource_id)
+        self._resource_alarms[resource_id].add(alarm_id)
+        self._resource_project[resource_id] = resource.get(VProps.PROJECT_ID)
+
+    def _remove_alarm_links(self, alarm_id):
+        for resource_id in self._alarm_resources.pop(alarm_id, ()):
+            alarms = self._resource_alarms.get(resource_id)
+            alarms.discard(alarm_id)
+            if not alarms:
+                del self._resource_alarms[resource_id]
+                resource_project_id = self._resource_project.get(resource_id)
+                if resource_id not in \
+                        self._resources.get(resource_project_id, ()):
+                    self._forget_resource(resource_id)
+
+    def _forget_resource(self, resource_id):
+        self._resource_project.pop(resource_id, None)
+        self._resource_alarms.pop(resource_id, None)
+
+    def _is_active_resource(self, resource_id):
+        project_id = self._resource_project.get(resource_id)
+        return resource_id in self._resources.get(project_id, ())
+
+    def _alarm_scopes(self, alarm_id):
+        """The scopes in which the alarm is returned by alarm_ids
+
+        :return: the projects of a non admin tenant, and the projects of an
+         admin tenant (None for all of them)
+        :rtype: tuple
+        """
+        project_id = self._alarm_project[alarm_id]
+        resources = self._alarm_resources[alarm_id]
+        resource_project_ids = \
+            set(self._resource_project.get(r) for r in resources)
+        active_project_ids = set(self._resource_project.get(r)
+                                 for r in resources
+                                 if self._is_active_resource(r))
+        other_project_ids = resource_project_ids - {None}
+
+        project_ids = active_project_ids | {project_id}
+        if None in active_project_ids or \
+                (project_id is None and not other_project_ids):
+            admin_project_ids = None
+        elif project_id is None and len(other_project_ids) == 1:
+            admin_project_ids = project_ids | other_project_ids
+        else:
+            admin_project_ids = project_ids
+        return frozenset(project_ids), admin_project_ids
+
+    def _count_alarm(self, alarm_id):
+        """Recount the alarm after a change of it or of its resources"""
+        old = self._counted_alarms.pop(alarm_id, None)
+        if old:
+            self._add_counts(-1, *old)
+        severity = self._alarm_severity.get(alarm_id)
+        if severity:
+            new = (severity,) + self._alarm_scopes(alarm_id)
+            self._counted_alarms[alarm_id] = new
+            self._add_counts(1, *new)
+
+    def _count_in_all_alarms(self, v_id, is_alarm, severity):
+        old_severity = self._all_alarm_severity.pop(v_id, None)
+        if old_severity:
+            self._all_counts[old_severity] -= 1
+        if is_alarm and severity:
+            self._all_alarm_severity[v_id] = severity
+            self._all_counts[severity] += 1
+
+    def _add_counts(self, delta, severity, project_ids, admin_project_ids):
+        for project_id in project_ids:
+            self._project_counts[project_id][severity] += delta
+        if admin_project_ids is None:
+            self._all_admin_counts[severity] += delta
+        else:
+            for project_id in admin_project_ids:
+                self._admin_counts[project_id][severity] += delta
@@ -22,6 +22,7 @@ from vitrage.api_handler.apis.rca import RcaApis
 from vitrage.api_handler.apis.resource import ResourceApis
 from vitrage.api_handler.apis.template import TemplateApis
 from vitrage.api_handler.apis.topology import TopologyApis
+from vitrage.api_handler.project_view import ProjectView
 from vitrage import messaging
 from vitrage import rpc as vitrage_rpc
 
@@ -35,6 +36,7 @@ class VitrageApiHandlerService(os_service.Service):
         self.conf = conf
         self.entity_graph = e_graph
         self.scenario_repo = scenario_repo
+        self.project_view = ProjectView(e_graph)
 
     def start(self):
         LOG.info("Vitrage Api Handler Service - Starting...")
@@ -46,14 +48,18 @@ class VitrageApiHandlerService(os_service.Service):
         target = oslo_messaging.Target(topic=self.conf.rpc_topic,
                                        server=rabbit_hosts)
 
-        endpoints = [TopologyApis(self.entity_graph, self.conf),
-                     AlarmApis(self.entity_graph, self.conf),
-                     RcaApis(self.entity_graph, self.conf),
+        endpoints = [TopologyApis(self.entity_graph, self.conf,
+                                  self.project_view),
+                     AlarmApis(self.entity_graph, self.conf,
+                               self.project_view),
+                     RcaApis(self.entity_graph, self.conf,
+                             self.project_view),
                      TemplateApis(
                          self.scenario_repo.templates,
                          self.scenario_repo.def_templates),
                      EventApis(self.conf),
-                     ResourceApis(self.entity_graph, self.conf)]
+                     ResourceApis(self.entity_graph, self.conf,
+                                  self.project_view)]
 
         server = vitrage_rpc.get_server(target, endpoints, transport)
 
@@ -17,9 +17,11 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 from collections import defaultdict
+from collections import OrderedDict
 import copy
 import itertools
 import random
+import threading
 
 from oslo_config import cfg
 
@@ -79,3 +81,46 @@ def get_portion(lst, num_of_portions, portion_index):
         curr_portion = next(g)
         portions[curr_portion].append(curr_item)
     return portions[portion_index]
+
+
+class LRUCache(object):
+    """A bounded mapping that evicts the least recently used entries
+
+    Thread safe. Keeps hit and miss counters, so callers can report the
+    cache efficiency.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -92,6 +92,11 @@ def convert_timestamp_format(current_timestamp_format, timestamp):
     )
 
 
+# The event types that are graph actions themselves
+GRAPH_ACTIONS = frozenset(value for name, value in GraphAction.__dict__.items()
+                          if not name.startswith('_'))
+
+
 def is_update_event(event):
     return event[DSProps.DATASOURCE_ACTION] == DatasourceAction.UPDATE
 
@@ -107,10 +112,23 @@ class TransformerBase(object):
     GRAPH_ACTION_MAPPING = {}
 
     key_to_uuid_cache = {}
+    uuid_to_key_cache = {}
+    # increased whenever a uuid is deleted from the cache
+    uuid_cache_version = 0
 
     def __init__(self, transformers, conf):
         self.conf = conf
         self.transformers = transformers
+        # resolved once, since reading the configuration for every event
+        # is expensive
+        self._update_method = self._get_update_method(conf)
+
+    def _get_update_method(self, conf):
+        """The lower case update method of the datasource, if it has one"""
+        vitrage_type = self.get_vitrage_type()
+        update_method = opt_exists(conf, vitrage_type) and \
+            opt_exists(conf[vitrage_type], DSOpts.UPDATE_METHOD)
+        return update_method.lower() if update_method else None
 
     def transform(self, entity_event):
         """Transform an entity event into entity wrapper.
@@ -130,10 +148,6 @@ class TransformerBase(object):
             entity_vertex = self._create_entity_vertex(entity_event)
             neighbors = self._create_neighbors(entity_event)
             action = self._extract_graph_action(entity_event)
-
-            if action == GraphAction.DELETE_ENTITY:
-                self._delete_id_from_cache(entity_vertex.vertex_id)
-
             return EntityWrapper(entity_vertex, neighbors, action)
         else:
             return EntityWrapper(self._create_end_vertex(entity_event),
@@ -141,12 +155,8 @@ class TransformerBase(object):
                                  GraphAction.END_MESSAGE)
 
     def _create_entity_vertex(self, entity_event):
-        if is_update_event(entity_event) and \
-                opt_exists(self.conf, self.get_vitrage_type()) and \
-                opt_exists(self.conf[self.get_vitrage_type()],
-                           DSOpts.UPDATE_METHOD):
-            update_method = \
-                self.conf[self.get_vitrage_type()].update_method.lower()
+        if is_update_event(entity_event) and self._update_method:
+            update_method = self._update_method
             if update_method == UpdateMethod.PUSH:
                 vertex = self._create_update_entity_vertex(entity_event)
                 return self.update_uuid_in_vertex(vertex)
@@ -176,20 +186,31 @@ class TransformerBase(object):
 
     @classmethod
     def uuid_from_deprecated_vitrage_id(cls, vitrage_id):
-        old_vitrage_id = hash(vitrage_id)
-        new_uuid = cls.key_to_uuid_cache.get(old_vitrage_id)
+        # The key itself and not its hash is used, since the cache is stored
+        # in the graph snapshots and string hashes differ between processes
+        new_uuid = cls.key_to_uuid_cache.get(vitrage_id)
         if not new_uuid:
-            new_uuid = uuidutils.generate_uuid()
-            cls.key_to_uuid_cache[old_vitrage_id] = new_uuid
+            # setdefault keeps the uuid of a concurrent transformation
+            new_uuid = cls.key_to_uuid_cache.setdefault(
+                vitrage_id, uuidutils.generate_uuid())
+            cls.uuid_to_key_cache[new_uuid] = vitrage_id
 
         return new_uuid
 
     @classmethod
-    def _delete_id_from_cache(cls, vitrage_id):
-        for key, value in cls.key_to_uuid_cache.items():
-            if value == vitrage_id:
-                del cls.key_to_uuid_cache[key]
-                break
+    def load_uuid_cache(cls, key_to_uuid):
+        """Add entity keys and their uuids, e.g. from a graph snapshot"""
+        for key, vitrage_id in key_to_uuid.items():
+            cls.key_to_uuid_cache[key] = vitrage_id
+            cls.uuid_to_key_cache[vitrage_id] = key
+
+    @classmethod
+    def delete_id_from_cache(cls, vitrage_id):
+        """Forget the uuid of a deleted entity, so a new one is created"""
+        key = cls.uuid_to_key_cache.pop(vitrage_id, None)
+        if key is not None:
+            cls.key_to_uuid_cache.pop(key, None)
+            cls.uuid_cache_version += 1
 
     @abc.abstractmethod
     def _create_snapshot_entity_vertex(self, entity_event):
@@ -321,9 +342,9 @@ class TransformerBase(object):
         :return: the action that the processor needs to perform
         :rtype: str
         """
-        if DSProps.EVENT_TYPE in entity_event and \
-            entity_event[DSProps.EVENT_TYPE] in GraphAction.__dict__.values():
-            return entity_event[DSProps.EVENT_TYPE]
+        event_type = entity_event.get(DSProps.EVENT_TYPE)
+        if event_type in GRAPH_ACTIONS:
+            return event_type
 
         datasource_action = entity_event[DSProps.DATASOURCE_ACTION]
 
@@ -27,9 +27,68 @@ OPTS = [
                default='vitrage.graph',
                help='The topic that vitrage-graph uses for graph '
                     'notification messages.'),
+    cfg.IntOpt('max_queued_notifications',
+               default=10000,
+               min=0,
+               help='Maximal number of graph notifications that wait to be '
+                    'sent to the notifier topics. If 0, the number is not '
+                    'limited.'),
+    cfg.StrOpt('notifications_overflow',
+               default='block',
+               choices=['block', 'drop'],
+               help='What to do with a graph notification when '
+                    'max_queued_notifications are waiting to be sent. '
+                    'block - the entity graph updates wait until it is '
+                    'queued. drop - the notification is not sent.'),
     cfg.StrOpt('graph_driver',
                default='networkx',
                help='graph driver implementation class'),
+    cfg.FloatOpt('event_coalescing_window',
+                 default=0,
+                 min=0,
+                 help='Time (in seconds) during which the collector events '
+                      'are kept before they are processed, so that events '
+                      'which are superseded by a newer event of the same '
+                      'entity are dropped. If 0, the events are processed as '
+                      'they arrive.'),
+    cfg.IntOpt('max_queued_events',
+               default=10000,
+               min=0,
+               help='Maximal number of received events of each priority '
+                    '(collector events, and evaluator events that are '
+                    'processed first) that wait to be processed. When '
+                    'reached, the events are not received until some of '
+                    'them are processed. If 0, the number is not limited.'),
+    cfg.IntOpt('stats_interval',
+               default=60,
+               min=0,
+               help='Interval (in seconds) between logs of the number of '
+                    'queued events of each priority, and of the times the '
+                    'events waited to be processed. If 0, they are logged '
+                    'only when vitrage-graph stops.'),
+    cfg.IntOpt('transform_workers',
+               default=0,
+               min=0,
+               help='Number of threads that transform the received events, '
+                    'while the previous events are applied to the entity '
+                    'graph. The events are still applied one by one, in the '
+                    'order they were received. If 0, every event is '
+                    'transformed when it is applied.'),
+    cfg.StrOpt('graph_snapshots_dir',
+               help='A directory where vitrage-graph periodically stores '
+                    'the entity graph, and loads it from when it starts. If '
+                    'not set, the entity graph is not stored.'),
+    cfg.IntOpt('graph_snapshots_interval',
+               default=600,
+               min=1,
+               help='Interval (in seconds) between stores of the entity '
+                    'graph in graph_snapshots_dir.'),
+    cfg.IntOpt('api_response_cache_size',
+               default=100,
+               min=0,
+               help='Number of api responses (per api) that are cached '
+                    'until the entity graph changes. If 0, the responses '
+                    'are not cached.'),
 ]
 
 EVALUATOR_TOPIC = 'vitrage.evaluator'
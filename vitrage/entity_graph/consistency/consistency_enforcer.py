@@ -26,6 +26,7 @@ from vitrage.datasources.consistency import CONSISTENCY_DATASOURCE
 from vitrage.datasources import OPENSTACK_CLUSTER
 from vitrage.evaluator.actions.evaluator_event_transformer \
     import VITRAGE_DATASOURCE
+from vitrage.utils.datetime import parse_timestamp
 from vitrage.utils.datetime import utcnow
 
 LOG = log.getLogger(__name__)
@@ -61,33 +62,59 @@ class ConsistencyEnforcer(object):
             LOG.exception(
                 'Error in deleting vertices from entity_graph: %s', e)
 
+    def delete_entities_not_sampled_since(self, sample_timestamps,
+                                          vitrage_types=None):
+        """Mark as deleted the entities that were not sampled again
+
+        The sample timestamps of the entities are compared with their own
+        earlier sample timestamps, and not with the local time, since they
+        are set by the datasources.
+
+        :param sample_timestamps: the earlier sample timestamp of every
+         entity, by vertex id
+        :param vitrage_types: if not None, only the entities of these types
+         are marked as deleted
+        """
+        vertices = []
+        for vertex_id, sample_timestamp in sample_timestamps.items():
+            vertex = self.graph.get_vertex(vertex_id)
+            if vertex and \
+                    vertex.get(VProps.VITRAGE_TYPE) != VITRAGE_DATASOURCE and \
+                    not vertex.get(VProps.VITRAGE_IS_DELETED) and \
+                    not vertex.get(VProps.VITRAGE_IS_PLACEHOLDER) and \
+                    (vitrage_types is None or
+                     vertex.get(VProps.VITRAGE_TYPE) in vitrage_types) and \
+                    vertex.get(VProps.VITRAGE_SAMPLE_TIMESTAMP) == \
+                    sample_timestamp:
+                vertices.append(vertex)
+        vertices = self._filter_vertices_to_be_deleted(vertices)
+        LOG.info('Found %s vertices that were not sampled again',
+                 len(vertices))
+        self._push_events_to_queue(vertices, GraphAction.DELETE_ENTITY)
+
     def _find_placeholder_entities(self):
-        vitrage_sample_tstmp = str(utcnow() - timedelta(
-            seconds=2 * self.conf.datasources.snapshots_interval))
+        sample_time_limit = utcnow() - timedelta(
+            seconds=2 * self.conf.datasources.snapshots_interval)
         query = {
             'and': [
                 {'!=': {VProps.VITRAGE_TYPE: VITRAGE_DATASOURCE}},
-                {'<': {VProps.VITRAGE_SAMPLE_TIMESTAMP: vitrage_sample_tstmp}},
                 {'==': {VProps.VITRAGE_IS_DELETED: False}},
                 {'==': {VProps.VITRAGE_IS_PLACEHOLDER: True}},
             ]
         }
 
         vertices = self.graph.get_vertices(query_dict=query)
+        vertices = self._filter_sampled_before(vertices, sample_time_limit)
 
         return set(self._filter_vertices_to_be_deleted(vertices))
 
     def _find_old_deleted_entities(self):
-        vitrage_sample_tstmp = str(utcnow() - timedelta(
-            seconds=self.conf.consistency.min_time_to_delete))
-        query = {
-            'and': [
-                {'==': {VProps.VITRAGE_IS_DELETED: True}},
-                {'<': {VProps.VITRAGE_SAMPLE_TIMESTAMP: vitrage_sample_tstmp}}
-            ]
-        }
+        sample_time_limit = utcnow() - timedelta(
+            seconds=self.conf.consistency.min_time_to_delete)
+        query = {VProps.VITRAGE_IS_DELETED: True}
 
-        vertices = self.graph.get_vertices(query_dict=query)
+        vertices = self.graph.get_vertices(vertex_attr_filter=query)
+        vertices = self._filter_sampled_before(vertices, sample_time_limit)
 
         return self._filter_vertices_to_be_deleted(vertices)
 
@@ -106,6 +133,26 @@ class ConsistencyEnforcer(object):
             }
             self.actions_callback('consistency', event)
 
+    @staticmethod
+    def _filter_sampled_before(vertices, time_limit):
+        """Filter the vertices that were sampled before time_limit
+
+        The sample timestamps are compared as times and not as strings, since
+        they are not all in the same format.
+        """
+        result = []
+        for vertex in vertices:
+            try:
+                sample_time = parse_timestamp(
+                    vertex[VProps.VITRAGE_SAMPLE_TIMESTAMP])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if sample_time.tzinfo is None:
+                sample_time = sample_time.replace(tzinfo=time_limit.tzinfo)
+            if sample_time < time_limit:
+                result.append(vertex)
+        return result
+
     @staticmethod
     def _filter_vertices_to_be_deleted(vertices):
         return list(filter(
@@ -0,0 +1,118 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import itertools
+import threading
+
+from dateutil import tz
+from oslo_log import log
+
+from vitrage.common.constants import DatasourceAction
+from vitrage.common.constants import DatasourceProperties as DSProps
+from vitrage.utils.datetime import parse_timestamp
+
+LOG = log.getLogger(__name__)
+
+
+class EventCoalescer(object):
+    """Drop events that are superseded by newer events of the same entity
+
+    The events are kept for a short window before they are processed. If
+    several events of the same entity (according to the transformer entity
+    key) arrive during the window, only the newest one (according to
+    vitrage_sample_date) is processed, in the place of the last arrived one.
+
+    Only snapshot and update events are coalesced. Other events, e.g. the
+    events of the initial snapshot and its end messages, are processed in
+    order, after the events that arrived before them.
+    """
+
+    COALESCED_ACTIONS = (DatasourceAction.SNAPSHOT, DatasourceAction.UPDATE)
+
+    def __init__(self, window, extract_key, do_work_func):
+        self._window = window
+        self._extract_key = extract_key
+        self._do_work_func = do_work_func
+        self._events = {}
+        self._order = itertools.count()
+        self._timer = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.received_count = 0
+        self.dropped_count = 0
+
+    def add(self, event):
+        key = self._get_key(event)
+        with self._lock:
+            self.received_count += 1
+            if key in self._events:
+                self.dropped_count += 1
+                event = self._newer_event(self._events.pop(key)[1], event)
+            self._events[key] = (next(self._order), event)
+            if not self._timer:
+                self._timer = threading.Timer(self._window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Process the pending events, in the order of their arrival"""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer:
+                    self._timer.cancel()
+                    self._timer = None
+                events = sorted(self._events.values(), key=lambda e: e[0])
+                self._events = {}
+                received, dropped = self.received_count, self.dropped_count
+
+            if events:
+                LOG.debug('Event coalescing: %d events were dropped out of '
+                          '%d received', dropped, received)
+            for order, event in events:
+                try:
+                    self._do_work_func(event)
+                except Exception as e:
+                    LOG.exception(e)
+
+    def _get_key(self, event):
+        if event.get(DSProps.DATASOURCE_ACTION) not in self.COALESCED_ACTIONS:
+            return object()
+        try:
+            return self._extract_key(event)
+        except Exception:
+            return object()
+
+    @staticmethod
+    def _newer_event(old_event, new_event):
+        """The event with the later sample date
+
+        The sample dates are compared as times and not as strings, since
+        they are not all in the same format. If they can not be compared,
+        the last arrived event is considered newer.
+        """
+        try:
+            old_time = _sample_time(old_event)
+            new_time = _sample_time(new_event)
+            if old_time > new_time:
+                return old_event
+        except (TypeError, ValueError, OverflowError):
+            pass
+        return new_event
+
+
+def _sample_time(event):
+    sample_time = parse_timestamp(event.get(DSProps.SAMPLE_DATE))
+    if sample_time.tzinfo is None:
+        sample_time = sample_time.replace(tzinfo=tz.tzutc())
+    return sample_time
@@ -0,0 +1,145 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import zlib
+
+from oslo_log import log
+from six.moves import cPickle as pickle
+
+from vitrage.common.constants import EdgeLabel
+from vitrage.common.constants import VertexProperties as VProps
+from vitrage.datasources.transformer_base import TransformerBase
+from vitrage.evaluator.actions.evaluator_event_transformer \
+    import VITRAGE_DATASOURCE
+from vitrage.graph import Direction
+from vitrage.graph import Edge
+from vitrage.graph import Vertex
+
+LOG = log.getLogger(__name__)
+
+SNAPSHOT_FILE = 'entity_graph.snapshot'
+SNAPSHOT_VERSION = 1
+
+# Properties that are set by the evaluator, see EvaluatorEventTransformer
+EVALUATOR_PROPERTIES = (VProps.VITRAGE_STATE, VProps.IS_MARKED_DOWN)
+
+
+class GraphPersistor(object):
+    """Store the entity graph in a snapshot file, and load it on startup
+
+    The snapshot is a compressed pickle of the vertices, the edges and the
+    uuids of the transformer keys (TransformerBase.key_to_uuid_cache).
+
+    The results of the evaluator (deduced alarms, causal relationships and
+    states) are not loaded, since the evaluator does not keep its actions
+    across restarts. It reproduces them once it runs on the loaded graph.
+
+    The sample timestamps of the loaded entities are kept in
+    restored_sample_timestamps, to tell which of them were not reported
+    again by their datasources.
+    """
+
+    def __init__(self, conf, graph):
+        self.graph = graph
+        self.restored_sample_timestamps = {}
+        self.snapshot_path = os.path.join(
+            conf.entity_graph.graph_snapshots_dir, SNAPSHOT_FILE)
+
+    def take_snapshot(self):
+        """Capture the graph
+
+        Must not run concurrently with graph updates. Since the graph does
+        not update the properties of its elements in place, the properties
+        are captured without being copied.
+        """
+        with self.graph.read_only_views():
+            vertices = self.graph.get_vertices()
+            edges = [(e.source_id, e.target_id, e.label, e.properties)
+                     for v in vertices
+                     for e in self.graph.get_edges(v.vertex_id,
+                                                   direction=Direction.OUT)]
+            vertices = [(v.vertex_id, v.properties) for v in vertices]
+        return {
+            'version': SNAPSHOT_VERSION,
+            'vertices': vertices,
+            'edges': edges,
+            'key_to_uuid_cache': dict(TransformerBase.key_to_uuid_cache),
+        }
+
+    def store_snapshot(self, snapshot):
+        snapshot['vertices'] = [(v_id, dict(props))
+                                for v_id, props in snapshot['vertices']]
+        snapshot['edges'] = [(source_id, target_id, label, dict(props))
+                             for source_id, target_id, label, props
+                             in snapshot['edges']]
+        data = zlib.compress(pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL))
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.rename(tmp_path, self.snapshot_path)
+        LOG.info('Stored entity graph snapshot with %d vertices, %d edges '
+                 '(%d bytes)', len(snapshot['vertices']),
+                 len(snapshot['edges']), len(data))
+
+    def store_graph(self):
+        self.store_snapshot(self.take_snapshot())
+
+    def load_graph(self, state_manager=None):
+        """Load the graph from the snapshot file, if it exists
+
+        :param state_manager: recalculates the aggregated state of vertices
+         whose evaluator state was removed
+        :type state_manager: DatasourceInfoMapper
+        :return: True if the graph was loaded
+        """
+        if not os.path.exists(self.snapshot_path):
+            LOG.info('No entity graph snapshot in %s', self.snapshot_path)
+            return False
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = pickle.loads(zlib.decompress(f.read()))
+            if snapshot.get('version') != SNAPSHOT_VERSION:
+                LOG.warning('Ignoring entity graph snapshot of version %s',
+                            snapshot.get('version'))
+                return False
+        except Exception as e:
+            LOG.exception('Failed to read entity graph snapshot: %s', e)
+            return False
+
+        skipped_ids = set()
+        for v_id, props in snapshot['vertices']:
+            if props.get(VProps.VITRAGE_TYPE) == VITRAGE_DATASOURCE:
+                skipped_ids.add(v_id)
+                continue
+            vertex = Vertex(v_id, props)
+            if not props.get(VProps.VITRAGE_IS_DELETED) and \
+                    not props.get(VProps.VITRAGE_IS_PLACEHOLDER):
+                self.restored_sample_timestamps[v_id] = \
+                    props.get(VProps.VITRAGE_SAMPLE_TIMESTAMP)
+            if any([props.pop(prop, None) is not None
+                    for prop in EVALUATOR_PROPERTIES]) and state_manager:
+                state_manager.vitrage_aggregated_state(vertex, None)
+            self.graph.add_vertex(vertex)
+
+        for source_id, target_id, label, props in snapshot['edges']:
+            if label == EdgeLabel.CAUSES or \
+                    source_id in skipped_ids or target_id in skipped_ids:
+                continue
+            self.graph.add_edge(Edge(source_id, target_id, label, props))
+
+        TransformerBase.load_uuid_cache(snapshot['key_to_uuid_cache'])
+        LOG.info('Loaded entity graph snapshot with %d vertices, %d edges',
+                 self.graph.num_vertices(), self.graph.num_edges())
+        return True
@@ -0,0 +1,144 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from collections import deque
+import threading
+import time
+
+from oslo_log import log
+
+LOG = log.getLogger(__name__)
+
+
+class PriorityScheduler(object):
+    """Do the queued work items on a single thread, by priority
+
+    Every priority has its own queue, and the work thread always takes the
+    oldest item of the most urgent (lowest) priority. The thread sleeps on
+    a condition variable while there is no work, and is woken up by put.
+
+    If max_size is set, put blocks while the queue of its priority is full,
+    to slow down the producers of that priority.
+
+    For every priority, the scheduler counts the done items, and keeps the
+    total time the items waited in the queue, and the maximal time since the
+    last log_stats.
+    """
+
+    def __init__(self, do_work_func, priorities, max_size=0):
+        self._do_work_func = do_work_func
+        self._max_size = max_size
+        self._queues = [deque() for _ in range(priorities)]
+        self._cond = threading.Condition()
+        self._work_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self.done_counts = [0] * priorities
+        self.total_wait_times = [0.0] * priorities
+        self.max_wait_times = [0.0] * priorities
+        self._logged_counts = [0] * priorities
+        self._logged_wait_times = [0.0] * priorities
+
+    def start(self):
+        with self._cond:
+            self._stopping = False
+            if self._thread:
+                return
+            self._thread = threading.Thread(name='priority_scheduler',
+                                            target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """Stop the work thread, after the queued items are done"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    def put(self, priority, item):
+        queue = self._queues[priority]
+        with self._cond:
+            while self._max_size and len(queue) >= self._max_size:
+                self._cond.wait()
+            queue.append((time.time(), item))
+            self._cond.notify_all()
+
+    def run_exclusively(self, func):
+        """Run func while no work item is done"""
+        with self._work_lock:
+            return func()
+
+    def queue_sizes(self):
+        with self._cond:
+            return [len(queue) for queue in self._queues]
+
+    def log_stats(self):
+        """Log the queued items, and the items done since the last call"""
+        with self._cond:
+            sizes = [len(queue) for queue in self._queues]
+            done_counts = list(self.done_counts)
+            wait_times = list(self.total_wait_times)
+            max_wait_times = list(self.max_wait_times)
+            self.max_wait_times = [0.0] * len(self._queues)
+
+        for priority, size in enumerate(sizes):
+            done = done_counts[priority] - self._logged_counts[priority]
+            wait_time = \
+                wait_times[priority] - self._logged_wait_times[priority]
+            LOG.info('Priority %d: %d queued, %d done, average wait %.3f '
+                     'seconds, maximal wait %.3f seconds', priority, size,
+                     done, wait_time / max(done, 1),
+                     max_wait_times[priority])
+        self._logged_counts = done_counts
+        self._logged_wait_times = wait_times
+
+    def _run(self):
+        while self._wait_for_work():
+            with self._work_lock:
+                priority, item = self._pop()
+                try:
+                    self._do_work_func(item)
+                except Exception as e:
+                    LOG.exception(e)
+
+    def _wait_for_work(self):
+        """Wait until there is work, or the scheduler is stopped
+
+        :return: False if the thread should exit
+        """
+        with self._cond:
+            while not any(self._queues):
+                if self._stopping:
+                    return False
+                self._cond.wait()
+            return True
+
+    def _pop(self):
+        with self._cond:
+            for priority, queue in enumerate(self._queues):
+                if queue:
+                    put_time, item = queue.popleft()
+                    break
+            self._cond.notify_all()
+
+            wait_time = time.time() - put_time
+            self.done_counts[priority] += 1
+            self.total_wait_times[priority] += wait_time
+            self.max_wait_times[priority] = \
+                max(self.max_wait_times[priority], wait_time)
+        return priority, item
@@ -11,6 +11,9 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+from collections import deque
+import threading
+
 from oslo_log import log
 import oslo_messaging
 
@@ -23,11 +26,26 @@ from vitrage.messaging import get_transport
 
 LOG = log.getLogger(__name__)
 
+# The vertex properties that _get_notification_type depends on
+NOTIFICATION_KEYS = (VProps.VITRAGE_CATEGORY,
+                     VProps.VITRAGE_TYPE,
+                     VProps.VITRAGE_IS_DELETED,
+                     VProps.VITRAGE_IS_PLACEHOLDER,
+                     VProps.IS_MARKED_DOWN)
+
+
+DROP_OVERFLOW = 'drop'
+
 
 class GraphNotifier(object):
-    """Allows writing to message bus"""
+    """Allows writing to message bus
+
+    The notifications are sent by a NotificationSender, so the graph
+    updates do not wait for the message bus.
+    """
     def __init__(self, conf):
         self.oslo_notifier = None
+        self._sender = None
         topics = self._get_topics(conf)
         if not topics:
             LOG.info('Graph Notifier is disabled')
@@ -37,11 +55,20 @@ class GraphNotifier(object):
             driver='messagingv2',
             publisher_id='vitrage.graph',
             topics=topics)
+        self._sender = NotificationSender(
+            self._send,
+            conf.entity_graph.max_queued_notifications,
+            conf.entity_graph.notifications_overflow == DROP_OVERFLOW)
 
     @property
     def enabled(self):
         return self.oslo_notifier is not None
 
+    def stop(self):
+        """Send the queued notifications, and stop the sender thread"""
+        if self._sender:
+            self._sender.stop()
+
     def _get_topics(self, conf):
         topics = []
 
@@ -64,6 +91,14 @@ class GraphNotifier(object):
 
         return topics
 
+    def subscribe(self, graph):
+        """Subscribe to the graph changes that may need a notification"""
+        graph.subscribe(self.notify_when_applicable,
+                        edges=False,
+                        categories=(EntityCategory.ALARM,
+                                    EntityCategory.RESOURCE),
+                        changed_keys=NOTIFICATION_KEYS)
+
     def notify_when_applicable(self, before, current, is_vertex, graph):
         """Callback subscribed to driver.graph updates
 
@@ -82,22 +117,108 @@ class GraphNotifier(object):
         # in case the vertex point to some resource add the resource to the
         # notification (useful for deduce alarm notifications)
         if current.get(VProps.VITRAGE_RESOURCE_ID):
-            current.properties[VProps.RESOURCE] = graph.get_vertex(
+            current[VProps.RESOURCE] = graph.get_vertex(
                 current.get(VProps.VITRAGE_RESOURCE_ID))
 
-        LOG.info('notification_types : %s', str(notification_types))
-        LOG.info('notification properties : %s', current.properties)
+        LOG.debug('notification_types : %s', str(notification_types))
+        LOG.debug('notification properties : %s', current.properties)
+
+        payload = dict(current.properties)
+        self._sender.put([(notification_type, payload)
+                          for notification_type in notification_types])
 
-        for notification_type in notification_types:
+    def _send(self, notifications):
+        for notification_type, payload in notifications:
             try:
-                self.oslo_notifier.info(
-                    {},
-                    notification_type,
-                    current.properties)
+                self.oslo_notifier.info({}, notification_type, payload)
             except Exception as e:
                 LOG.exception('Cannot notify - %s - %s', notification_type, e)
 
 
+class NotificationSender(object):
+    """Send the queued notifications on a background thread
+
+    The thread takes all the queued notifications at once, and passes them
+    to send_func in the order they were queued.
+
+    If max_queued is set, and that many notifications wait in the queue,
+    put either waits until the thread takes them, or drops the new
+    notifications, according to drop_overflow. The notifications put after
+    stop are dropped as well. The dropped notifications are counted.
+    """
+
+    def __init__(self, send_func, max_queued=0, drop_overflow=False):
+        self._send_func = send_func
+        self._max_queued = max_queued
+        self._drop_overflow = drop_overflow
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self.sent_count = 0
+        self.dropped_count = 0
+
+    def put(self, notifications):
+        with self._cond:
+            if self._stopping:
+                self.dropped_count += len(notifications)
+                LOG.warning('Graph notifier is stopped, %d notifications '
+                            'dropped', len(notifications))
+                return
+            if not self._thread:
+                self._thread = threading.Thread(name='graph_notifier',
+                                                target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+            for notification in notifications:
+                if not self._wait_for_room():
+                    self.dropped_count += 1
+                    if self.dropped_count % 1000 == 1:
+                        LOG.warning('Graph notifications queue is full, %d '
+                                    'notifications dropped so far',
+                                    self.dropped_count)
+                    continue
+                self._queue.append(notification)
+            self._cond.notify_all()
+
+    def stop(self):
+        """Stop the thread, after the queued notifications are sent"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread:
+            thread.join()
+        self._thread = None
+
+    def _wait_for_room(self):
+        """Wait until the queue is not full, unless overflows are dropped
+
+        :return: False if the notification should be dropped
+        """
+        while self._max_queued and len(self._queue) >= self._max_queued:
+            if self._drop_overflow or self._stopping:
+                return False
+            self._cond.wait()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                notifications = list(self._queue)
+                self._queue.clear()
+                self._cond.notify_all()
+            try:
+                self._send_func(notifications)
+            except Exception as e:
+                LOG.exception('Failed to send graph notifications: %s', e)
+            self.sent_count += len(notifications)
+
+
 def _get_notification_type(before, current, is_vertex):
     if not is_vertex:
         return None
@@ -29,6 +29,9 @@ from vitrage.graph import Direction
 
 LOG = log.getLogger(__name__)
 
+# the version of the uuid cache an event was transformed with
+UUID_CACHE_VERSION = 'uuid_cache_version'
+
 
 class Processor(processor.ProcessorBase):
 
@@ -42,7 +45,7 @@ class Processor(processor.ProcessorBase):
         self.entity_graph = e_graph
         self._notifier = GraphNotifier(conf)
 
-    def process_event(self, event):
+    def process_event(self, event, entity=None):
         """Decides which action to run on given event
 
         Transforms the event into a tuple (vertex, neighbors,action).
@@ -51,15 +54,39 @@ class Processor(processor.ProcessorBase):
 
         :param event: The event to be processed
         :type event: Dictionary
+        :param entity: The event, already transformed by transform_event
+        :type entity: EntityWrapper
         """
 
         LOG.debug('processor event:\n%s', event)
 
-        self._enrich_event(event)
-        entity = self.transformer_manager.transform(event)
+        if entity is not None and event.pop(UUID_CACHE_VERSION, None) != \
+                TransformerBase.uuid_cache_version:
+            # a preceding delete event may have deleted a uuid the event
+            # was transformed with, so it is transformed again
+            entity = None
+        if entity is None:
+            self._enrich_event(event)
+            entity = self.transformer_manager.transform(event)
         self._calculate_vitrage_aggregated_state(entity.vertex, entity.action)
         self.actions[entity.action](entity.vertex, entity.neighbors)
 
+    def transform_event(self, event):
+        """Transform an event, if it does not depend on the entity graph
+
+        Unlike process_event, may run concurrently with graph updates.
+
+        :return: The transformed event, or None if the event is enriched
+         from the entity graph, and is transformed by process_event
+        :rtype: EntityWrapper
+        """
+        if self.transformer_manager.get_enrich_query(event) is not None:
+            return None
+        uuid_cache_version = TransformerBase.uuid_cache_version
+        entity = self.transformer_manager.transform(event)
+        event[UUID_CACHE_VERSION] = uuid_cache_version
+        return entity
+
     def create_entity(self, new_vertex, neighbors):
         """Adds new vertex to the entity graph
 
@@ -141,6 +168,9 @@ class Processor(processor.ProcessorBase):
                         "deleted_vertex - %s, graph_vertex - %s",
                         deleted_vertex, graph_vertex)
 
+        # the following events of the entity key are of a new entity
+        TransformerBase.delete_id_from_cache(deleted_vertex.vertex_id)
+
     def update_relationship(self, entity_vertex, neighbors):
         LOG.debug('Update relationship in entity graph:\n%s', neighbors)
 
@@ -190,9 +220,14 @@ class Processor(processor.ProcessorBase):
 
     def on_recieved_all_end_messages(self):
         if self._notifier and self._notifier.enabled:
-            self.entity_graph.subscribe(self._notifier.notify_when_applicable)
+            self._notifier.subscribe(self.entity_graph)
             LOG.info('Graph notifications subscription added')
 
+    def stop(self):
+        """Send the graph notifications that are still queued"""
+        if self._notifier:
+            self._notifier.stop()
+
     def _update_neighbors(self, vertex, neighbors):
         """Updates vertices neighbor connections
 
@@ -265,24 +300,27 @@ class Processor(processor.ProcessorBase):
             PUtils.find_neighbor_types(neighbors)
 
         neighbor_edges = set(e for v, e in neighbors)
-        for curr_edge in self.entity_graph.get_edges(vertex.vertex_id,
-                                                     direction=Direction.BOTH):
-            # check if the edge in the graph has a a connection to the
-            # same type of resources in the new neighbors list
-            neighbor_vertex = self.entity_graph.get_vertex(
-                curr_edge.other_vertex(vertex.vertex_id))
-
-            is_connection_type_exist = PUtils.get_vertex_types(
-                neighbor_vertex) in graph_neighbor_types
-
-            if not is_connection_type_exist:
-                valid_edges.add(curr_edge)
-                continue
-
-            if curr_edge in neighbor_edges:
-                valid_edges.add(curr_edge)
-            else:
-                obsolete_edges.add(curr_edge)
+        # The graph edges and vertices are only read (or copied on write)
+        with self.entity_graph.read_only_views():
+            graph_edges = self.entity_graph.get_edges(
+                vertex.vertex_id, direction=Direction.BOTH)
+            for curr_edge in graph_edges:
+                # check if the edge in the graph has a a connection to the
+                # same type of resources in the new neighbors list
+                neighbor_vertex = self.entity_graph.get_vertex(
+                    curr_edge.other_vertex(vertex.vertex_id))
+
+                is_connection_type_exist = PUtils.get_vertex_types(
+                    neighbor_vertex) in graph_neighbor_types
+
+                if not is_connection_type_exist:
+                    valid_edges.add(curr_edge)
+                    continue
+
+                if curr_edge in neighbor_edges:
+                    valid_edges.add(curr_edge)
+                else:
+                    obsolete_edges.add(curr_edge)
 
         return valid_edges, obsolete_edges
 
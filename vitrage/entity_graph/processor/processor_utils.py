@@ -12,14 +12,13 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-from dateutil import parser
-
 from oslo_log import log
 
 from vitrage.common.constants import EdgeProperties as EProps
 from vitrage.common.constants import VertexProperties as VProps
 from vitrage.graph import Edge
 from vitrage.graph import Vertex
+from vitrage.utils.datetime import parse_timestamp
 from vitrage.utils.datetime import utcnow
 
 
@@ -30,12 +29,12 @@ def is_newer_vertex(prev_vertex, new_vertex):
     prev_timestamp = prev_vertex.get(VProps.VITRAGE_SAMPLE_TIMESTAMP)
     if not prev_timestamp:
         return True
-    prev_time = parser.parse(prev_timestamp)
+    prev_time = parse_timestamp(prev_timestamp)
 
     new_timestamp = new_vertex.get(VProps.VITRAGE_SAMPLE_TIMESTAMP)
     if not new_timestamp:
         return True
-    new_time = parser.parse(new_timestamp)
+    new_time = parse_timestamp(new_timestamp)
 
     return prev_time <= new_time
 
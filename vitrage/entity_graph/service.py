@@ -11,15 +11,16 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
-import threading
-import time
-
 from oslo_log import log
 import oslo_messaging
 from oslo_service import service as os_service
 
 from vitrage.entity_graph import EVALUATOR_TOPIC
+from vitrage.entity_graph.event_coalescer import EventCoalescer
+from vitrage.entity_graph.graph_persistor import GraphPersistor
+from vitrage.entity_graph.priority_scheduler import PriorityScheduler
 from vitrage.entity_graph.processor.processor import Processor
+from vitrage.entity_graph.transform_pool import TransformPool
 from vitrage.entity_graph.vitrage_init import VitrageInit
 from vitrage.evaluator.evaluator_service import EvaluatorManager
 from vitrage import messaging
@@ -38,6 +39,17 @@ class VitrageGraphService(os_service.Service):
         self.evaluator = EvaluatorManager(conf, graph)
         self.init = VitrageInit(conf, graph, self.evaluator)
         self.processor = Processor(self.conf, self.init, e_graph=graph)
+        self.transform_pool = None
+        if conf.entity_graph.transform_workers:
+            self.transform_pool = TransformPool(
+                self.processor.transform_event,
+                conf.entity_graph.transform_workers)
+        self.graph_persistor = None
+        if conf.entity_graph.graph_snapshots_dir:
+            self.graph_persistor = GraphPersistor(conf, graph)
+            if self.graph_persistor.load_graph(self.processor.state_manager):
+                self.init.restored_sample_timestamps = \
+                    self.graph_persistor.restored_sample_timestamps
         self.listener = self._init_listener()
 
     def _init_listener(self):
@@ -45,9 +57,18 @@ class VitrageGraphService(os_service.Service):
         evaluator_topic = EVALUATOR_TOPIC
         return TwoPriorityListener(
             self.conf,
-            self.processor.process_event,
+            self._process_event,
             collector_topic,
-            evaluator_topic)
+            evaluator_topic,
+            self.processor.transformer_manager.extract_key,
+            self.transform_pool.submit if self.transform_pool else None)
+
+    def _process_event(self, event):
+        entity = None
+        if self.transform_pool:
+            event, entity = event.result()
+        self.processor.process_event(event, entity)
+        self.evaluator.flush_event_changes()
 
     def start(self):
         LOG.info("Vitrage Graph Service - Starting...")
@@ -56,6 +77,16 @@ class VitrageGraphService(os_service.Service):
             self.init.initializing_process,
             on_end_messages_func=self.processor.on_recieved_all_end_messages)
         self.listener.start()
+        if self.graph_persistor:
+            interval = self.conf.entity_graph.graph_snapshots_interval
+            self.tg.add_timer(interval,
+                              self._store_graph,
+                              initial_delay=interval)
+        stats_interval = self.conf.entity_graph.stats_interval
+        if stats_interval:
+            self.tg.add_timer(stats_interval,
+                              self.listener.log_stats,
+                              initial_delay=stats_interval)
         LOG.info("Vitrage Graph Service - Started!")
 
     def stop(self, graceful=False):
@@ -63,54 +94,100 @@ class VitrageGraphService(os_service.Service):
         self.evaluator.stop_all_workers()
         self.listener.stop()
         self.listener.wait()
+        if self.transform_pool:
+            self.transform_pool.shutdown()
+        self.processor.stop()
+        if self.graph_persistor:
+            self._store_graph()
         super(VitrageGraphService, self).stop(graceful)
 
         LOG.info("Vitrage Graph Service - Stopped!")
 
+    def _store_graph(self):
+        try:
+            snapshot = self.listener.run_exclusively(
+                self.graph_persistor.take_snapshot)
+            self.graph_persistor.store_snapshot(snapshot)
+        except Exception as e:
+            LOG.exception('Failed to store entity graph snapshot: %s', e)
+
 
-PRIORITY_DELAY = 0.05
+HIGH_PRIORITY = 0
+LOW_PRIORITY = 1
 
 
 class TwoPriorityListener(object):
-    def __init__(self, conf, do_work_func, topic_low, topic_high):
+    """Process the events of two topics on a single thread
+
+    The events of both listeners are queued in a PriorityScheduler, and
+    the events of the high priority topic are processed first.
+    If prepare_func is given, it is called with every event as it is
+    queued, and do_work_func gets its result instead of the event.
+    """
+
+    def __init__(self, conf, do_work_func, topic_low, topic_high,
+                 extract_key=None, prepare_func=None):
         self._conf = conf
-        self._do_work_func = do_work_func
-        self._lock = threading.Lock()
-        self._high_event_finish_time = 0
+        self._prepare_func = prepare_func
+        self._scheduler = PriorityScheduler(
+            do_work_func, 2, conf.entity_graph.max_queued_events)
+
+        self._coalescer = None
+        low_priority_callback = self._do_low_priority_work
+        if extract_key and conf.entity_graph.event_coalescing_window:
+            self._coalescer = EventCoalescer(
+                conf.entity_graph.event_coalescing_window,
+                extract_key,
+                self._do_low_priority_work)
+            low_priority_callback = self._coalescer.add
 
         self._low_pri_listener = self._init_listener(
-            topic_low, self._do_low_priority_work)
+            topic_low, low_priority_callback)
         self._high_pri_listener = self._init_listener(
             topic_high, self._do_high_priority_work)
 
     def start(self):
-        self._high_pri_listener.start()
-        self._low_pri_listener.start()
+        self._scheduler.start()
+        if self._high_pri_listener:
+            self._high_pri_listener.start()
+        if self._low_pri_listener:
+            self._low_pri_listener.start()
 
     def stop(self):
-        self._low_pri_listener.stop()
-        self._high_pri_listener.stop()
+        if self._low_pri_listener:
+            self._low_pri_listener.stop()
+        if self._coalescer:
+            self._coalescer.flush()
+        if self._high_pri_listener:
+            self._high_pri_listener.stop()
 
     def wait(self):
-        self._low_pri_listener.wait()
-        self._high_pri_listener.wait()
+        """Wait for the listeners, and for the queued events to be done"""
+        if self._low_pri_listener:
+            self._low_pri_listener.wait()
+        if self._high_pri_listener:
+            self._high_pri_listener.wait()
+        self._scheduler.stop()
+        self.log_stats()
+
+    def log_stats(self):
+        """Log the queued events of each priority, and their waits"""
+        self._scheduler.log_stats()
+
+    def run_exclusively(self, func):
+        """Run func while no event is processed"""
+        return self._scheduler.run_exclusively(func)
 
     def _do_high_priority_work(self, event):
-        self._lock.acquire()
-        self._do_work_func(event)
-        self._high_event_finish_time = time.time()
-        self._lock.release()
+        self._scheduler.put(HIGH_PRIORITY, self._prepare(event))
 
     def _do_low_priority_work(self, event):
-        while True:
-            self._lock.acquire()
-            if (time.time() - self._high_event_finish_time) < PRIORITY_DELAY:
-                self._lock.release()
-                time.sleep(PRIORITY_DELAY)
-            else:
-                break
-        self._do_work_func(event)
-        self._lock.release()
+        self._scheduler.put(LOW_PRIORITY, self._prepare(event))
+
+    def _prepare(self, event):
+        if self._prepare_func:
+            return self._prepare_func(event)
+        return event
 
     def _init_listener(self, topic, callback):
         if not topic:
@@ -0,0 +1,39 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import futurist
+
+
+class TransformPool(object):
+    """Transform events on a pool of threads, ahead of their processing
+
+    submit starts the transformation of an event, and returns a future of
+    the event and its transformation. The futures are expected to be
+    processed on a single thread, in the order of their submission, so the
+    events are applied to the graph in the order they were received, while
+    the following events are already transformed.
+    """
+
+    def __init__(self, transform_func, workers):
+        self._transform_func = transform_func
+        self._executor = futurist.ThreadPoolExecutor(max_workers=workers)
+
+    def submit(self, event):
+        return self._executor.submit(self._transform, event)
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+    def _transform(self, event):
+        return event, self._transform_func(event)
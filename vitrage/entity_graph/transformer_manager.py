@@ -83,7 +83,8 @@ class TransformerManager(object):
 
     def extract_key(self, entity_event):
         entity_type = self.get_entity_type(entity_event)
-        return self.get_transformer(entity_type)._create_entity_key()
+        return self.get_transformer(entity_type)._create_entity_key(
+            entity_event)
 
     @staticmethod
     def get_entity_type(entity_event):
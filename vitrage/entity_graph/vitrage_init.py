@@ -15,8 +15,15 @@ from oslo_log import log
 import time
 
 from vitrage.common.constants import VertexProperties as VProps
+from vitrage.datasources.static import STATIC_DATASOURCE
+from vitrage.entity_graph.consistency.consistency_enforcer \
+    import ConsistencyEnforcer
+from vitrage.entity_graph import EVALUATOR_TOPIC
+from vitrage.messaging import VitrageNotifier
+from vitrage.utils import opt_exists
 
 LOG = log.getLogger(__name__)
+ENTITIES = 'entities'
 
 
 class VitrageInit(object):
@@ -30,6 +37,7 @@ class VitrageInit(object):
         self.evaluator = evaluator
         self.status = self.STARTED
         self.end_messages = {}
+        self.restored_sample_timestamps = None
 
     def initializing_process(self, on_end_messages_func):
         try:
@@ -38,8 +46,14 @@ class VitrageInit(object):
             if not self._wait_for_all_end_messages():
                 LOG.warning('Initialization  - max retries reached %s',
                             self.end_messages)
+                if self.restored_sample_timestamps:
+                    # only of the datasources that finished their snapshot
+                    self._delete_restored_entities_not_in_snapshots(
+                        self._restored_vitrage_types_of(self.end_messages))
             else:
                 LOG.info('Initialization - All end messages were received')
+                if self.restored_sample_timestamps:
+                    self._delete_restored_entities_not_in_snapshots()
 
             on_end_messages_func()
 
@@ -57,6 +71,42 @@ class VitrageInit(object):
         except Exception as e:
             LOG.exception('Init Failed: %s', e)
 
+    def _delete_restored_entities_not_in_snapshots(self, vitrage_types=None):
+        """Delete the loaded entities that no datasource reported since
+
+        :param vitrage_types: if not None, only the entities of these types
+        """
+        actions_notifier = VitrageNotifier(
+            self.conf, 'vitrage_init', EVALUATOR_TOPIC)
+        consistency_enf = ConsistencyEnforcer(
+            self.conf, actions_notifier.notify, self.graph)
+        consistency_enf.delete_entities_not_sampled_since(
+            self.restored_sample_timestamps, vitrage_types)
+
+    def _restored_vitrage_types_of(self, datasources):
+        """The vitrage types of the restored entities of the datasources
+
+        As in the TransformerManager, a datasource produces the entities of
+        its own type and of its configured entities. The static datasource
+        produces entities of any type that no other datasource produces.
+        """
+        datasource_of_type = {}
+        for datasource in self.conf.datasources.types:
+            datasource_of_type[datasource] = datasource
+            datasource_conf = opt_exists(self.conf, datasource)
+            if datasource_conf and opt_exists(datasource_conf, ENTITIES):
+                for entity in datasource_conf.entities:
+                    datasource_of_type[entity] = datasource
+
+        vitrage_types = set()
+        for vertex_id in self.restored_sample_timestamps:
+            vertex = self.graph.get_vertex(vertex_id)
+            vitrage_type = vertex and vertex.get(VProps.VITRAGE_TYPE)
+            if datasource_of_type.get(vitrage_type,
+                                      STATIC_DATASOURCE) in datasources:
+                vitrage_types.add(vitrage_type)
+        return vitrage_types
+
     def handle_end_message(self, vertex):
         self.end_messages[vertex[VProps.VITRAGE_TYPE]] = True
 
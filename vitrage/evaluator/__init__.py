@@ -37,4 +37,50 @@ OPTS = [
                     'equal to the number of CPUs available if that can be '
                     'determined, else a default worker count of 1 is returned.'
                ),
+    cfg.IntOpt('notification_batch_size',
+               default=1,
+               min=1,
+               help='Maximal number of graph changes that are sent together '
+                    'to the evaluator workers. With the default of 1, every '
+                    'change is sent on its own, and the graph service waits '
+                    'until all the workers handled it.'
+               ),
+    cfg.FloatOpt('notification_batch_interval',
+                 default=0.1,
+                 min=0,
+                 help='Maximal time (in seconds) a graph change waits for '
+                      'its batch to be sent to the evaluator workers. If 0, '
+                      'the changes of every processed event are sent '
+                      'together. Used only if notification_batch_size is '
+                      'greater than 1.'
+                 ),
+    cfg.IntOpt('notification_max_pending_batches',
+               default=100,
+               min=1,
+               help='Maximal number of batches of graph changes that an '
+                    'evaluator worker may not have handled yet, before the '
+                    'graph service waits for it.'
+               ),
+    cfg.IntOpt('shared_change_log_size',
+               default=16,
+               min=0,
+               help='Size (in MB) of a shared memory buffer, through which '
+                    'the batches of graph changes are sent to the evaluator '
+                    'workers. Every batch is then serialized once for all '
+                    'the workers, instead of once per worker, and is not '
+                    'copied to every worker queue. Every worker still keeps '
+                    'its own copy of the entity graph. If 0, the batches '
+                    'are sent through the worker queues.'
+               ),
+    cfg.FloatOpt('active_actions_write_interval',
+                 default=1,
+                 min=0,
+                 help='Maximal time (in seconds) the changes of the active '
+                      'actions are kept in memory, before they are written '
+                      'together to the database. If 0, every change is '
+                      'written immediately. Used only with a single '
+                      'evaluator worker. With several workers, the active '
+                      'actions are shared through the database, and every '
+                      'decision is read and written in one transaction.'
+                 ),
 ]
@@ -0,0 +1,87 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from collections import deque
+import mmap
+import struct
+
+from six.moves import cPickle as pickle
+
+
+class SharedChangeLog(object):
+    """A ring buffer of pickled records in anonymous shared memory
+
+    The buffer must be created before the reader processes are forked, so
+    that they share its memory. The writer appends records, and sends the
+    returned positions to the readers by other means (e.g. a queue).
+
+    The writer does not overwrite records that were not read yet: before
+    reusing their space, it calls wait_for_record with their id, which is
+    expected to block until all the readers have read the record.
+    """
+
+    _LENGTH = struct.Struct('!I')
+
+    def __init__(self, size, wait_for_record):
+        self._size = size
+        self._buffer = mmap.mmap(-1, size)
+        self._wait_for_record = wait_for_record
+        self._write_pos = 0
+        self._records = deque()
+
+    def append(self, record_id, obj):
+        """Write a record to the buffer
+
+        :return: the position of the record, or None if it is too big
+        :rtype: int
+        """
+        data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+        data = self._LENGTH.pack(len(data)) + data
+        if len(data) > self._size:
+            return None
+
+        # the records written before this position are overwritten
+        overwritten_end = self._write_pos + len(data) - self._size
+        while self._records and self._records[0][1] < overwritten_end:
+            self._wait_for_record(self._records.popleft()[0])
+
+        position = self._write_pos
+        self._write(position, data)
+        self._write_pos += len(data)
+        self._records.append((record_id, position))
+        return position
+
+    def read(self, position):
+        length = self._LENGTH.unpack(
+            self._read(position, self._LENGTH.size))[0]
+        return pickle.loads(self._read(position + self._LENGTH.size, length))
+
+    def forget(self):
+        """Forget the unread records, once their readers are gone"""
+        self._records.clear()
+
+    def _write(self, position, data):
+        offset = position % self._size
+        first_part = min(len(data), self._size - offset)
+        self._buffer[offset:offset + first_part] = data[:first_part]
+        if first_part < len(data):
+            self._buffer[:len(data) - first_part] = data[first_part:]
+
+    def _read(self, position, length):
+        offset = position % self._size
+        first_part = min(length, self._size - offset)
+        data = self._buffer[offset:offset + first_part]
+        if first_part < length:
+            data += self._buffer[:length - first_part]
+        return data
@@ -13,6 +13,8 @@
 # under the License.
 
 import multiprocessing
+import os
+import threading
 import time
 
 from oslo_concurrency import processutils
@@ -20,6 +22,7 @@ from oslo_log import log
 from oslo_service import service as os_service
 
 from vitrage.entity_graph import EVALUATOR_TOPIC
+from vitrage.evaluator.change_log import SharedChangeLog
 from vitrage.evaluator.evaluator_base import EvaluatorBase
 
 from vitrage.evaluator.scenario_evaluator import ScenarioEvaluator
@@ -31,6 +34,9 @@ LOG = log.getLogger(__name__)
 
 START_EVALUATION = 'start_evaluation'
 POISON_PILL = None
+# Time (in seconds) after which the workers that did not handle a batch are
+# checked
+WORKER_WAIT_TIMEOUT = 10
 
 
 class EvaluatorManager(EvaluatorBase):
@@ -39,7 +45,26 @@ class EvaluatorManager(EvaluatorBase):
         super(EvaluatorManager, self).__init__(conf, entity_graph)
         self._workers_num = conf.evaluator.workers or \
             processutils.get_worker_count()
+        self._batch_size = conf.evaluator.notification_batch_size
+        self._batch_interval = conf.evaluator.notification_batch_interval
+        self._max_pending_batches = \
+            conf.evaluator.notification_max_pending_batches
         self._worker_queues = list()
+        self._worker_handled_seqs = list()
+        self._worker_pids = list()
+        self._dead_workers = set()
+        # notified by the workers whenever they handled a batch
+        self._handled_cond = multiprocessing.Condition()
+        self._batch = list()
+        self._batch_seq = 0
+        self._batch_timer = None
+        self._lock = threading.RLock()
+        self._change_log = None
+        if conf.evaluator.shared_change_log_size:
+            # created before the workers are forked, to be shared with them
+            self._change_log = SharedChangeLog(
+                conf.evaluator.shared_change_log_size * 1024 * 1024,
+                self._wait_for_workers)
         self._p_launcher = os_service.ProcessLauncher(conf)
 
     def run_evaluator(self):
@@ -60,14 +85,23 @@ class EvaluatorManager(EvaluatorBase):
             len(self._worker_queues),
             self._workers_num)
         tasks_queue = multiprocessing.JoinableQueue()
+        handled_seq = multiprocessing.Value('l', self._batch_seq, lock=False)
         w = EvaluatorWorker(
             self._conf,
             tasks_queue,
             self._entity_graph,
             scenario_repo,
-            enabled)
+            enabled,
+            handled_seq,
+            self._change_log,
+            self._workers_num > 1,
+            self._handled_cond)
+        pids = set(self._p_launcher.children)
         self._p_launcher.launch_service(w)
+        new_pids = set(self._p_launcher.children) - pids
         self._worker_queues.append(tasks_queue)
+        self._worker_handled_seqs.append(handled_seq)
+        self._worker_pids.append(new_pids.pop() if new_pids else None)
 
     def _notify_all(self, before, current, is_vertex, *args, **kwargs):
         """Notify all workers
@@ -75,22 +109,127 @@ class EvaluatorManager(EvaluatorBase):
         This method is subscribed to entity graph changes.
         Per each change in the main entity graph, this method will notify
          each of the evaluators, causing them to update their own graph.
+        Unless notification_batch_size is 1, the changes are sent in batches
+         and the workers handle them asynchronously.
         """
         evaluator_action = kwargs.get('evaluator_action', None)
-        self._notify_and_wait((before, current, is_vertex, evaluator_action))
+        task = (before, current, is_vertex, evaluator_action)
+        if evaluator_action or self._batch_size == 1:
+            self._notify_and_wait(task)
+            return
 
-    def _notify_and_wait(self, payload):
-        for q in self._worker_queues:
-            q.put(payload)
-        time.sleep(0)  # context switch before join
-        for q in self._worker_queues:
-            q.join()
+        with self._lock:
+            self._batch.append(task)
+            if len(self._batch) >= self._batch_size:
+                self._send_batch()
+            elif self._batch_interval and not self._batch_timer:
+                self._batch_timer = threading.Timer(self._batch_interval,
+                                                    self.flush)
+                self._batch_timer.daemon = True
+                self._batch_timer.start()
+
+    def flush(self):
+        """Send the pending graph changes to the workers, without waiting"""
+        with self._lock:
+            if self._batch:
+                self._send_batch()
+
+    def flush_event_changes(self):
+        """Called after each processed event
+
+        Send the changes of the event, unless batches are time based.
+        """
+        if not self._batch_interval:
+            self.flush()
+
+    def _send_batch(self):
+        """Send the pending changes as one batch, with a sequence number
+
+        The workers handle the batches in the order of the sequence numbers.
+        Instead of waiting for every batch, wait only if a worker has too many
+        pending batches.
+        If there is a shared change log, the batch is written to it, and only
+        its position is put in the worker queues.
+        """
+        if self._batch_timer:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        tasks, self._batch = self._batch, list()
+        self._batch_seq += 1
+        self._wait_for_workers(self._batch_seq - self._max_pending_batches)
+        position = None
+        if self._change_log and self._worker_queues:
+            position = self._change_log.append(self._batch_seq, tasks)
+        if position is None:
+            batch = (self._batch_seq, tasks, None)
+        else:
+            batch = (self._batch_seq, None, position)
+        for i, q in enumerate(self._worker_queues):
+            if i not in self._dead_workers:
+                q.put(batch)
+
+    def _wait_for_workers(self, batch_seq):
+        """Wait until every live worker handled the batch batch_seq
+
+        Every WORKER_WAIT_TIMEOUT seconds, the workers that did not handle
+        it are logged, and the dead ones are no longer waited for.
+        """
+        with self._handled_cond:
+            check_time = time.time() + WORKER_WAIT_TIMEOUT
+            while True:
+                lagging = [i for i, handled_seq
+                           in enumerate(self._worker_handled_seqs)
+                           if handled_seq.value < batch_seq and
+                           i not in self._dead_workers]
+                if not lagging:
+                    return
+                self._handled_cond.wait(max(check_time - time.time(), 0))
+                if time.time() >= check_time:
+                    self._check_workers(lagging, batch_seq)
+                    check_time = time.time() + WORKER_WAIT_TIMEOUT
+
+    def _check_workers(self, workers, batch_seq):
+        for i in workers:
+            pid = self._worker_pids[i]
+            if pid and not self._is_alive(pid):
+                LOG.error('Evaluator worker %d (pid %d) is dead, its graph '
+                          'changes are no longer sent', i, pid)
+                self._dead_workers.add(i)
+            else:
+                LOG.warning('Evaluator worker %d (pid %s) did not handle '
+                            'batch %d in %d seconds', i, pid, batch_seq,
+                            WORKER_WAIT_TIMEOUT)
+
+    @staticmethod
+    def _is_alive(pid):
+        try:
+            return os.waitpid(pid, os.WNOHANG)[0] == 0
+        except OSError:
+            return False
+
+    def _notify_and_wait(self, task):
+        with self._lock:
+            self._batch.append(task)
+            self._send_batch()
+            self._wait_for_workers(self._batch_seq)
 
     def stop_all_workers(self):
-        self._notify_and_wait(POISON_PILL)
-        for q in self._worker_queues:
-            q.close()
-        self._worker_queues = list()
+        with self._lock:
+            self.flush()
+            live_queues = [q for i, q in enumerate(self._worker_queues)
+                           if i not in self._dead_workers]
+            for q in live_queues:
+                q.put(POISON_PILL)
+            for q in live_queues:
+                q.join()
+            for q in self._worker_queues:
+                q.close()
+            self._worker_queues = list()
+            self._worker_handled_seqs = list()
+            self._worker_pids = list()
+            self._dead_workers = set()
+            if self._change_log:
+                self._change_log.forget()
 
     def reload_all_workers(self, enabled=True):
         self.stop_all_workers()
@@ -104,7 +243,11 @@ class EvaluatorWorker(os_service.Service):
                  task_queue,
                  entity_graph,
                  scenario_repo,
-                 enabled=False):
+                 enabled=False,
+                 handled_seq=None,
+                 change_log=None,
+                 shared_active_actions=False,
+                 handled_cond=None):
         super(EvaluatorWorker, self).__init__()
         self._conf = conf
         self._task_queue = task_queue
@@ -112,6 +255,11 @@ class EvaluatorWorker(os_service.Service):
         self._scenario_repo = scenario_repo
         self._enabled = enabled
         self._evaluator = None
+        self._handled_seq = handled_seq
+        self._last_seq = handled_seq.value if handled_seq else 0
+        self._change_log = change_log
+        self._shared_active_actions = shared_active_actions
+        self._handled_cond = handled_cond
 
     def start(self):
         super(EvaluatorWorker, self).start()
@@ -125,25 +273,45 @@ class EvaluatorWorker(os_service.Service):
             self._entity_graph,
             self._scenario_repo,
             actions_callback,
-            self._enabled)
+            self._enabled,
+            self._shared_active_actions)
         self.tg.add_thread(self._read_queue)
         LOG.info("EvaluatorWorkerService - Started!")
         self._evaluator.scenario_repo.log_enabled_scenarios()
 
     def _read_queue(self):
         while True:
-            next_task = self._task_queue.get()
-            if next_task is POISON_PILL:
+            next_batch = self._task_queue.get()
+            if next_batch is POISON_PILL:
+                # the next workers load the active actions from the database
+                self._evaluator.flush_active_actions()
                 self._task_queue.task_done()
                 break
-            try:
-                self._do_task(next_task)
-            except Exception as e:
-                LOG.exception("Graph may not be in sync: exception %s", e)
+            self._do_batch(next_batch)
             self._task_queue.task_done()
             # Evaluator queue may have been updated, thus the sleep:
             time.sleep(0)
 
+    def _do_batch(self, batch):
+        seq, tasks, position = batch
+        if position is not None:
+            tasks = self._change_log.read(position)
+        if seq != self._last_seq + 1:
+            LOG.error("Graph may not be in sync: expected batch %s, got %s",
+                      self._last_seq + 1, seq)
+        for task in tasks:
+            try:
+                self._do_task(task)
+            except Exception as e:
+                LOG.exception("Graph may not be in sync: exception %s", e)
+        self._last_seq = seq
+        if self._handled_seq and self._handled_cond:
+            with self._handled_cond:
+                self._handled_seq.value = seq
+                self._handled_cond.notify_all()
+        elif self._handled_seq:
+            self._handled_seq.value = seq
+
     def _do_task(self, task):
             (before, current, is_vertex, action) = task
             if not action:
@@ -166,4 +334,6 @@ class EvaluatorWorker(os_service.Service):
     def stop(self, graceful=False):
         super(EvaluatorWorker, self).stop(graceful)
         self.tg.stop()
+        if self._evaluator:
+            self._evaluator.flush_active_actions()
         LOG.info("EvaluatorWorkerService - Stopped!")
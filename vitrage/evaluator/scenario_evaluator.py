@@ -14,9 +14,11 @@
 from collections import namedtuple
 from collections import OrderedDict
 import copy
+import threading
 import time
 
 from oslo_log import log
+from oslo_utils import timeutils
 
 from vitrage.common.constants import EdgeProperties as EProps
 from vitrage.common.constants import VertexProperties as VProps
@@ -58,14 +60,15 @@ class ScenarioEvaluator(EvaluatorBase):
                  e_graph,
                  scenario_repo,
                  actions_callback,
-                 enabled=False):
+                 enabled=False,
+                 shared_active_actions=False):
         super(ScenarioEvaluator, self).__init__(conf, e_graph)
         self._db_connection = storage.get_connection_from_config(self._conf)
         self._scenario_repo = scenario_repo
         self._action_executor = ActionExecutor(self._conf, actions_callback)
         self._entity_graph.subscribe(self.process_event)
         self._active_actions_tracker = ActiveActionsTracker(
-            self._conf, self._db_connection)
+            self._conf, self._db_connection, shared_active_actions)
         self.enabled = enabled
         self.connected_component_cache = defaultdict(dict)
 
@@ -86,6 +89,9 @@ class ScenarioEvaluator(EvaluatorBase):
         LOG.info('Run Evaluator on %s items - took %s', str(len(vertices)),
                  str(time.time() - start_time))
 
+    def flush_active_actions(self):
+        self._active_actions_tracker.flush()
+
     def process_event(self, before, current, is_vertex, *args, **kwargs):
         """Notification of a change in the entity graph.
 
@@ -424,9 +430,17 @@ class ActiveActionsTracker(object):
     regardless of state
     - all raise_alarm of type alarm_name on a given resource share the same
      entry, regardless of severity
+
+    If the active actions are shared with other evaluator workers, every
+    decision reads and updates the active_actions table in one transaction,
+    so the workers see each other's actions immediately.
+    Otherwise, the active actions are kept in memory, loaded from the table
+    on first use, and the changes are written back in the background, every
+    active_actions_write_interval seconds, each batch in a single
+    transaction.
     """
 
-    def __init__(self, conf, db_connection):
+    def __init__(self, conf, db_connection, shared=False):
         info_mapper = DatasourceInfoMapper(conf)
         self._db = db_connection
         alarms_score = info_mapper.get_datasource_priorities('vitrage')
@@ -438,29 +452,39 @@ class ActiveActionsTracker(object):
             ActionType.MARK_DOWN: pt.BaselineTools,
             ActionType.EXECUTE_MISTRAL: pt.BaselineTools
         }
+        self._shared = shared
+        self._write_interval = conf.evaluator.active_actions_write_interval
+        # (action type, extra info, source id, target id) ->
+        # (action id, trigger) -> ActiveAction, in the order of creation
+        self._active_actions = None
+        # (action id, trigger) -> ActiveAction to create, or None to delete
+        self._pending_writes = OrderedDict()
+        self._write_timer = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
 
     def calc_do_action(self, action_info):
-        """Add this action to active_actions table, if not exists
+        """Add this action to the active actions, if not exists
 
         return value to help decide if action should be performed
         Only a top scored action that is new should be performed
         :return: (is top score, is it already existing)
         """
-        # TODO(idan_hefetz): DB read and write not in a transaction
-        active_actions = self._query_similar_actions(action_info)
-        exists = any(
-            a.action_id == action_info.action_id and
-            a.trigger == action_info.trigger_id for a in active_actions)
-        if not exists:
-            db_row = self._to_db_row(action_info)
-            active_actions.append(db_row)
-            LOG.debug("DB Insert active_actions %s", str(db_row))
-            self._db.active_actions.create(db_row)
-
-        return self._is_highest_score(active_actions, action_info), exists
+        def do_action(active_actions):
+            key = (action_info.action_id, action_info.trigger_id)
+            exists = key in active_actions
+            if not exists:
+                db_row = self._to_db_row(action_info)
+                active_actions[key] = db_row
+                LOG.debug("Insert active_actions %s", str(db_row))
+
+            return self._is_highest_score(active_actions.values(),
+                                          action_info), exists
+
+        return self._update_similar_actions(action_info, do_action)
 
     def calc_undo_action(self, action_info):
-        """Delete this action form active_actions table, if exists
+        """Delete this action from the active actions, if exists
 
         return value to help decide if action should be performed
         A top scored action should be 'undone' if there is not a second action.
@@ -468,49 +492,152 @@ class ActiveActionsTracker(object):
         :param action_info: action to delete
         :return: is_highest_score, second highest action if exists
         """
-        # TODO(idan_hefetz): DB read and write not in a transaction
-        active_actions = self._query_similar_actions(action_info)
-
-        LOG.debug("DB delete active_actions %s %s",
-                  action_info.action_id,
-                  str(action_info.trigger_id))
-        self._db.active_actions.delete(
-            action_id=action_info.action_id,
-            trigger=action_info.trigger_id)
-
-        is_highest_score = self._is_highest_score(active_actions, action_info)
-        if is_highest_score and len(active_actions) > 1:
-            return is_highest_score, self._sort_db_actions(active_actions)[1]
-        else:
-            return is_highest_score, None
-
-    def _to_db_row(self, action_info):
+        def undo_action(active_actions):
+            is_highest_score = self._is_highest_score(active_actions.values(),
+                                                      action_info)
+            second_highest = None
+            if is_highest_score and len(active_actions) > 1:
+                second_highest = \
+                    self._sort_db_actions(active_actions.values())[1]
+
+            key = (action_info.action_id, action_info.trigger_id)
+            if active_actions.pop(key, None):
+                LOG.debug("Delete active_actions %s %s",
+                          action_info.action_id,
+                          str(action_info.trigger_id))
+
+            return is_highest_score, second_highest
+
+        return self._update_similar_actions(action_info, undo_action)
+
+    def flush(self):
+        """Write the pending changes to the database, in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                if self._write_timer:
+                    self._write_timer.cancel()
+                    self._write_timer = None
+                pending_writes = self._pending_writes
+                self._pending_writes = OrderedDict()
+            if not pending_writes:
+                return
+
+            created = [self._copy_db_row(db_row)
+                       for db_row in pending_writes.values() if db_row]
+            try:
+                self._db.active_actions.bulk_update(pending_writes.keys(),
+                                                    created)
+                LOG.debug('Wrote %d changes of active_actions',
+                          len(pending_writes))
+            except Exception as e:
+                LOG.exception('Failed to write %d changes of active_actions: '
+                              '%s', len(pending_writes), e)
+                with self._lock:
+                    # newer changes of the same actions take precedence
+                    for key, db_row in pending_writes.items():
+                        self._pending_writes.setdefault(key, db_row)
+                    if self._write_interval:
+                        self._start_write_timer()
+
+    def _update_similar_actions(self, action_info, update_func):
+        """Run update_func on the actions with same properties
+
+        update_func gets the actions by (action_id, trigger), in the order of
+        creation, and adds or removes actions.
+        :return: the return value of update_func
+        """
+        similar_key = self._similar_key(action_info)
+        if self._shared:
+            action_type, extra_info, source_id, target_id = similar_key
+            return self._db.active_actions.update_similar(
+                update_func,
+                action_type=action_type,
+                extra_info=extra_info,
+                source_vertex_id=source_id,
+                target_vertex_id=target_id)
+
+        if self._active_actions is None:
+            self._load_active_actions()
+        active_actions = self._active_actions[similar_key]
+        old_actions = dict(active_actions)
+
+        result = update_func(active_actions)
+
+        for key in old_actions:
+            if key not in active_actions:
+                self._write_later(key, None)
+        for key, db_row in active_actions.items():
+            if key not in old_actions:
+                self._write_later(key, db_row)
+        if not active_actions:
+            del self._active_actions[similar_key]
+        return result
+
+    def _write_later(self, key, db_row):
+        with self._lock:
+            self._pending_writes.pop(key, None)
+            self._pending_writes[key] = db_row
+            if self._write_interval:
+                self._start_write_timer()
+                return
+        self.flush()
+
+    def _start_write_timer(self):
+        if not self._write_timer:
+            self._write_timer = threading.Timer(self._write_interval,
+                                                self.flush)
+            self._write_timer.daemon = True
+            self._write_timer.start()
+
+    def _load_active_actions(self):
+        db_actions = sorted(self._db.active_actions.query(),
+                            key=lambda action: action.created_at)
+        self._active_actions = defaultdict(OrderedDict)
+        for db_action in db_actions:
+            similar_key = (db_action.action_type,
+                           db_action.extra_info,
+                           db_action.source_vertex_id,
+                           db_action.target_vertex_id)
+            self._active_actions[similar_key][
+                (db_action.action_id, db_action.trigger)] = db_action
+        LOG.info('Loaded %d active actions', len(db_actions))
+
+    def _similar_key(self, action_info):
         source = action_info.specs.targets.get(SOURCE, {})
         target = action_info.specs.targets.get(TARGET, {})
+        extra_info = self._action_tools[action_info.specs.type].get_extra_info(
+            action_info.specs)
+        return (action_info.specs.type,
+                extra_info,
+                source.get(VProps.VITRAGE_ID),
+                target.get(VProps.VITRAGE_ID))
+
+    def _to_db_row(self, action_info):
+        action_type, extra_info, source_id, target_id = \
+            self._similar_key(action_info)
         action_score = self._action_tools[action_info.specs.type].\
             get_score(action_info)
-        extra_info = self._action_tools[action_info.specs.type].\
-            get_extra_info(action_info.specs)
         return storage.sqlalchemy.models.ActiveAction(
-            action_type=action_info.specs.type,
+            action_type=action_type,
             extra_info=extra_info,
-            source_vertex_id=source.get(VProps.VITRAGE_ID),
-            target_vertex_id=target.get(VProps.VITRAGE_ID),
+            source_vertex_id=source_id,
+            target_vertex_id=target_id,
             action_id=action_info.action_id,
             trigger=action_info.trigger_id,
-            score=action_score)
+            score=action_score,
+            created_at=timeutils.utcnow())
 
-    def _query_similar_actions(self, action_info):
-        """Query DB for all actions with same properties"""
-        source = action_info.specs.targets.get(SOURCE, {})
-        target = action_info.specs.targets.get(TARGET, {})
-        extra_info = self._action_tools[action_info.specs.type].get_extra_info(
-            action_info.specs)
-        return self._db.active_actions.query(
-            action_type=action_info.specs.type,
-            extra_info=extra_info,
-            source_vertex_id=source.get(VProps.VITRAGE_ID),
-            target_vertex_id=target.get(VProps.VITRAGE_ID))
+    @staticmethod
+    def _copy_db_row(db_row):
+        return storage.sqlalchemy.models.ActiveAction(
+            action_type=db_row.action_type,
+            extra_info=db_row.extra_info,
+            source_vertex_id=db_row.source_vertex_id,
+            target_vertex_id=db_row.target_vertex_id,
+            action_id=db_row.action_id,
+            trigger=db_row.trigger,
+            score=db_row.score,
+            created_at=db_row.created_at)
 
     @classmethod
     def _is_highest_score(cls, db_actions, action_info):
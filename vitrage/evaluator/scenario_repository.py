@@ -19,7 +19,9 @@ from oslo_log import log
 
 from oslo_utils import uuidutils
 
+from vitrage.common.constants import VertexProperties as VProps
 from vitrage.common.utils import get_portion
+from vitrage.common.utils import LRUCache
 from vitrage.evaluator.base import Template
 from vitrage.evaluator.equivalence_repository import EquivalenceRepository
 from vitrage.evaluator.template_fields import TemplateFields
@@ -43,6 +45,7 @@ LOG = log.getLogger(__name__)
 
 EdgeKeyScenario = namedtuple('EdgeKeyScenario', ['label', 'source', 'target'])
 DEF_TEMPLATES_DIR_OPT = 'def_templates_dir'
+SCENARIOS_LOOKUP_CACHE_SIZE = 1024
 
 
 class ScenarioRepository(object):
@@ -60,6 +63,8 @@ class ScenarioRepository(object):
             conf.evaluator.equivalences_dir)
         self.relationship_scenarios = defaultdict(list)
         self.entity_scenarios = defaultdict(list)
+        self._entity_index = _ScenarioKeysIndex()
+        self._relationship_index = _ScenarioKeysIndex()
         self._load_def_template_files(conf)
         self._load_templates_files(conf)
         self._enable_worker_scenarios(worker_index, workers_num)
@@ -85,28 +90,38 @@ class ScenarioRepository(object):
 
         entity_key = vertex.properties
 
-        scenarios = []
-        for scenario_key, value in self.entity_scenarios.items():
-            if check_subset(entity_key, dict(scenario_key)):
-                scenarios += [(e, s) for e, s in value if s.enabled]
-        return scenarios
+        def find_scenarios():
+            scenarios = []
+            for scenario_key, scenario_filter in \
+                    self._entity_index.candidates(entity_key):
+                if check_subset(entity_key, scenario_filter):
+                    scenarios += [(e, s) for e, s in
+                                  self.entity_scenarios[scenario_key]
+                                  if s.enabled]
+            return scenarios
 
-    def get_scenarios_by_edge(self, edge_description):
-
-        key = self._create_edge_scenario_key(edge_description)
-        scenarios = []
-
-        for scenario_key, value in self.relationship_scenarios.items():
+        return self._entity_index.lookup((entity_key,), find_scenarios)
 
-            check_label = key.label == scenario_key.label
-            if check_label \
-                    and check_subset(dict(key.source),
-                                     dict(scenario_key.source)) \
-                    and check_subset(dict(key.target),
-                                     dict(scenario_key.target)):
-                scenarios += [(e, s) for e, s in value if s.enabled]
+    def get_scenarios_by_edge(self, edge_description):
 
-        return scenarios
+        label = edge_description.edge.label
+        source = edge_description.source.properties
+        target = edge_description.target.properties
+
+        def find_scenarios():
+            scenarios = []
+            for scenario_key, (source_filter, target_filter) in \
+                    self._relationship_index.candidates(source, label):
+                if check_subset(source, source_filter) \
+                        and check_subset(target, target_filter):
+                    scenarios += [(e, s) for e, s in
+                                  self.relationship_scenarios[scenario_key]
+                                  if s.enabled]
+            return scenarios
+
+        return self._relationship_index.lookup((source, target),
+                                               find_scenarios,
+                                               label)
 
     def add_template(self, template_def):
 
@@ -227,6 +242,9 @@ class ScenarioRepository(object):
 
         key = self._create_edge_scenario_key(edge_desc)
         self.relationship_scenarios[key].append((edge_desc, scenario))
+        self._relationship_index.add(key,
+                                     (dict(key.source), dict(key.target)),
+                                     key.label)
 
     @staticmethod
     def _create_edge_scenario_key(edge_desc):
@@ -244,6 +262,7 @@ class ScenarioRepository(object):
 
         key = frozenset(list(entity.properties.items()))
         self.entity_scenarios[key].append((entity, scenario))
+        self._entity_index.add(key, (dict(key),))
 
     def _enable_worker_scenarios(self, worker_ind, n):
         """Enable a portion of the scenarios"""
@@ -254,6 +273,8 @@ class ScenarioRepository(object):
             get_portion(self._all_scenarios, n, worker_ind)
         for s in scenarios:
             s.enabled = True
+        self._entity_index.clear_cache()
+        self._relationship_index.clear_cache()
 
     def _create_actions_collection(self):
         action_lists = (s.actions for s in self._all_scenarios)
@@ -263,3 +284,88 @@ class ScenarioRepository(object):
     def log_enabled_scenarios(self):
         scenarios = [s for s in self._all_scenarios if s.enabled]
         LOG.info("Scenarios:\n%s", sorted([s.id for s in scenarios]))
+
+
+class _ScenarioKeysIndex(object):
+    """Index of scenario keys by vitrage_category and vitrage_type
+
+    Each scenario key has one or more filters (the properties of the
+    template entity, or of the source and target of a template
+    relationship). The key is indexed by the vitrage_category and
+    vitrage_type of its first filter, and optionally by an edge label.
+    The lookups are cached by the values of all the properties that
+    appear in the filters.
+    """
+
+    def __init__(self):
+        self._keys = defaultdict(list)
+        self._filters = {}
+        self._order = {}
+        self._filter_props = []
+        self._cache = LRUCache(SCENARIOS_LOOKUP_CACHE_SIZE)
+
+    def add(self, scenario_key, filters, label=None):
+        if scenario_key in self._filters:
+            return
+        self._order[scenario_key] = len(self._order)
+        self._filters[scenario_key] = \
+            filters if len(filters) > 1 else filters[0]
+        index_key = (label,
+                     filters[0].get(VProps.VITRAGE_CATEGORY),
+                     filters[0].get(VProps.VITRAGE_TYPE))
+        self._keys[index_key].append(scenario_key)
+
+        filter_props = [set(props) for props in self._filter_props]
+        filter_props += [set() for _ in filters[len(filter_props):]]
+        for props, scenario_filter in zip(filter_props, filters):
+            props.update(self._property_name(k) for k in scenario_filter)
+        self._filter_props = [tuple(sorted(props)) for props in filter_props]
+        self.clear_cache()
+
+    def candidates(self, properties, label=None):
+        """Get the scenario keys that may match the properties
+
+        :return: list of (scenario key, filter) in the order of addition
+        """
+        category = properties.get(VProps.VITRAGE_CATEGORY)
+        vitrage_type = properties.get(VProps.VITRAGE_TYPE)
+        index_keys = {(label, category, vitrage_type),
+                      (label, category, None),
+                      (label, None, vitrage_type),
+                      (label, None, None)}
+        scenario_keys = []
+        for index_key in index_keys:
+            scenario_keys.extend(self._keys.get(index_key, ()))
+        scenario_keys.sort(key=self._order.get)
+        return [(k, self._filters[k]) for k in scenario_keys]
+
+    def lookup(self, elements_properties, find_scenarios, label=None):
+        """Find the scenarios of the elements, using the lookup cache
+
+        :param elements_properties: properties of each of the elements
+        :param find_scenarios: function to find the scenarios on cache miss
+        :param label: edge label
+        """
+        try:
+            cache_key = (label,) + tuple(
+                tuple(properties.get(p) for p in props)
+                for properties, props in zip(elements_properties,
+                                             self._filter_props))
+            hash(cache_key)
+        except TypeError:
+            return find_scenarios()
+
+        scenarios = self._cache.get(cache_key)
+        if scenarios is None:
+            scenarios = find_scenarios()
+            self._cache.put(cache_key, scenarios)
+        return list(scenarios)
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    @staticmethod
+    def _property_name(key):
+        if key.lower().endswith(TemplateFields.REGEX):
+            return key[:-len(TemplateFields.REGEX)]
+        return key
@@ -12,17 +12,17 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from collections import namedtuple
+
 from oslo_log import log as logging
 import six
 
+from vitrage.common.constants import VertexProperties as VProps
 from vitrage.common.exception import VitrageAlgorithmError
 from vitrage.graph.filter import check_filter
 
 LOG = logging.getLogger(__name__)
 
-MAPPED_V_ID = 'mapped_v_id'
-NEIGHBORS_MAPPED = 'neighbors_mapped'
-GRAPH_VERTEX = 'graph_vertex'
 NEG_VERTEX = 'negative vertex'
 NEG_CONDITION = 'negative_condition'
 
@@ -30,284 +30,322 @@ NEG_CONDITION = 'negative_condition'
 def subgraph_matching(base_graph, subgraph, matches, validate=False):
     """Find all occurrences of subgraph in the graph
 
-    In the following, a partial mapping is a copy of the sub-graph.
-    As we go, vertices of curr_mapping graph will be updated with new
-    fields used only for the traversal:
+    The vertices of the sub-graph are numbered (slots), and a partial mapping
+    is kept as tuples indexed by slot:
+
+     - ids:
+       The vertex_id of the corresponding vertex in the graph, NEG_VERTEX or
+       None. If it is not empty, than this slot is already mapped
 
-     - MAPPED_V_ID:
-       The vertex_id of the corresponding vertex in the graph.
-       If it is not empty, than this vertex is already mapped
+     - vertices:
+       The corresponding vertex in the graph
 
-     - NEIGHBORS_MAPPED:
-       True or None. When set True it means all the
-       neighbors of this vertex have already been mapped
+     - neighbors_mapped:
+       When True it means all the neighbors of this slot have already been
+       mapped
 
     Implementation Details:
     ----------------------
 
     - Init Step:
-      copy the sub-graph to create the first candidate mapping graph. In which
-      known vertices mappings are added to vertices MAPPED_V_ID. So, we now
-      have a sub-graph copy where some of the vertices already have a mapping
+      Map the known matches. So, we now have a partial mapping where some of
+      the slots already have a mapping
 
-    Main loop steps:
+    Depth first search steps, on a partial mapping:
 
     - Steps 1:
-      Pop a partially mapped sub-graph from the queue.
-      If all its vertices have a MAPPED_V_ID, add it to final mappings
+      If all the slots are mapped, it is a final mapping
 
     - Steps 2 & 3:
-      Find one template vertex that is not mapped but has a mapped neighbor
+      Find one slot that is not mapped but has a mapped neighbor
 
     - Step 4: CHECK PROPERTIES
-      In the graph find candidate vertices that are linked to that neighbor
-      and match the template vertex properties
+      Look up the graph vertices that are linked to the mapped neighbor by
+      the template edge label and have the template vertex type (adjacency
+      index of the graph), and check the template vertex properties on them
 
     - Step 5: CHECK STRUCTURE
-      Filter candidate vertices according to edges
+      Filter candidate vertices according to edges, and continue the search
+      from each of the extended partial mappings (backtracking)
     """
-    final_subgraphs = []
-    initial_sg = _create_initial_subgraph(matches,
-                                          base_graph,
-                                          subgraph,
-                                          validate)
-    if not initial_sg:
-        LOG.warning('subgraph_matching:Initial sub-graph creation failed')
-        LOG.warning('subgraph_matching: Known matches: %s', str(matches))
-        return final_subgraphs
-    queue = [initial_sg]
-
-    while queue:
-        curr_subgraph = queue.pop(0)
-
+    template = _Template(subgraph)
+    with base_graph.read_only_views():
+        initial_mapping = _create_initial_mapping(matches,
+                                                  base_graph,
+                                                  template,
+                                                  validate)
+        if not initial_mapping:
+            LOG.warning('subgraph_matching:Initial sub-graph creation failed')
+            LOG.warning('subgraph_matching: Known matches: %s', str(matches))
+            return []
+
+        result = []
+        found_mappings = set()
+        for mapping in _find_mappings(base_graph, template, initial_mapping):
+            if mapping.ids not in found_mappings:
+                found_mappings.add(mapping.ids)
+                result.append(_generate_result(template, mapping))
+        return result
+
+
+class _TemplateEdge(namedtuple('_TemplateEdge', ['source', 'target', 'label',
+                                                 'edge', 'is_negative'])):
+    def other(self, slot):
+        return self.source if self.target == slot else self.target
+
+
+_PartialMapping = namedtuple('_PartialMapping',
+                             ['ids', 'vertices', 'neighbors_mapped'])
+
+
+class _Template(object):
+    """The sub-graph, with its vertices numbered in the graph order"""
+
+    def __init__(self, subgraph):
+        vertices = subgraph.get_vertices()
+        self.size = len(vertices)
+        self.vertices = vertices
+        self.ids = [v.vertex_id for v in vertices]
+        self.slots = {v_id: slot for slot, v_id in enumerate(self.ids)}
+        self.types = [self._get_type(v) for v in vertices]
+        self.edges = []
+        self.neighbors = []
+        for v in vertices:
+            self.edges.append([
+                _TemplateEdge(self.slots[e.source_id],
+                              self.slots[e.target_id],
+                              e.label,
+                              e,
+                              bool(e.get(NEG_CONDITION)))
+                for e in subgraph.get_edges(v.vertex_id)])
+            neighbors = []
+            for neighbor in subgraph.neighbors(v.vertex_id):
+                slot = self.slots[neighbor.vertex_id]
+                if slot not in neighbors:
+                    neighbors.append(slot)
+            self.neighbors.append(neighbors)
+        self.has_neg_edges = [any(e.is_negative for e in edges)
+                              for edges in self.edges]
+
+    @staticmethod
+    def _get_type(vertex):
+        vitrage_type = vertex.get(VProps.VITRAGE_TYPE)
+        return vitrage_type \
+            if isinstance(vitrage_type, six.string_types) else None
+
+    def edges_between(self, slot, other_slot):
+        return [e for e in self.edges[slot] if e.other(slot) == other_slot]
+
+    def edges_to_mapped(self, slot, ids):
+        return [e for e in self.edges[slot] if ids[e.other(slot)]]
+
+
+def _find_mappings(graph, template, mapping):
+    while True:
         # STEP 1: STOPPING CONDITION
-        mapped_vertices = list(filter(
-            lambda v: v.get(MAPPED_V_ID),
-            curr_subgraph.get_vertices()))
-        if len(mapped_vertices) == subgraph.num_vertices():
-            final_subgraphs.append(curr_subgraph)
-            continue
-
-        # STEP 2: CAN WE THROW THIS SUB-GRAPH?
-        vertices_with_unmapped_neighbors = list(filter(
-            lambda v: not v.get(NEIGHBORS_MAPPED),
-            mapped_vertices))
-        if not vertices_with_unmapped_neighbors:
-            continue
+        mapped_slots = [slot for slot in range(template.size)
+                        if mapping.ids[slot]]
+        if len(mapped_slots) == template.size:
+            yield mapping
+            return
+
+        # STEP 2: CAN WE THROW THIS PARTIAL MAPPING?
+        slots_with_unmapped_neighbors = [
+            slot for slot in mapped_slots
+            if not mapping.neighbors_mapped[slot]]
+        if not slots_with_unmapped_neighbors:
+            return
 
         # STEP 3: FIND A SUB-GRAPH VERTEX TO MAP
-        v_with_unmapped_neighbors = _choose_vertex(
-            vertices_with_unmapped_neighbors,
-            curr_subgraph)
+        slot_with_unmapped_neighbors = _choose_slot(
+            slots_with_unmapped_neighbors,
+            lambda s: not template.has_neg_edges[s])
 
-        unmapped_neighbors = list(filter(
-            lambda v: not v.get(MAPPED_V_ID),
-            curr_subgraph.neighbors(v_with_unmapped_neighbors.vertex_id)))
+        unmapped_neighbors = [
+            slot for slot in template.neighbors[slot_with_unmapped_neighbors]
+            if not mapping.ids[slot]]
         if not unmapped_neighbors:
-            # Mark vertex as NEIGHBORS_MAPPED=True
-            v_with_unmapped_neighbors[NEIGHBORS_MAPPED] = True
-            curr_subgraph.update_vertex(v_with_unmapped_neighbors)
-            queue.append(curr_subgraph)
-            continue
-        subgraph_vertex_to_map = _choose_vertex(
-            unmapped_neighbors,
-            curr_subgraph,
-            curr_v=v_with_unmapped_neighbors)
-
-        # STEP 4: PROPERTIES CHECK
-        graph_candidate_vertices = base_graph.neighbors(
-            v_id=v_with_unmapped_neighbors[MAPPED_V_ID],
-            vertex_attr_filter=subgraph_vertex_to_map)
-
-        graph_candidate_vertices = \
-            _remove_used_graph_candidates(graph_candidate_vertices,
-                                          curr_subgraph)
-
-        # STEP 5: STRUCTURE CHECK
-        edges = _get_edges_to_mapped_vertices(curr_subgraph,
-                                              subgraph_vertex_to_map.vertex_id)
-        neg_edges = set(e for e in edges if e.get(NEG_CONDITION))
-        pos_edges = edges.difference(neg_edges)
-
-        if not graph_candidate_vertices and neg_edges and not pos_edges:
-            subgraph_vertex_to_map[MAPPED_V_ID] = NEG_VERTEX
-            curr_subgraph.update_vertex(subgraph_vertex_to_map)
-            queue.append(curr_subgraph)
+            mapping = mapping._replace(neighbors_mapped=_replace(
+                mapping.neighbors_mapped, slot_with_unmapped_neighbors, True))
             continue
-
-        found_subgraphs = []
-        remaining_items = len(graph_candidate_vertices)
+        break
+
+    slot_to_map = _choose_slot(
+        unmapped_neighbors,
+        lambda s: not any(e.is_negative for e in template.edges_between(
+            s, slot_with_unmapped_neighbors)))
+
+    # STEP 4: PROPERTIES CHECK
+    edges = template.edges_to_mapped(slot_to_map, mapping.ids)
+    neg_edges = [e for e in edges if e.is_negative]
+    pos_edges = [e for e in edges if not e.is_negative]
+
+    graph_candidate_vertices = _find_candidates(graph,
+                                                template,
+                                                mapping,
+                                                slot_with_unmapped_neighbors,
+                                                slot_to_map,
+                                                pos_edges)
+
+    # STEP 5: STRUCTURE CHECK
+    if not graph_candidate_vertices and neg_edges and not pos_edges:
+        next_mappings = [_map_slot(mapping, slot_to_map, NEG_VERTEX, None)]
+    else:
+        next_mappings = []
         for graph_vertex in graph_candidate_vertices:
-            subgraph_vertex_to_map[MAPPED_V_ID] = graph_vertex.vertex_id
-            subgraph_vertex_to_map[GRAPH_VERTEX] = graph_vertex
-            curr_subgraph.update_vertex(subgraph_vertex_to_map)
-            if not _graph_contains_subgraph_edges(base_graph,
-                                                  curr_subgraph,
+            next_mapping = _map_slot(mapping,
+                                     slot_to_map,
+                                     graph_vertex.vertex_id,
+                                     graph_vertex)
+            if not _graph_contains_subgraph_edges(graph,
+                                                  next_mapping.ids,
                                                   pos_edges):
                 continue
-            if not _graph_contains_subgraph_edges(base_graph,
-                                                  curr_subgraph,
+            if not _graph_contains_subgraph_edges(graph,
+                                                  next_mapping.ids,
                                                   neg_edges):
-                del found_subgraphs[:]
+                del next_mappings[:]
                 break
             if neg_edges and not pos_edges:
-                subgraph_vertex_to_map[MAPPED_V_ID] = NEG_VERTEX
-                curr_subgraph.update_vertex(subgraph_vertex_to_map)
+                next_mappings = [
+                    _map_slot(mapping, slot_to_map, NEG_VERTEX, None)]
+            else:
+                next_mappings.append(next_mapping)
 
-            remaining_items -= 1  # no need to copy the last one
-            found_subgraphs.append(
-                curr_subgraph.copy() if remaining_items else curr_subgraph)
+    for next_mapping in next_mappings:
+        for final_mapping in _find_mappings(graph, template, next_mapping):
+            yield final_mapping
 
-        queue.extend(found_subgraphs)
 
-    # Last thing: Convert results to the expected format!
-    return _generate_result(final_subgraphs)
+def _find_candidates(graph, template, mapping, mapped_slot, slot_to_map,
+                     pos_edges):
+    """Find the graph vertices that can be mapped to slot_to_map
 
+    The candidates are the neighbors of the graph vertex mapped to
+    mapped_slot, linked to it with the label of a positive template edge
+    between the two slots (any label if there is none), that have the
+    template vertex properties.
+    """
+    graph_id = mapping.ids[mapped_slot]
+    if graph_id is NEG_VERTEX:
+        return []
+
+    labels = [e.label for e in pos_edges
+              if e.other(slot_to_map) == mapped_slot]
+    candidate_ids = graph.neighbor_ids(graph_id,
+                                       labels[0] if labels else None,
+                                       template.types[slot_to_map])
+
+    used_ids = set(mapping.ids)
+    template_vertex = template.vertices[slot_to_map]
+    candidates = []
+    for candidate_id in candidate_ids:
+        if candidate_id in used_ids:
+            continue
+        candidate = graph.get_vertex(candidate_id)
+        if candidate and check_filter(candidate, template_vertex):
+            candidates.append(candidate)
+    return candidates
 
-def _generate_result(final_subgraphs):
-    result = []
-    for mapping in final_subgraphs:
-        subgraph_vertices = dict()
-        for v in mapping.get_vertices():
-            v_id = v[MAPPED_V_ID]
-            if isinstance(v_id, six.string_types) and v_id is not NEG_VERTEX:
-                subgraph_vertices[v.vertex_id] = v[GRAPH_VERTEX]
 
-        if subgraph_vertices not in result:
-            result.append(subgraph_vertices)
-    return result
+def _generate_result(template, mapping):
+    subgraph_vertices = dict()
+    for slot, v_id in enumerate(mapping.ids):
+        if isinstance(v_id, six.string_types) and v_id is not NEG_VERTEX:
+            subgraph_vertices[template.ids[slot]] = mapping.vertices[slot]
+    return subgraph_vertices
 
 
-def _choose_vertex(vertices, subgraph, curr_v=None):
-    """Return a vertex with a positive edge if exists, otherwise the first one.
+def _choose_slot(slots, is_preferred):
+    """Return the first preferred slot if exists, otherwise the first one"""
+    for slot in slots:
+        if is_preferred(slot):
+            return slot
+    return slots[0]
 
-    """
-    for v in vertices:
-        curr_vertex_id = curr_v.vertex_id if curr_v else None
-        if not subgraph.get_edges(v.vertex_id, curr_vertex_id,
-                                  attr_filter={NEG_CONDITION: True}):
-            return v
-    return vertices.pop(0)
 
+def _replace(values, index, value):
+    return values[:index] + (value,) + values[index + 1:]
 
-def _get_edges_to_mapped_vertices(graph, vertex_id):
-    """Get all edges (to/from) vertex where neighbor has a MAPPED_V_ID
 
-    :type graph: driver.Graph
-    :type vertex_id: str
-    :rtype: set of driver.Edge
-    """
-    subgraph_edges_to_mapped_vertices = []
-    for e in graph.get_edges(vertex_id):
-        t_neighbor = graph.get_vertex(e.other_vertex(vertex_id))
-        if not t_neighbor:
-            raise VitrageAlgorithmError('Cant get vertex for edge' + str(e))
-        if t_neighbor and t_neighbor.get(MAPPED_V_ID):
-            subgraph_edges_to_mapped_vertices.append(e)
-    return set(subgraph_edges_to_mapped_vertices)
+def _map_slot(mapping, slot, graph_id, graph_vertex):
+    return mapping._replace(ids=_replace(mapping.ids, slot, graph_id),
+                            vertices=_replace(mapping.vertices,
+                                              slot,
+                                              graph_vertex))
 
 
-def _graph_contains_subgraph_edges(graph, subgraph, subgraph_edges):
+def _graph_contains_subgraph_edges(graph, ids, subgraph_edges):
     """Check if graph contains all the expected edges
 
     For each (sub-graph) expected edge, check if a corresponding edge exists
     in the graph with relevant properties check
 
     :type graph: driver.Graph
-    :type subgraph: driver.Graph
-    :type subgraph_edges: set of driver.Edge
+    :param ids: graph vertex id of each slot
+    :type ids: tuple
+    :type subgraph_edges: list of _TemplateEdge
     :rtype: bool
     """
     for e in subgraph_edges:
-        graph_v_id_source = subgraph.get_vertex(e.source_id).get(MAPPED_V_ID)
-        graph_v_id_target = subgraph.get_vertex(e.target_id).get(MAPPED_V_ID)
+        graph_v_id_source = ids[e.source]
+        graph_v_id_target = ids[e.target]
         if not graph_v_id_source or not graph_v_id_target:
-            raise VitrageAlgorithmError('Cant get vertex for edge' + str(e))
+            raise VitrageAlgorithmError('Cant get vertex for edge' +
+                                        str(e.edge))
         found_graph_edge = graph.get_edge(graph_v_id_source,
                                           graph_v_id_target,
                                           e.label)
 
-        if not found_graph_edge and e.get(NEG_CONDITION):
+        if not found_graph_edge and e.is_negative:
             continue
 
-        if not found_graph_edge or not check_filter(found_graph_edge, e,
+        if not found_graph_edge or not check_filter(found_graph_edge, e.edge,
                                                     NEG_CONDITION):
             return False
     return True
 
 
-def _create_initial_subgraph(known_matches, graph, subgraph, validate=False):
-    """Create initial mapping graph from sub graph and known matches
-
-    copy the sub-graph to create the first candidate mapping graph.
-    In which known vertices mappings are added to vertices MAPPED_V_ID
-    """
-    mapping = subgraph.copy()
+def _create_initial_mapping(known_matches, graph, template, validate=False):
+    """Create initial partial mapping from the known matches"""
+    empty = (None,) * template.size
+    mapping = _PartialMapping(ids=empty,
+                              vertices=empty,
+                              neighbors_mapped=(False,) * template.size)
     for match in known_matches:
+        sge = match.subgraph_element
+        ge = match.graph_element
         if match.is_vertex:
-            if not _update_mapping_for_vertex(match, mapping, graph, validate):
+            mapped_ids = [(sge.vertex_id, ge.vertex_id)]
+        else:
+            mapped_ids = [(sge.source_id, ge.source_id),
+                          (sge.target_id, ge.target_id)]
+
+        for subgraph_id, graph_id in mapped_ids:
+            mapping = _update_mapping(mapping, template, graph,
+                                      subgraph_id, graph_id, validate)
+            if not mapping:
                 return None
-            subgraph_id = match.subgraph_element.vertex_id
-            edges = _get_edges_to_mapped_vertices(mapping, subgraph_id)
 
-        else:  # is edge
-            if not _update_mapping_for_edge(match, mapping, graph, validate):
-                return None
-            edges = _get_related_edges(mapping, match, subgraph, validate)
-        if not _graph_contains_subgraph_edges(graph, mapping, edges):
+        slot = template.slots[mapped_ids[0][0]]
+        edges = template.edges_to_mapped(slot, mapping.ids)
+        if not match.is_vertex and not validate:
+            # no need to check the mapped edge
+            target_slot = template.slots[sge.target_id]
+            edges = [e for e in edges
+                     if (e.source, e.target, e.label) !=
+                     (slot, target_slot, sge.label)]
+        if not _graph_contains_subgraph_edges(graph, mapping.ids, edges):
             return None
     return mapping
 
 
-def _get_related_edges(mapping, match, subgraph, validate):
-    sub_target_id = match.subgraph_element.target_id
-    sub_source_id = match.subgraph_element.source_id
-    edges = _get_edges_to_mapped_vertices(mapping, sub_source_id)
-    edges.union(_get_edges_to_mapped_vertices(mapping, sub_target_id))
-    if not validate:  # no need to check the mapped edge
-        known_edge = subgraph.get_edge(
-            sub_source_id,
-            sub_target_id,
-            match.subgraph_element.label
-        )
-        edges.remove(known_edge)
-    return edges
-
-
-def _update_mapping(subgraph, graph, subgraph_id, graph_id, validate):
-    subgraph_vertex = subgraph.get_vertex(subgraph_id)
+def _update_mapping(mapping, template, graph, subgraph_id, graph_id,
+                    validate):
+    slot = template.slots[subgraph_id]
     graph_vertex = graph.get_vertex(graph_id)
     if validate:
-        if not check_filter(graph_vertex, subgraph_vertex, MAPPED_V_ID):
-            return False
-    subgraph_vertex[MAPPED_V_ID] = graph_id
-    subgraph_vertex[GRAPH_VERTEX] = graph_vertex
-    subgraph.update_vertex(subgraph_vertex)
-    return True
-
-
-def _update_mapping_for_vertex(known_match, mapping, graph, validate):
-    subgraph_id = known_match.subgraph_element.vertex_id
-    graph_id = known_match.graph_element.vertex_id
-    return _update_mapping(mapping, graph, subgraph_id, graph_id, validate)
-
-
-def _update_mapping_for_edge(known_match, mapping, graph, validate):
-    s_id = known_match.graph_element.source_id
-    sub_s_id = known_match.subgraph_element.source_id
-    if not _update_mapping(mapping, graph, sub_s_id, s_id, validate):
-        return False
-
-    t_id = known_match.graph_element.target_id
-    sub_t_id = known_match.subgraph_element.target_id
-    return _update_mapping(mapping, graph, sub_t_id, t_id, validate)
-
-
-def _remove_used_graph_candidates(graph_candidate_vertices, curr_subgraph):
-    ver_to_remove = []
-    for candidate in graph_candidate_vertices:
-        for sub_ver in curr_subgraph.get_vertices():
-            if sub_ver.get(GRAPH_VERTEX, False) and \
-                    sub_ver[GRAPH_VERTEX].vertex_id == candidate.vertex_id:
-                ver_to_remove.append(candidate)
-    return [v for v in graph_candidate_vertices if v not in ver_to_remove]
+        if not graph_vertex or \
+                not check_filter(graph_vertex, template.vertices[slot]):
+            return None
+    return _map_slot(mapping, slot, graph_id, graph_vertex)
@@ -13,36 +13,103 @@
 # under the License.
 
 
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+class PropertiesView(Mapping):
+    """Read-only view over the properties dict of a graph element
+
+    Returned by elements created inside NXGraph.read_only_views(), where the
+    element refers to the graph's own attribute dict instead of a copy.
+    """
+
+    __slots__ = ('_properties',)
+
+    def __init__(self, properties):
+        self._properties = properties
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+    def __iter__(self):
+        return iter(self._properties)
+
+    def __len__(self):
+        return len(self._properties)
+
+    def __contains__(self, key):
+        return key in self._properties
+
+    def __repr__(self):
+        return repr(self._properties)
+
+    def copy(self):
+        return dict(self._properties)
+
+    __copy__ = copy
+
+
 class PropertiesElement(object):
     def __init__(self, properties=None):
+        self._shared = False
         self.properties = properties
 
+    @property
+    def properties(self):
+        if self._shared:
+            return PropertiesView(self._properties)
+        return self._properties
+
+    @properties.setter
+    def properties(self, properties):
+        self._shared = False
+        self._properties = properties
+
+    def _set_shared_properties(self, properties):
+        """Refer to properties owned by someone else, without copying them
+
+        The element is read-only until it is modified, at which point it gets
+        a private copy of the properties (copy-on-write).
+        """
+        self._shared = True
+        self._properties = properties
+
+    def _own_properties(self):
+        if self._shared:
+            self._shared = False
+            self._properties = dict(self._properties)
+
     def __getitem__(self, key):
         """Get a property with 'value = element[key]'"""
-        return self.properties[key]
+        return self._properties[key]
 
     def __setitem__(self, key, value):
         """Set a property with 'element[key] = value'"""
-        if not self.properties:
-            self.properties = {}
-        self.properties[key] = value
+        self._own_properties()
+        if not self._properties:
+            self._properties = {}
+        self._properties[key] = value
 
     def __delitem__(self, key):
         """Delete a property with 'del(element[key])"""
-        if self.properties and key in self.properties:
-            del self.properties[key]
+        if self._properties and key in self._properties:
+            self._own_properties()
+            del self._properties[key]
 
     def __iter__(self):
-        return self.properties.values()
+        return self._properties.values()
 
     def get(self, k, d=None):
-        return self.properties.get(k, d)
+        return self._properties.get(k, d)
 
     def items(self):
-        return self.properties.items()
+        return self._properties.items()
 
     def copy(self):
-        return PropertiesElement(self.properties.copy())
+        return PropertiesElement(self._properties.copy())
 
 
 class Vertex(PropertiesElement):
@@ -84,12 +151,13 @@ class Vertex(PropertiesElement):
         :type other: Vertex
         :rtype: bool
         """
-        return self.__dict__ == other.__dict__ and \
-            self.properties == other.properties
+        return isinstance(other, Vertex) and \
+            self.vertex_id == other.vertex_id and \
+            self._properties == other._properties
 
     def copy(self):
         return Vertex(vertex_id=self.vertex_id,
-                      properties=self.properties.copy())
+                      properties=self._properties.copy())
 
 
 class Edge(PropertiesElement):
@@ -154,8 +222,11 @@ class Edge(PropertiesElement):
         :type other: Edge
         :rtype: bool
         """
-        return self.__dict__ == other.__dict__ and \
-            self.properties == other.properties
+        return isinstance(other, Edge) and \
+            self.source_id == other.source_id and \
+            self.target_id == other.target_id and \
+            self.label == other.label and \
+            self._properties == other._properties
 
     def other_vertex(self, v_id):
         """If v_id == target_id return source_id, else return target_id
@@ -172,4 +243,4 @@ class Edge(PropertiesElement):
         return Edge(source_id=self.source_id,
                     target_id=self.target_id,
                     label=self.label,
-                    properties=self.properties.copy())
+                    properties=self._properties.copy())
@@ -20,6 +20,7 @@ vitrage.graph.driver namespace.
 
 """
 import abc
+import contextlib
 import copy
 import six
 
@@ -48,12 +49,21 @@ class Graph(object):
         self.name = name
         self.graph_type = graph_type
         self.notifier = Notifier()
+        self._version = 0
 
-    def subscribe(self, function):
-        self.notifier.subscribe(function)
+    def subscribe(self, function, **filters):
+        """Subscribe the function to the changes of the graph elements
 
-    def is_subscribed(self):
-        return self.notifier.is_subscribed()
+        The function is called with the element before and after the change,
+        whether it is a vertex, and the graph.
+
+        :param filters: the changes to notify the function about, and
+         whether to pass it the changed properties, see Subscription
+        """
+        self.notifier.subscribe(function, **filters)
+
+    def is_subscribed(self, is_vertex=None):
+        return self.notifier.is_subscribed(is_vertex)
 
     def get_item(self, item):
         if isinstance(item, Edge):
@@ -61,6 +71,32 @@ class Graph(object):
         if isinstance(item, Vertex):
             return self.get_vertex(item.vertex_id)
 
+    @property
+    def version(self):
+        """A number that increases on every change of the graph
+
+        Can be used to tell if the results of a query are still valid.
+        On additions and updates, it increases after the subscribers are
+        notified, so the results of a query that also reads what the
+        subscribers maintain are not stale under the new version.
+
+        :rtype: int
+        """
+        return self._version
+
+    @contextlib.contextmanager
+    def read_only_views(self):
+        """Return read-only views of the graph elements instead of copies
+
+        Inside this context, the vertices and edges returned by the graph
+        refer to the graph's own properties, and are copied only if they are
+        modified. Their 'properties' attribute is read-only.
+
+        with graph.read_only_views():
+            alarms = graph.get_vertices(vertex_attr_filter=...)
+        """
+        yield
+
     @property
     def algo(self):
         """Get graph algorithms
@@ -277,11 +313,10 @@ class Graph(object):
 
     @staticmethod
     def _merge_properties(base_props, new_props):
-        if base_props is None:
-            base_props = copy.copy(new_props)
-        else:
-            base_props.update(copy.copy(new_props))
-        return {k: v for k, v in base_props.items() if v is not None}
+        # base_props is not updated in place, it may be referred to by views
+        props = copy.copy(base_props) if base_props is not None else {}
+        props.update(new_props)
+        return {k: v for k, v in props.items() if v is not None}
 
     @abc.abstractmethod
     def remove_vertex(self, v):
@@ -337,20 +372,6 @@ class Graph(object):
         """
         pass
 
-    @abc.abstractmethod
-    def get_vertices_by_key(self,
-                            key_values_hash):
-        """Get vertices list according to their hash key
-
-        The hash key is derived from their properties :
-        See processor_utils - get_defining_properties
-
-
-        :param key_values_hash: hash key
-        :type key_values_hash str
-        """
-        pass
-
     @abc.abstractmethod
     def neighbors(self, v_id, vertex_attr_filter=None,
                   edge_attr_filter=None, direction=Direction.BOTH):
@@ -400,10 +421,58 @@ class Graph(object):
         """
         pass
 
+    @abc.abstractmethod
+    def neighbor_ids(self, v_id, label=None, vitrage_type=None,
+                     direction=Direction.BOTH):
+        """Get the ids of the vertices that are neighboring to v_id vertex
+
+        Unlike neighbors(), the lookup is done in an adjacency index and
+        the properties of the neighbors are not checked.
+        If a direction and a label are given, the lookup is done in an index
+        of the edges of the label.
+
+        :param v_id: vertex id
+        :type v_id: str
+        :param label: label of the edges to the neighbors, None for any
+        :type label: str
+        :param vitrage_type: vitrage_type of the neighbors, None for any
+        :type vitrage_type: str
+        :param direction: the direction of the edges from v_id
+        :type direction: Direction
+        :rtype: list of str
+        """
+        pass
+
+    @abc.abstractmethod
+    def containment_path(self, v_id):
+        """Get the path of containing vertices from v_id to the top
+
+        Follows the incoming 'contains' edges of the vertices, e.g. from an
+        instance to its host, zone and cluster. If a vertex has several
+        containing vertices, a non deleted edge is preferred. The lookup is
+        done in an index, in O(depth).
+
+        :param v_id: vertex id
+        :type v_id: str
+        :return: the ids of the vertices, starting with v_id
+        :rtype: list of str
+        """
+        pass
+
     @abc.abstractmethod
     def json_output_graph(self, **kwargs):
         pass
 
+    @abc.abstractmethod
+    def json_output_tree(self, root_id):
+        """Json output of the graph as a tree, from the root vertex
+
+        :param root_id: the id of the root vertex
+        :type root_id: str
+        :rtype: str
+        """
+        pass
+
     @abc.abstractmethod
     def union(self, other_graph):
         pass
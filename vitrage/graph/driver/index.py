@@ -0,0 +1,237 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from collections import defaultdict
+
+
+class VertexIndex(object):
+    """Hash indexes over a fixed set of vertex properties
+
+    For every indexed property, maps each of its values to the ids of the
+    vertices holding that value. A vertex that does not have the property is
+    indexed under None, the same way item.get(key) is evaluated by the query
+    predicates. Unhashable values can not be bucketed, so such vertices are
+    kept aside and returned as candidates for any value of that property.
+    """
+
+    def __init__(self, keys):
+        self.keys = tuple(keys)
+        self._buckets = {key: defaultdict(set) for key in self.keys}
+        self._unhashable = {key: set() for key in self.keys}
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, v_id, properties):
+        """Index (or re-index) a vertex according to its properties
+
+        :type v_id: str
+        :type properties: dict
+        """
+        self.remove(v_id)
+        values = tuple(properties.get(key) for key in self.keys)
+        for key, value in zip(self.keys, values):
+            try:
+                self._buckets[key][value].add(v_id)
+            except TypeError:
+                self._unhashable[key].add(v_id)
+        self._entries[v_id] = values
+
+    def remove(self, v_id):
+        values = self._entries.pop(v_id, None)
+        if values is None:
+            return
+        for key, value in zip(self.keys, values):
+            if v_id in self._unhashable[key]:
+                self._unhashable[key].discard(v_id)
+                continue
+            buckets = self._buckets[key]
+            bucket = buckets.get(value)
+            if bucket is not None:
+                bucket.discard(v_id)
+                if not bucket:
+                    del buckets[value]
+
+    def candidates(self, constraints):
+        """Find the vertices that may satisfy the equality constraints
+
+        The buckets of every indexed constrained property are intersected,
+        starting from the smallest one. Vertices in the result still need to
+        be checked against the full query.
+
+        :param constraints: property name -> collection of accepted values
+        :type constraints: dict
+        :return: candidate vertex ids, or None if no constraint is indexed
+        :rtype: set
+        """
+        matches = []
+        for key, values in constraints.items():
+            if key not in self._buckets:
+                continue
+            buckets = self._buckets[key]
+            ids = set(self._unhashable[key])
+            try:
+                for value in values:
+                    ids.update(buckets.get(value, ()))
+            except TypeError:
+                continue
+            if not ids:
+                return set()
+            matches.append(ids)
+
+        if not matches:
+            return None
+
+        matches.sort(key=len)
+        result = matches[0]
+        for ids in matches[1:]:
+            result.intersection_update(ids)
+            if not result:
+                break
+        return result
+
+
+class AdjacencyIndex(object):
+    """Neighbors of every vertex by edge label and neighbor vitrage_type
+
+    Edges are indexed in both directions, so the neighbors of a vertex are
+    found regardless of the direction of the edges that connect them. Each
+    neighbor is kept with the number of edges (in both directions) that
+    connect it with the same label.
+    """
+
+    def __init__(self):
+        self._adj = {}
+        self._types = {}
+
+    def add_vertex(self, v_id, vitrage_type):
+        """Index a vertex type, re-keying its neighbors if it has changed"""
+        old_type = self._types.get(v_id)
+        self._types[v_id] = vitrage_type
+        if old_type == vitrage_type:
+            return
+        for (label, n_type), neighbors in list(
+                self._adj.get(v_id, {}).items()):
+            for n_id, count in list(neighbors.items()):
+                n_adj = self._adj[n_id]
+                old_key = (label, old_type)
+                n_adj[old_key].pop(v_id)
+                if not n_adj[old_key]:
+                    del n_adj[old_key]
+                n_adj.setdefault((label, vitrage_type), {})[v_id] = count
+
+    def remove_vertex(self, v_id):
+        for (label, n_type), neighbors in self._adj.pop(v_id, {}).items():
+            for n_id in neighbors:
+                if n_id != v_id:
+                    self._remove_neighbor(n_id, v_id, label, remove_all=True)
+        self._types.pop(v_id, None)
+
+    def add_edge(self, source_id, target_id, label):
+        self._add_neighbor(source_id, target_id, label)
+        self._add_neighbor(target_id, source_id, label)
+
+    def remove_edge(self, source_id, target_id, label):
+        self._remove_neighbor(source_id, target_id, label)
+        self._remove_neighbor(target_id, source_id, label)
+
+    def neighbor_ids(self, v_id, label=None, vitrage_type=None):
+        """Get the ids of the neighbors of a vertex
+
+        :param label: edge label, None for any label
+        :param vitrage_type: neighbor vitrage_type, None for any type
+        :rtype: list
+        """
+        v_adj = self._adj.get(v_id)
+        if not v_adj:
+            return []
+        if label is not None and vitrage_type is not None:
+            return list(v_adj.get((label, vitrage_type), ()))
+        result = []
+        seen = set()
+        for (e_label, n_type), neighbors in v_adj.items():
+            if label is not None and e_label != label:
+                continue
+            if vitrage_type is not None and n_type != vitrage_type:
+                continue
+            for n_id in neighbors:
+                if n_id not in seen:
+                    seen.add(n_id)
+                    result.append(n_id)
+        return result
+
+    def _add_neighbor(self, v_id, n_id, label):
+        key = (label, self._types.get(n_id))
+        neighbors = self._adj.setdefault(v_id, {}).setdefault(key, {})
+        neighbors[n_id] = neighbors.get(n_id, 0) + 1
+
+    def _remove_neighbor(self, v_id, n_id, label, remove_all=False):
+        v_adj = self._adj.get(v_id)
+        key = (label, self._types.get(n_id))
+        if not v_adj or key not in v_adj or n_id not in v_adj[key]:
+            return
+        neighbors = v_adj[key]
+        neighbors[n_id] -= 1
+        if remove_all or not neighbors[n_id]:
+            del neighbors[n_id]
+        if not neighbors:
+            del v_adj[key]
+
+
+class EdgeLabelIndex(object):
+    """The sources and targets of the edges of one label
+
+    Maps every vertex to the sources of its incoming edges with the label,
+    e.g. the vertices that contain it, and to the targets of its outgoing
+    edges with the label.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self._sources = {}
+        self._targets = {}
+
+    def add_edge(self, source_id, target_id, label):
+        if label != self.label:
+            return
+        self._sources.setdefault(target_id, set()).add(source_id)
+        self._targets.setdefault(source_id, set()).add(target_id)
+
+    def remove_edge(self, source_id, target_id, label):
+        if label != self.label:
+            return
+        self._discard(self._sources, target_id, source_id)
+        self._discard(self._targets, source_id, target_id)
+
+    def remove_vertex(self, v_id):
+        for source_id in self._sources.pop(v_id, ()):
+            self._discard(self._targets, source_id, v_id)
+        for target_id in self._targets.pop(v_id, ()):
+            self._discard(self._sources, target_id, v_id)
+
+    def source_ids(self, v_id):
+        return self._sources.get(v_id, ())
+
+    def target_ids(self, v_id):
+        return self._targets.get(v_id, ())
+
+    @staticmethod
+    def _discard(ids_map, key, v_id):
+        ids = ids_map.get(key)
+        if ids is None:
+            return
+        ids.discard(v_id)
+        if not ids:
+            del ids_map[key]
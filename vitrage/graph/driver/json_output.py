@@ -0,0 +1,59 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+
+from vitrage.common.constants import VertexProperties as VProps
+
+
+def iter_node_link_json(nodes, links, **kwargs):
+    """Encode a graph in networkx node-link format, in chunks
+
+    The id of a node is its entity id, if it has one, in which case its
+    index in the nodes list is added as graph_index.
+    Each node and link is encoded as it is read, instead of building the
+    whole node-link structure first.
+
+    :param nodes: the vertices of the graph
+    :type nodes: iterable of (vertex_id, properties) tuples
+    :param links: the edges of the graph, between the nodes
+    :type links: iterable of (source_id, target_id, label, properties)
+    :param kwargs: additional keys of the encoded object
+    :rtype: iterator of str
+    """
+    encode = json.JSONEncoder().encode
+    graph_indexes = {}
+
+    yield '{"directed": true, "multigraph": true, "graph": {}, "nodes": ['
+    for index, (v_id, properties) in enumerate(nodes):
+        graph_indexes[v_id] = index
+        node = dict(properties)
+        if VProps.ID in node:
+            node[VProps.GRAPH_INDEX] = index
+        else:
+            node[VProps.ID] = v_id
+        yield (', ' if index else '') + encode(node)
+
+    yield '], "links": ['
+    for index, (source_id, target_id, label, properties) in enumerate(links):
+        link = dict(properties)
+        link['source'] = graph_indexes[source_id]
+        link['target'] = graph_indexes[target_id]
+        link['key'] = label
+        yield (', ' if index else '') + encode(link)
+    yield ']'
+
+    for key, value in kwargs.items():
+        yield ', %s: %s' % (encode(key), encode(value))
+    yield '}'
@@ -12,23 +12,31 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import contextlib
 import copy
 import json
 import networkx as nx
 from networkx.algorithms.operators.binary import compose
-from networkx.readwrite import json_graph
+import threading
 
 from oslo_log import log as logging
 
+from vitrage.common.constants import EdgeLabel as ELabel
+from vitrage.common.constants import EdgeProperties as EProps
 from vitrage.common.constants import VertexProperties as VProps
 from vitrage.graph.algo_driver.networkx_algorithm import NXAlgorithm
 from vitrage.graph.driver.elements import Edge
 from vitrage.graph.driver.elements import Vertex
 from vitrage.graph.driver.graph import Direction
 from vitrage.graph.driver.graph import Graph
+from vitrage.graph.driver.index import AdjacencyIndex
+from vitrage.graph.driver.index import EdgeLabelIndex
+from vitrage.graph.driver.index import VertexIndex
+from vitrage.graph.driver.json_output import iter_node_link_json
 from vitrage.graph.driver.notifier import Notifier
 from vitrage.graph.filter import check_filter
-from vitrage.graph.query import create_predicate
+from vitrage.graph.filter import get_filter_constraints
+from vitrage.graph.query import compile_query
 
 LOG = logging.getLogger(__name__)
 
@@ -42,15 +50,39 @@ def vertex_copy(v_id, data):
     return Vertex(vertex_id=v_id, properties=copy.copy(data))
 
 
+def edge_view(source_id, target_id, label, data):
+    edge = Edge(source_id=source_id, target_id=target_id, label=label)
+    edge._set_shared_properties(data)
+    return edge
+
+
+def vertex_view(v_id, data):
+    vertex = Vertex(vertex_id=v_id)
+    vertex._set_shared_properties(data)
+    return vertex
+
+
 class NXGraph(Graph):
 
     GRAPH_TYPE = "networkx"
 
+    # vertex properties with a maintained hash index, used by get_vertices
+    INDEXED_PROPERTIES = (
+        VProps.VITRAGE_CATEGORY,
+        VProps.VITRAGE_TYPE,
+        VProps.VITRAGE_IS_DELETED,
+        VProps.VITRAGE_IS_PLACEHOLDER,
+        VProps.PROJECT_ID,
+        VProps.ID,
+        VProps.NAME,
+    )
+
     def __init__(self,
                  name='networkx_graph',
                  vertices=None,
                  edges=None):
         super(NXGraph, self).__init__(name, NXGraph.GRAPH_TYPE)
+        self._views = threading.local()
         self._g = nx.MultiDiGraph()
         self.add_vertices(vertices)
         self.add_edges(edges)
@@ -58,6 +90,78 @@ class NXGraph(Graph):
     def __len__(self):
         return len(self._g)
 
+    @property
+    def _g(self):
+        return self._nx_graph
+
+    @_g.setter
+    def _g(self, nx_graph):
+        self._nx_graph = nx_graph
+        self._version += 1
+        # The indexes are built lazily, on the first query that can use them
+        self._vertex_index = None
+        self._adjacency_index = None
+        self._label_indexes = {}
+
+    def _get_vertex_index(self):
+        if self._vertex_index is None:
+            self._vertex_index = VertexIndex(self.INDEXED_PROPERTIES)
+            for n, data in self._g.nodes_iter(data=True):
+                self._vertex_index.add(n, data)
+        return self._vertex_index
+
+    def _get_adjacency_index(self):
+        if self._adjacency_index is None:
+            self._adjacency_index = AdjacencyIndex()
+            for n, data in self._g.nodes_iter(data=True):
+                self._adjacency_index.add_vertex(
+                    n, data.get(VProps.VITRAGE_TYPE))
+            for u, v, label in self._g.edges_iter(keys=True):
+                self._adjacency_index.add_edge(u, v, label)
+        return self._adjacency_index
+
+    def _get_label_index(self, label):
+        label_index = self._label_indexes.get(label)
+        if label_index is None:
+            label_index = EdgeLabelIndex(label)
+            for u, v, e_label in self._g.edges_iter(keys=True):
+                label_index.add_edge(u, v, e_label)
+            self._label_indexes[label] = label_index
+        return label_index
+
+    def _index_vertex(self, v_id):
+        if self._vertex_index is not None:
+            self._vertex_index.add(v_id, self._g.node[v_id])
+        if self._adjacency_index is not None:
+            self._adjacency_index.add_vertex(
+                v_id, self._g.node[v_id].get(VProps.VITRAGE_TYPE))
+
+    def _unindex_vertex(self, v_id):
+        if self._vertex_index is not None:
+            self._vertex_index.remove(v_id)
+        if self._adjacency_index is not None:
+            self._adjacency_index.remove_vertex(v_id)
+        for label_index in self._label_indexes.values():
+            label_index.remove_vertex(v_id)
+
+    @contextlib.contextmanager
+    def read_only_views(self):
+        depth = getattr(self._views, 'depth', 0)
+        self._views.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._views.depth = depth
+
+    def _views_enabled(self):
+        return getattr(self._views, 'depth', 0) > 0
+
+    def _vertex_factory(self):
+        return vertex_view if self._views_enabled() else vertex_copy
+
+    def _edge_factory(self):
+        return edge_view if self._views_enabled() else edge_copy
+
     @property
     def algo(self):
         return NXAlgorithm(self)
@@ -82,7 +186,16 @@ class NXGraph(Graph):
 
     def _add_vertex(self, v):
         properties_copy = copy.copy(v.properties)
-        self._g.add_node(n=v.vertex_id, attr_dict=properties_copy)
+        orig_prop = self._g.node.get(v.vertex_id)
+        if orig_prop is None:
+            self._g.add_node(n=v.vertex_id, attr_dict=properties_copy)
+        else:
+            # Replace rather than update the stored properties, they may be
+            # referred to by read-only views
+            new_prop = copy.copy(orig_prop)
+            new_prop.update(properties_copy)
+            self._g.node[v.vertex_id] = new_prop
+        self._index_vertex(v.vertex_id)
 
     @Notifier.update_notify
     def add_edge(self, e):
@@ -95,8 +208,25 @@ class NXGraph(Graph):
 
     def _add_edge(self, e):
         properties_copy = copy.copy(e.properties)
-        self._g.add_edge(u=e.source_id, v=e.target_id,
-                         key=e.label, attr_dict=properties_copy)
+        new_vertices = [v_id for v_id in (e.source_id, e.target_id)
+                        if v_id not in self._g]
+        orig_prop = self._g.adj.get(
+            e.source_id, {}).get(e.target_id, {}).get(e.label)
+        if orig_prop is None:
+            self._g.add_edge(u=e.source_id, v=e.target_id,
+                             key=e.label, attr_dict=properties_copy)
+            if self._adjacency_index is not None:
+                self._adjacency_index.add_edge(
+                    e.source_id, e.target_id, e.label)
+            for label_index in self._label_indexes.values():
+                label_index.add_edge(e.source_id, e.target_id, e.label)
+        else:
+            new_prop = copy.copy(orig_prop)
+            new_prop.update(properties_copy)
+            self._g.adj[e.source_id][e.target_id][e.label] = new_prop
+        # networkx implicitly adds the missing vertices of the edge
+        for v_id in new_vertices:
+            self._index_vertex(v_id)
 
     def get_vertex(self, v_id):
         """Fetch a vertex from the graph
@@ -105,7 +235,7 @@ class NXGraph(Graph):
         """
         properties = self._g.node.get(v_id, None)
         if properties is not None:
-            return vertex_copy(v_id, properties)
+            return self._vertex_factory()(v_id, properties)
         LOG.debug("get_vertex item not found. v_id=%s", str(v_id))
         return None
 
@@ -117,7 +247,8 @@ class NXGraph(Graph):
                       "label=%s", str(source_id), str(target_id), str(label))
             return None
         if properties is not None:
-            return edge_copy(source_id, target_id, label, properties)
+            return self._edge_factory()(source_id, target_id, label,
+                                        properties)
         return None
 
     def get_edges(self,
@@ -135,7 +266,8 @@ class NXGraph(Graph):
         nodes, edges = self._neighboring_nodes_edges_query(
             v1_id, edge_predicate=check_edge, direction=direction)
 
-        edge_copies = set(edge_copy(u, v, label, data)
+        create_edge = self._edge_factory()
+        edge_copies = set(create_edge(u, v, label, data)
                           for u, v, label, data in edges)
 
         if v2_id:
@@ -177,6 +309,7 @@ class NXGraph(Graph):
             return
         new_prop = self._merge_properties(orig_prop, v.properties)
         self._g.node[v.vertex_id] = new_prop
+        self._index_vertex(v.vertex_id)
 
     @Notifier.update_notify
     def update_edge(self, e):
@@ -201,6 +334,8 @@ class NXGraph(Graph):
         """
 
         self._g.remove_node(n=v.vertex_id)
+        self._unindex_vertex(v.vertex_id)
+        self._version += 1
 
     def remove_edge(self, e):
         """Remove an edge from the graph
@@ -208,35 +343,92 @@ class NXGraph(Graph):
         :type e: Edge
         """
         self._g.remove_edge(u=e.source_id, v=e.target_id, key=e.label)
+        if self._adjacency_index is not None:
+            self._adjacency_index.remove_edge(
+                e.source_id, e.target_id, e.label)
+        for label_index in self._label_indexes.values():
+            label_index.remove_edge(e.source_id, e.target_id, e.label)
+        self._version += 1
 
     def get_vertices(self,
                      vertex_attr_filter=None,  # Dictionary of key value
                      query_dict=None):
-        def check_vertex(vertex_data):
-            return check_filter(vertex_data[1], vertex_attr_filter)
-
-        if not query_dict:
-            items = filter(check_vertex, self._g.nodes_iter(data=True))
-            return [vertex_copy(node, node_data) for node, node_data in items]
-        elif not vertex_attr_filter:
-            vertices = []
-            match_func = create_predicate(query_dict)
-            for node, node_data in self._g.nodes_iter(data=True):
-                v = vertex_copy(node, node_data)
-                if match_func(v):
-                    vertices.append(v)
-            return vertices
-        else:
+        if query_dict and vertex_attr_filter:
             return []
 
-    def get_vertices_by_key(self, key_values_hash):
+        create_vertex = self._vertex_factory()
+
+        if query_dict:
+            match_func, constraints = compile_query(query_dict)
+        elif vertex_attr_filter:
+            def match_func(vertex_data):
+                return check_filter(vertex_data, vertex_attr_filter)
+            constraints = get_filter_constraints(vertex_attr_filter)
+        else:
+            return [create_vertex(node, node_data)
+                    for node, node_data in self._g.nodes_iter(data=True)]
+
+        return [create_vertex(node, node_data)
+                for node, node_data in self._query_nodes(constraints)
+                if match_func(node_data)]
+
+    def _query_nodes(self, constraints):
+        """Get the nodes that may match the equality constraints
+
+        Uses the vertex index to narrow down the candidates, the caller
+        should still check each of them against the whole query.
 
-        if key_values_hash in self.key_to_vertex_ids:
-            vertices = []
-            for vertex_id in self.key_to_vertex_ids[key_values_hash]:
-                vertices.append(self.get_vertex(vertex_id))
-            return vertices
-        return []
+        :rtype: iterable of (node, node_data) tuples
+        """
+        candidate_ids = self._get_vertex_index().candidates(constraints) \
+            if constraints else None
+        if candidate_ids is None:
+            return self._g.nodes_iter(data=True)
+        nodes = self._g.node
+        return ((n, nodes[n]) for n in candidate_ids)
+
+    def neighbor_ids(self, v_id, label=None, vitrage_type=None,
+                     direction=Direction.BOTH):
+        if direction == Direction.BOTH:
+            return self._get_adjacency_index().neighbor_ids(
+                v_id, label, vitrage_type)
+
+        if label is not None:
+            label_index = self._get_label_index(label)
+            if direction == Direction.OUT:
+                n_ids = label_index.target_ids(v_id)
+            else:
+                n_ids = label_index.source_ids(v_id)
+        elif v_id not in self._g:
+            return []
+        elif direction == Direction.OUT:
+            n_ids = self._g.successors(v_id)
+        else:
+            n_ids = self._g.predecessors(v_id)
+
+        if vitrage_type is None:
+            return list(n_ids)
+        nodes = self._g.node
+        return [n_id for n_id in n_ids
+                if nodes[n_id].get(VProps.VITRAGE_TYPE) == vitrage_type]
+
+    def containment_path(self, v_id):
+        containment = self._get_label_index(ELabel.CONTAINS)
+        path = [v_id]
+        visited = {v_id}
+        while True:
+            parent_ids = [p for p in containment.source_ids(path[-1])
+                          if p not in visited]
+            if not parent_ids:
+                return path
+            # prefer a parent whose edge is not deleted
+            parent_id = next(
+                (p for p in parent_ids
+                 if not self._g.adj[p][path[-1]][ELabel.CONTAINS].get(
+                     EProps.VITRAGE_IS_DELETED)),
+                parent_ids[0])
+            path.append(parent_id)
+            visited.add(parent_id)
 
     def neighbors(self, v_id, vertex_attr_filter=None, edge_attr_filter=None,
                   direction=Direction.BOTH):
@@ -250,7 +442,8 @@ class NXGraph(Graph):
         nodes, edges = self._neighboring_nodes_edges_query(
             v_id=v_id, vertex_predicate=check_vertex,
             edge_predicate=check_edge, direction=direction)
-        vertices = [vertex_copy(n, data) for n, data in nodes]
+        create_vertex = self._vertex_factory()
+        vertices = [create_vertex(n, data) for n, data in nodes]
         return vertices
 
     def _neighboring_nodes_edges_query(self, v_id,
@@ -283,15 +476,61 @@ class NXGraph(Graph):
         return nodes, edges_filtered2
 
     def json_output_graph(self, **kwargs):
-        node_link_data = json_graph.node_link_data(self._g)
-        node_link_data.update(kwargs)
+        return ''.join(self.iter_json_output_graph(**kwargs))
 
-        for index, node in enumerate(node_link_data['nodes']):
-            if VProps.ID in self._g.node[node[VProps.ID]]:
-                node[VProps.ID] = self._g.node[node[VProps.ID]][VProps.ID]
-                node[VProps.GRAPH_INDEX] = index
+    def iter_json_output_graph(self, **kwargs):
+        """Encode the graph in networkx node-link format, in chunks
 
-        return json.dumps(node_link_data)
+        See iter_node_link_json
+
+        :rtype: iterator of str
+        """
+        return iter_node_link_json(
+            self._g.nodes_iter(data=True),
+            self._g.edges_iter(keys=True, data=True),
+            **kwargs)
+
+    def json_output_tree(self, root_id):
+        return ''.join(self.iter_json_output_tree(root_id))
+
+    def iter_json_output_tree(self, root_id):
+        """Encode the graph in networkx tree format, in chunks
+
+        The nodes are encoded as in iter_json_output_graph, and the children
+        of each node are its out neighbors. The graph must be a tree.
+
+        :rtype: iterator of str
+        """
+        if not len(self._g):
+            yield '{}'
+            return
+        if self._g.number_of_nodes() != self._g.number_of_edges() + 1:
+            raise TypeError('The graph is not a tree')
+
+        encode = json.JSONEncoder().encode
+        nodes = self._g.node
+        graph_indexes = dict((n, index) for index, n in enumerate(self._g))
+
+        def iter_subtree(n, is_root=False):
+            node = dict(nodes[n])
+            if VProps.ID in node:
+                node[VProps.GRAPH_INDEX] = graph_indexes[n]
+            else:
+                node[VProps.ID] = n
+            children = self._g.successors(n)
+            if not children and not is_root:
+                yield encode(node)
+                return
+            yield encode(node)[:-1] + ', "children": ['
+            for index, child in enumerate(children):
+                if index:
+                    yield ', '
+                for chunk in iter_subtree(child):
+                    yield chunk
+            yield ']}'
+
+        for chunk in iter_subtree(root_id, is_root=True):
+            yield chunk
 
     def union(self, other_graph):
         """Union two graphs - add all vertices and edges of other graph
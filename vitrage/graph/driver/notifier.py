@@ -14,50 +14,147 @@
 
 import functools
 
+from vitrage.common.constants import VertexProperties as VProps
 from vitrage.graph.driver.elements import Vertex
 
 
-def _before_func(graph, item):
-    if not graph.is_subscribed():
+def _before_func(graph, item, is_vertex):
+    if not graph.is_subscribed(is_vertex):
         return
     return graph.get_item(item)
 
 
-def _after_func(graph, item, data_before=None):
-    if not graph.is_subscribed():
+def _after_func(graph, item, is_vertex, data_before=None):
+    if not graph.is_subscribed(is_vertex):
         return
     element = graph.get_item(item)
-    is_vertex = isinstance(element, Vertex) or isinstance(item, Vertex)
     graph.notifier.notify(data_before, element, is_vertex, graph)
 
 
+def _get_changes(before, current):
+    """The changed properties, as a dict of key to (old value, new value)
+
+    For a new element (before is None), all of its properties are changed.
+    """
+    before_props = before.properties if before is not None else {}
+    current_props = current.properties if current is not None else {}
+    changes = {}
+    for key in set(before_props) | set(current_props):
+        old_value = before_props.get(key)
+        new_value = current_props.get(key)
+        if old_value != new_value:
+            changes[key] = (old_value, new_value)
+    return changes
+
+
+class Subscription(object):
+    """A subscriber function, and the graph changes it is notified about
+
+    :param vertices: notify about the changes of vertices
+    :param edges: notify about the changes of edges
+    :param categories: notify only about the vertices of these categories,
+     either before or after the change. Does not apply to edges.
+    :param changed_keys: notify only about the changes of one of these
+     properties. New elements are always notified.
+    :param with_changes: pass the changed properties to the function, as a
+     'changes' keyword argument, see _get_changes
+    """
+
+    def __init__(self,
+                 function,
+                 vertices=True,
+                 edges=True,
+                 categories=None,
+                 changed_keys=None,
+                 with_changes=False):
+        self.function = function
+        self.vertices = vertices
+        self.edges = edges
+        self.categories = frozenset(categories) if categories else None
+        self.changed_keys = frozenset(changed_keys) if changed_keys else None
+        self.with_changes = with_changes
+
+    def is_notified(self, is_vertex):
+        return self.vertices if is_vertex else self.edges
+
+    @property
+    def needs_changes(self):
+        return self.with_changes or self.changed_keys is not None
+
+    def is_relevant(self, before, current, is_vertex, changes):
+        if is_vertex and self.categories is not None and \
+                not self._in_categories(before) and \
+                not self._in_categories(current):
+            return False
+        if self.changed_keys is not None and before is not None and \
+                self.changed_keys.isdisjoint(changes):
+            return False
+        return True
+
+    def _in_categories(self, vertex):
+        return vertex is not None and \
+            vertex.get(VProps.VITRAGE_CATEGORY) in self.categories
+
+
 class Notifier(object):
     def __init__(self):
         self._subscriptions = []
 
-    def subscribe(self, function):
-        self._subscriptions.append(function)
+    def subscribe(self, function, **filters):
+        """Subscribe the function to the graph changes
+
+        :param filters: see Subscription
+        """
+        self._subscriptions.append(Subscription(function, **filters))
+
+    def is_subscribed(self, is_vertex=None):
+        """Checks if there are subscribers
+
+        :param is_vertex: if not None, only count the subscribers of the
+         vertices changes (True) or of the edges changes (False)
+        """
+        if is_vertex is None:
+            return len(self._subscriptions) != 0
+        return any(s.is_notified(is_vertex) for s in self._subscriptions)
 
-    def is_subscribed(self):
-        return len(self._subscriptions) != 0
+    def notify(self, before, current, is_vertex, *args, **kwargs):
+        subscriptions = [s for s in self._subscriptions
+                         if s.is_notified(is_vertex)]
+        changes = None
+        if any(s.needs_changes for s in subscriptions):
+            changes = _get_changes(before, current)
 
-    def notify(self, *args, **kwargs):
-        for func in self._subscriptions:
-            func(*args, **kwargs)
+        for subscription in subscriptions:
+            if not subscription.is_relevant(before, current, is_vertex,
+                                            changes):
+                continue
+            if subscription.with_changes:
+                subscription.function(before, current, is_vertex, *args,
+                                      changes=changes, **kwargs)
+            else:
+                subscription.function(before, current, is_vertex, *args,
+                                      **kwargs)
 
     @staticmethod
     def update_notify(func):
         @functools.wraps(func)
         def notified_func(graph, item, *args, **kwargs):
-            data_before = _before_func(graph, item)
-            func(graph, item, *args, **kwargs)
-            _after_func(graph, item, data_before)
+            is_vertex = isinstance(item, Vertex)
+            data_before = _before_func(graph, item, is_vertex)
+            try:
+                func(graph, item, *args, **kwargs)
+                _after_func(graph, item, is_vertex, data_before)
+            finally:
+                graph._version += 1
         return notified_func
 
     @staticmethod
     def add_notify(func):
         @functools.wraps(func)
         def notified_func(graph, item, *args, **kwargs):
-            func(graph, item, *args, **kwargs)
-            _after_func(graph, item)
+            try:
+                func(graph, item, *args, **kwargs)
+                _after_func(graph, item, isinstance(item, Vertex))
+            finally:
+                graph._version += 1
         return notified_func
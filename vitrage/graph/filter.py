@@ -42,3 +42,21 @@ def check_filter(data, attr_filter, *args):
             else:
                 return False
     return True
+
+
+def get_filter_constraints(attr_filter):
+    """Get the accepted values of every key of attr_filter
+
+    Regex keys are skipped, as they can not be checked by value equality.
+
+    :param attr_filter: a dictionary as described in check_filter
+    :return: dict of key -> list of accepted values
+    """
+    if not attr_filter:
+        return {}
+    constraints = {}
+    for key, content in attr_filter.items():
+        if key.lower().endswith(Fields.REGEX):
+            continue
+        constraints[key] = content if isinstance(content, list) else [content]
+    return constraints
@@ -12,28 +12,39 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from collections import namedtuple
+import operator
+
 from oslo_log import log as logging
-import six
 
 from vitrage.common.exception import VitrageError
+from vitrage.common.utils import LRUCache
 
 LOG = logging.getLogger(__name__)
 
-operators = [
-    '<',
-    '<=',
+operators = {
+    '<': operator.lt,
+    '<=': operator.le,
     # '=',
-    '==',
-    '!=',
-    '>=',
-    '>',
-]
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>=': operator.ge,
+    '>': operator.gt,
+}
 
 logical_operations = [
     'and',
     'or'
 ]
 
+# A query_dict compiled into a predicate, with the equality constraints
+# that an item must satisfy in order to match (see get_equality_constraints)
+CompiledQuery = namedtuple('CompiledQuery', ['predicate', 'constraints'])
+
+PREDICATE_CACHE_SIZE = 256
+
+_compiled_queries = LRUCache(PREDICATE_CACHE_SIZE)
+
 
 def create_predicate(query_dict):
     """Create predicate from a logical and/or/==/>/etc expression
@@ -52,6 +63,7 @@ def create_predicate(query_dict):
 
     Example Output:
     --------------
+    A predicate equivalent to:
     lambda item: ((item['CATEGORY']== 'ALARM') and
                   ((item['TIME']> 150) or (item['VITRAGE_IS_DELETED']== True)))
 
@@ -64,58 +76,172 @@ def create_predicate(query_dict):
     :param query_dict:
     :return: a predicate "match(item)"
     """
+    return compile_query(query_dict).predicate
+
+
+def get_equality_constraints(query_dict):
+    """Find the property values that every matching item must have
+
+    Only '==' comparisons are taken into account. Under an 'and' the
+    accepted values of a key are intersected, under an 'or' a key is
+    constrained only if all the operands constrain it, and the accepted
+    values are united.
+
+    Example Input:
+    --------------
+    query_dict = {
+        'and': [
+            {'==': {'CATEGORY': 'ALARM'}},
+            {'or': [
+                {'==': {'TYPE': 'nova.host'}},
+                {'==': {'TYPE': 'nova.instance'}}
+            ]}
+        ]
+    }
+
+    Example Output:
+    --------------
+    {'CATEGORY': {'ALARM'}, 'TYPE': {'nova.host', 'nova.instance'}}
+
+    :param query_dict:
+    :return: dict of key -> frozenset of accepted values
+    """
+    return compile_query(query_dict).constraints
+
+
+def compile_query(query_dict):
+    """Compile a query_dict into a predicate and its equality constraints
+
+    The predicate is composed of closures, one per logical operation and
+    comparison. Compiled queries are kept in an LRU cache keyed on the
+    canonical form of the query_dict, so constant queries are compiled once.
+
+    :param query_dict:
+    :rtype: CompiledQuery
+    """
     try:
-        expression = _create_query_expression(query=query_dict)
-        LOG.debug('create_predicate::%s', expression)
-        expression = 'lambda item: ' + expression
-        return eval(expression)
+        cache_key = _freeze(query_dict)
+        hash(cache_key)
+    except TypeError:
+        return _compile_query(query_dict)
+
+    compiled_query = _compiled_queries.get(cache_key)
+    if compiled_query is None:
+        compiled_query = _compile_query(query_dict)
+        _compiled_queries.put(cache_key, compiled_query)
+    return compiled_query
+
+
+def _compile_query(query_dict):
+    try:
+        predicate = _create_query_predicate(query=query_dict)
     except Exception as e:
         LOG.error('invalid query format %s. Exception: %s',
                   query_dict, e)
         raise VitrageError('invalid query format %s. Exception: %s',
                            query_dict, e)
 
+    try:
+        constraints = _get_equality_constraints(query_dict)
+    except (TypeError, AttributeError, ValueError):
+        # unhashable values, no constraints can be used
+        constraints = {}
+
+    return CompiledQuery(predicate, constraints)
 
-def _create_query_expression(query, parent_operator=None):
-    expressions = []
+
+def _freeze(query):
+    """Canonical hashable form of a query_dict"""
+    if isinstance(query, dict):
+        return frozenset((k, _freeze(v)) for k, v in query.items())
+    if isinstance(query, (list, tuple)):
+        return tuple(_freeze(v) for v in query)
+    # keep the type, so that e.g. True and 1 are cached apart
+    return type(query), query
+
+
+def _get_equality_constraints(query):
+    (op, value) = query.copy().popitem()
+
+    if op == '==':
+        return {k: frozenset([v]) for k, v in value.items()}
+
+    if op == 'and':
+        constraints = {}
+        for operand in value:
+            for k, values in _get_equality_constraints(operand).items():
+                if k in constraints:
+                    constraints[k] = constraints[k] & values
+                else:
+                    constraints[k] = values
+        return constraints
+
+    if op == 'or' and value:
+        operands = [_get_equality_constraints(operand) for operand in value]
+        constraints = operands[0]
+        for operand in operands[1:]:
+            constraints = {k: v | operand[k]
+                           for k, v in constraints.items() if k in operand}
+        return constraints
+
+    return {}
+
+
+def _create_query_predicate(query, parent_operator=None):
+    predicates = []
 
     # First element or element under logical operation
     if not parent_operator and isinstance(query, dict):
         (key, value) = query.copy().popitem()
-        return _create_query_expression(value, key)
+        return _create_query_predicate(value, key)
 
     # Continue recursion on logical (and/or) operation
     elif parent_operator in logical_operations and isinstance(query, list):
         for val in query:
-            expressions.append(_create_query_expression(val))
-        return _join_logical_operator(parent_operator, expressions)
+            predicates.append(_create_query_predicate(val))
+        return _join_logical_operator(parent_operator, predicates)
 
     # Recursion evaluate leaf (stop condition)
     elif parent_operator in operators:
         for key, val in query.items():
-            expressions.append('item.get(' + _evaluable_str(key) + ')' +
-                               parent_operator + ' ' + _evaluable_str(val))
-        return _join_logical_operator('and', expressions)
+            predicates.append(
+                _comparison(operators[parent_operator], key, val))
+        return _join_logical_operator('and', predicates)
     else:
         raise VitrageError('invalid partial query format',
                            parent_operator, query)
 
 
-def _evaluable_str(value):
-    """wrap string/unicode with back tick"""
-    if isinstance(value, six.string_types):
-        return '\'' + value + '\''
-    else:
-        return str(value)
+def _comparison(op, key, value):
+    def predicate(item):
+        return op(item.get(key), value)
+    return predicate
 
 
-def _join_logical_operator(op, expressions):
-    """Create an expressions string
+def _join_logical_operator(op, predicates):
+    """Create a predicate of the logical operation over the predicates
 
     Example input:
-        op='AND'
-        expressions=['a == b', 'c < d']
-    Example output: (a == b AND c < d)
+        op='and'
+        predicates=[match_a, match_b]
+    Example output: a predicate of (match_a(item) and match_b(item))
     """
-    separator = ' ' + op + ' '
-    return '(' + separator.join(expressions) + ')'
+    if not predicates:
+        # like the empty tuple that an empty expression used to evaluate to
+        return lambda item: False
+    if len(predicates) == 1:
+        return predicates[0]
+
+    if op == 'and':
+        def predicate(item):
+            for p in predicates:
+                if not p(item):
+                    return False
+            return True
+    else:
+        def predicate(item):
+            for p in predicates:
+                if p(item):
+                    return True
+            return False
+    return predicate
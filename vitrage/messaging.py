@@ -63,6 +63,20 @@ def get_notification_listener(transport, targets, endpoints,
         allow_requeue=allow_requeue)
 
 
+def get_batch_notification_listener(transport, targets, endpoints,
+                                    batch_size, batch_timeout,
+                                    allow_requeue=False):
+    """Return a notification listener that gets the messages in batches
+
+    The endpoints get lists of up to batch_size messages, after at most
+    batch_timeout seconds.
+    """
+    return oslo_msg.get_batch_notification_listener(
+        transport, targets, endpoints, executor='blocking',
+        allow_requeue=allow_requeue, batch_size=batch_size,
+        batch_timeout=batch_timeout)
+
+
 class VitrageNotifier(object):
     """Allows writing to message bus"""
     def __init__(self, conf, publisher_id, topic):
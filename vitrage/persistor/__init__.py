@@ -22,4 +22,21 @@ OPTS = [
     cfg.BoolOpt('persist_events',
                 default=False,
                 help='Whether or not persistor is persisting the events'),
+    cfg.IntOpt('batch_size',
+               default=500,
+               min=1,
+               help='Maximal number of events that are written to the '
+                    'database together'),
+    cfg.IntOpt('batch_timeout',
+               default=1,
+               min=1,
+               help='Maximal time (in seconds) an event waits for its batch '
+                    'before it is written to the database'),
+    cfg.IntOpt('stats_interval',
+               default=60,
+               min=0,
+               help='Interval (in seconds) between logs of the number of '
+                    'persisted events, the write latency, and the time the '
+                    'events waited to be persisted. If 0, they are logged '
+                    'only when the persistor stops.'),
     ]
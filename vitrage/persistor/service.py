@@ -14,15 +14,22 @@
 
 from __future__ import print_function
 
-import dateutil.parser
+import time
+
+from dateutil import parser
+from dateutil import tz
 import oslo_messaging as oslo_m
 
 from oslo_log import log
 from oslo_service import service as os_service
+import tenacity
+
 from vitrage.common.constants import DatasourceProperties as DSProps
 from vitrage.common.constants import GraphAction
 from vitrage import messaging
 from vitrage.storage.sqlalchemy import models
+from vitrage.utils.datetime import parse_timestamp
+from vitrage.utils.datetime import utcnow
 
 
 LOG = log.getLogger(__name__)
@@ -36,15 +43,21 @@ class PersistorService(os_service.Service):
         transport = messaging.get_transport(conf)
         target = \
             oslo_m.Target(topic=conf.persistor.persistor_topic)
-        self.listener = messaging.get_notification_listener(
-            transport, [target],
-            [VitragePersistorEndpoint(self.db_connection)])
+        self.endpoint = VitragePersistorEndpoint(conf, self.db_connection)
+        self.listener = messaging.get_batch_notification_listener(
+            transport, [target], [self.endpoint],
+            conf.persistor.batch_size, conf.persistor.batch_timeout)
 
     def start(self):
         LOG.info("Vitrage Persistor Service - Starting...")
 
         super(PersistorService, self).start()
         self.listener.start()
+        stats_interval = self.conf.persistor.stats_interval
+        if stats_interval:
+            self.tg.add_timer(stats_interval,
+                              self.endpoint.log_stats,
+                              initial_delay=stats_interval)
 
         LOG.info("Vitrage Persistor Service - Started!")
 
@@ -54,24 +67,121 @@ class PersistorService(os_service.Service):
         self.listener.stop()
         self.listener.wait()
         super(PersistorService, self).stop(graceful)
+        self.endpoint.log_stats()
 
-        LOG.info("Vitrage Persistor Service - Stopped!")
+        LOG.info("Vitrage Persistor Service - Stopped! Persisted %d events "
+                 "in %d batches, dropped %d events",
+                 self.endpoint.persisted_count, self.endpoint.batch_count,
+                 self.endpoint.dropped_count)
 
 
 class VitragePersistorEndpoint(object):
-    def __init__(self, db_connection):
-        self.db_connection = db_connection
+    """Persist the events of a batch notification listener
+
+    Every batch of events is written in a single transaction, which is
+    retried as configured for the database. Events that cannot be converted
+    or written are logged and dropped.
+    For monitoring, the endpoint keeps, since the last log_stats:
+    - write latency: the maximal duration of a batch write
+    - queue delay: the maximal time a message waited since it was sent,
+      which grows when the persistor falls behind the messages
+    - sample lag: the maximal time since the sample date of a written event,
+      which includes the time the datasource took to send it
+    """
 
-    def info(self, ctxt, publisher_id, event_type, payload, metadata):
-        LOG.debug('Vitrage Event Info: payload %s', payload)
-        self.process_event(payload)
+    def __init__(self, conf, db_connection):
+        self.db_connection = db_connection
+        self.persisted_count = 0
+        self.batch_count = 0
+        self.dropped_count = 0
+        self.max_write_latency = 0
+        self.max_queue_delay = 0
+        self.max_sample_lag = 0
+        self._logged_counts = (0, 0, 0)
+        retries = conf.database.max_retries
+        self._bulk_create = tenacity.retry(
+            wait=tenacity.wait_fixed(conf.database.retry_interval),
+            stop=tenacity.stop_after_attempt(retries if retries >= 0 else 5),
+            reraise=True)(db_connection.events.bulk_create)
+
+    def info(self, messages):
+        LOG.debug('Vitrage Event Info: %d messages', len(messages))
+        if messages:
+            # the first message of the batch is the oldest
+            self.max_queue_delay = max(self.max_queue_delay,
+                                       self._queue_delay(messages[0]))
+        self.process_events([message['payload'] for message in messages])
+
+    def process_events(self, events):
+        """:param events: the payloads of the messages"""
+        event_rows = []
+        for data in events:
+            if data.get(DSProps.EVENT_TYPE) == GraphAction.END_MESSAGE:
+                continue
+            try:
+                event_rows.append(self._to_event_row(data))
+            except Exception as e:
+                LOG.error('Dropping an event with an invalid %s: %s %s',
+                          DSProps.SAMPLE_DATE, str(data), e)
+                self.dropped_count += 1
+        if not event_rows:
+            return
 
-    def process_event(self, data):
-        """:param data: Serialized to a JSON formatted ``str`` """
-        if data.get(DSProps.EVENT_TYPE) == GraphAction.END_MESSAGE:
+        start_time = time.time()
+        try:
+            self._bulk_create(event_rows)
+        except Exception as e:
+            LOG.exception('Failed to persist %d events, dropping them: %s',
+                          len(event_rows), e)
+            self.dropped_count += len(event_rows)
             return
-        collector_timestamp = \
-            dateutil.parser.parse(data.get(DSProps.SAMPLE_DATE))
-        event_row = models.Event(payload=data,
-                                 collector_timestamp=collector_timestamp)
-        self.db_connection.events.create(event_row)
+        write_latency = time.time() - start_time
+        self.max_write_latency = max(self.max_write_latency, write_latency)
+        self.max_sample_lag = max(
+            [self.max_sample_lag] +
+            [self._seconds_since(event_row.collector_timestamp)
+             for event_row in event_rows])
+        self.persisted_count += len(event_rows)
+        self.batch_count += 1
+        LOG.debug('Persisted %d events, write latency %.3f seconds',
+                  len(event_rows), write_latency)
+
+    def log_stats(self):
+        """Log the events handled since the last call, and their delays"""
+        counts = (self.persisted_count, self.batch_count, self.dropped_count)
+        persisted, batches, dropped = \
+            [count - logged for count, logged
+             in zip(counts, self._logged_counts)]
+        LOG.info('Persisted %d events in %d batches, dropped %d events, '
+                 'maximal write latency %.3f seconds, maximal queue delay '
+                 '%.3f seconds, maximal sample lag %.3f seconds',
+                 persisted, batches, dropped, self.max_write_latency,
+                 self.max_queue_delay, self.max_sample_lag)
+        self._logged_counts = counts
+        self.max_write_latency = 0
+        self.max_queue_delay = 0
+        self.max_sample_lag = 0
+
+    @staticmethod
+    def _to_event_row(data):
+        collector_timestamp = parse_timestamp(data.get(DSProps.SAMPLE_DATE))
+        return models.Event(payload=data,
+                            collector_timestamp=collector_timestamp)
+
+    @classmethod
+    def _queue_delay(cls, message):
+        """Seconds since the message was sent, or 0 if unknown"""
+        sent_time = message.get('metadata', {}).get('timestamp')
+        if not sent_time:
+            return 0
+        try:
+            # not cached like the sample dates, as every message has its own
+            return cls._seconds_since(parser.parse(str(sent_time)))
+        except (TypeError, ValueError, OverflowError):
+            return 0
+
+    @staticmethod
+    def _seconds_since(timestamp):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=tz.tzutc())
+        return (utcnow() - timestamp).total_seconds()
@@ -91,6 +91,36 @@ class ActiveActionsConnection(object):
         """Delete all active actions that match the filters."""
         raise NotImplementedError('delete active actions not implemented')
 
+    @abc.abstractmethod
+    def update_similar(self,
+                       update_func,
+                       action_type=None,
+                       extra_info=None,
+                       source_vertex_id=None,
+                       target_vertex_id=None):
+        """Read and update the matching actions in a single transaction.
+
+        The matching actions are locked until the transaction ends, and
+        passed to update_func as an OrderedDict of (action_id, trigger) ->
+        ActiveAction, in the order of creation. The actions that update_func
+        removes from it or adds to it are deleted or created.
+
+        :return: the return value of update_func
+        """
+        raise NotImplementedError('update similar active actions not '
+                                  'implemented')
+
+    @abc.abstractmethod
+    def bulk_update(self, deleted, created):
+        """Delete and create active actions in a single transaction.
+
+        :param deleted: the (action_id, trigger) of the actions to delete
+        :param created: the actions to create, after the deletion
+        :type created: list of vitrage.storage.sqlalchemy.models.ActiveAction
+        """
+        raise NotImplementedError('bulk update active actions not '
+                                  'implemented')
+
 
 @six.add_metaclass(abc.ABCMeta)
 class EventsConnection(object):
@@ -101,6 +131,13 @@ class EventsConnection(object):
         """
         raise NotImplementedError('create event not implemented')
 
+    def bulk_create(self, events):
+        """Create new events in a single transaction.
+
+        :type events: list of vitrage.storage.sqlalchemy.models.Event
+        """
+        raise NotImplementedError('bulk create events not implemented')
+
     def update(self, event):
         """Update an existing event.
 
@@ -120,11 +157,31 @@ class EventsConnection(object):
         """
         raise NotImplementedError('query events not implemented')
 
+    def query_chunks(self,
+                     gt_collector_timestamp=None,
+                     lt_collector_timestamp=None,
+                     chunk_size=None):
+        """Yields the events that match filters, in chunks.
+
+        The events are ordered by collector_timestamp, and only one chunk
+        at a time is read from the database.
+
+        :rtype: generator of lists of vitrage.storage.sqlalchemy.models.Event
+        """
+        raise NotImplementedError('query events chunks not implemented')
+
     def delete(self,
                event_id=None,
                collector_timestamp=None,
                payload=None,
                gt_collector_timestamp=None,
-               lt_collector_timestamp=None):
-        """Delete all events that match the filters."""
+               lt_collector_timestamp=None,
+               chunk_size=None):
+        """Delete all events that match the filters.
+
+        The oldest events are deleted first, chunk_size events in each
+        transaction.
+
+        :return: the number of deleted events
+        """
         raise NotImplementedError('delete events not implemented')
@@ -15,9 +15,14 @@
 
 from __future__ import absolute_import
 
+from collections import OrderedDict
+
+from oslo_db import api as oslo_db_api
 from oslo_db.sqlalchemy import session as db_session
 from oslo_log import log
+from sqlalchemy import and_
 from sqlalchemy.engine import url as sqlalchemy_url
+from sqlalchemy import or_
 
 from vitrage import storage
 from vitrage.storage import base
@@ -25,6 +30,11 @@ from vitrage.storage.sqlalchemy import models
 
 LOG = log.getLogger(__name__)
 
+# Maximal number of actions that are deleted by a single statement
+DELETE_CHUNK_SIZE = 100
+# Number of events that are read or deleted together
+EVENTS_CHUNK_SIZE = 1000
+
 
 class Connection(base.Connection):
     def __init__(self, conf, url):
@@ -141,6 +151,51 @@ class ActiveActionsConnection(base.ActiveActionsConnection, BaseTableConn):
             trigger=trigger)
         return query.delete()
 
+    @oslo_db_api.wrap_db_retry(max_retries=5, retry_on_deadlock=True)
+    def update_similar(self,
+                       update_func,
+                       action_type=None,
+                       extra_info=None,
+                       source_vertex_id=None,
+                       target_vertex_id=None):
+        session = self._engine_facade.get_session()
+        with session.begin():
+            query = session.query(models.ActiveAction).filter_by(
+                action_type=action_type,
+                extra_info=extra_info,
+                source_vertex_id=source_vertex_id,
+                target_vertex_id=target_vertex_id)
+            db_actions = query.order_by(models.ActiveAction.created_at)\
+                .with_for_update().all()
+            active_actions = OrderedDict(
+                ((db_action.action_id, db_action.trigger), db_action)
+                for db_action in db_actions)
+            old_keys = set(active_actions)
+
+            result = update_func(active_actions)
+
+            for db_action in db_actions:
+                if (db_action.action_id, db_action.trigger) \
+                        not in active_actions:
+                    session.delete(db_action)
+            session.add_all(db_action
+                            for key, db_action in active_actions.items()
+                            if key not in old_keys)
+        return result
+
+    def bulk_update(self, deleted, created):
+        deleted = list(deleted)
+        session = self._engine_facade.get_session()
+        with session.begin():
+            for i in range(0, len(deleted), DELETE_CHUNK_SIZE):
+                keys = deleted[i:i + DELETE_CHUNK_SIZE]
+                session.query(models.ActiveAction).filter(or_(*[
+                    and_(models.ActiveAction.action_id == action_id,
+                         models.ActiveAction.trigger == trigger)
+                    for action_id, trigger in keys
+                ])).delete(synchronize_session=False)
+            session.add_all(created)
+
 
 class EventsConnection(base.EventsConnection, BaseTableConn):
     def __init__(self, engine_facade):
@@ -151,6 +206,11 @@ class EventsConnection(base.EventsConnection, BaseTableConn):
         with session.begin():
             session.add(event)
 
+    def bulk_create(self, events):
+        session = self._engine_facade.get_session()
+        with session.begin():
+            session.bulk_save_objects(events)
+
     def update(self, event):
         session = self._engine_facade.get_session()
         with session.begin():
@@ -174,6 +234,36 @@ class EventsConnection(base.EventsConnection, BaseTableConn):
 
         return query.all()
 
+    def query_chunks(self,
+                     gt_collector_timestamp=None,
+                     lt_collector_timestamp=None,
+                     chunk_size=None):
+        chunk_size = chunk_size or EVENTS_CHUNK_SIZE
+        last_event = None
+        while True:
+            session = self._engine_facade.get_session()
+            query = self._update_query_gt_lt(gt_collector_timestamp,
+                                             lt_collector_timestamp,
+                                             session.query(models.Event))
+            if last_event:
+                # the next chunk starts after the last event, so no offset
+                # has to be scanned
+                query = query.filter(or_(
+                    models.Event.collector_timestamp >
+                    last_event.collector_timestamp,
+                    and_(models.Event.collector_timestamp ==
+                         last_event.collector_timestamp,
+                         models.Event.event_id > last_event.event_id)))
+            events = query.order_by(models.Event.collector_timestamp,
+                                    models.Event.event_id)\
+                .limit(chunk_size).all()
+            session.close()
+            if events:
+                yield events
+            if len(events) < chunk_size:
+                return
+            last_event = events[-1]
+
     @staticmethod
     def _update_query_gt_lt(gt_collector_timestamp,
                             lt_collector_timestamp,
@@ -191,7 +281,9 @@ class EventsConnection(base.EventsConnection, BaseTableConn):
                collector_timestamp=None,
                payload=None,
                gt_collector_timestamp=None,
-               lt_collector_timestamp=None):
+               lt_collector_timestamp=None,
+               chunk_size=None):
+        chunk_size = chunk_size or EVENTS_CHUNK_SIZE
         query = self.query_filter(
             models.Event,
             event_id=event_id,
@@ -201,5 +293,19 @@ class EventsConnection(base.EventsConnection, BaseTableConn):
         query = self._update_query_gt_lt(gt_collector_timestamp,
                                          lt_collector_timestamp,
                                          query)
-
-        query.delete()
+        query = query.with_entities(models.Event.event_id)\
+            .order_by(models.Event.collector_timestamp, models.Event.event_id)\
+            .limit(chunk_size)
+
+        deleted = 0
+        while True:
+            event_ids = [row.event_id for row in query.all()]
+            if event_ids:
+                session = self._engine_facade.get_session()
+                with session.begin():
+                    session.query(models.Event)\
+                        .filter(models.Event.event_id.in_(event_ids))\
+                        .delete(synchronize_session=False)
+                deleted += len(event_ids)
+            if len(event_ids) < chunk_size:
+                return deleted
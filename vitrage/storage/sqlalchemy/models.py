@@ -67,10 +67,16 @@ MagicJSON = types.JSON().with_variant(StringyJSON, 'sqlite')
 class Event(Base):
 
     __tablename__ = 'events'
+    __table_args__ = (
+        # Index 'ix_event' on fields:
+        # collector_timestamp, id
+        # for range scans in the order of the collector timestamps
+        Index('ix_event', 'collector_timestamp', 'id'),
+    )
 
     event_id = Column("id", INTEGER, primary_key=True, nullable=False,
                       autoincrement=True)
-    collector_timestamp = Column(DateTime, index=True, nullable=False)
+    collector_timestamp = Column(DateTime, nullable=False)
     payload = Column(MagicJSON, nullable=False)
 
     def __repr__(self):
@@ -15,6 +15,9 @@
 import json
 
 from vitrage.api_handler.apis.alarm import AlarmApis
+from vitrage.api_handler.apis.base import ALARMS_ALL_QUERY
+from vitrage.api_handler.apis.base import EntityGraphApisBase
+from vitrage.api_handler.apis.base import TREE_TOPOLOGY_QUERY
 from vitrage.api_handler.apis.rca import RcaApis
 from vitrage.api_handler.apis.resource import ResourceApis
 from vitrage.api_handler.apis.topology import TopologyApis
@@ -24,6 +27,7 @@ from vitrage.common.constants import VertexProperties as VProps
 from vitrage.datasources import NOVA_HOST_DATASOURCE
 from vitrage.datasources import NOVA_INSTANCE_DATASOURCE
 from vitrage.datasources import NOVA_ZONE_DATASOURCE
+from vitrage.datasources import OPENSTACK_CLUSTER
 from vitrage.datasources.transformer_base \
     import create_cluster_placeholder_vertex
 from vitrage.entity_graph.mappings.operational_alarm_severity import \
@@ -32,6 +36,12 @@ from vitrage.graph.driver.networkx_graph import NXGraph
 import vitrage.graph.utils as graph_utils
 from vitrage.tests.unit.entity_graph.base import TestEntityGraphUnitBase
 
+ALARM_QUERY = {
+    VProps.VITRAGE_CATEGORY: EntityCategory.ALARM,
+    VProps.VITRAGE_IS_DELETED: False,
+    VProps.VITRAGE_IS_PLACEHOLDER: False
+}
+
 
 class TestApis(TestEntityGraphUnitBase):
 
@@ -111,6 +121,113 @@ class TestApis(TestEntityGraphUnitBase):
         self.assertEqual(0, counts['OK'])
         self.assertEqual(0, counts['N/A'])
 
+    def test_get_alarms_after_graph_changes(self):
+        # Setup
+        graph = NXGraph('Multi tenancy graph')
+        apis = AlarmApis(graph, None)
+        ctx = {'tenant': 'project_1', 'is_admin': True}
+
+        # Action
+        self._create_graph(graph)
+        alarms = apis.get_alarms(ctx, vitrage_id='all', all_tenants=False)
+        alarms = json.loads(alarms)['alarms']
+
+        # Test assertions
+        self.assertEqual({'alarm_on_host', 'alarm_on_instance_1',
+                          'alarm_on_instance_2'},
+                         set(alarm[VProps.VITRAGE_ID] for alarm in alarms))
+
+        # Action
+        alarm = graph.get_vertex('alarm_on_instance_2')
+        alarm[VProps.VITRAGE_IS_DELETED] = True
+        graph.update_vertex(alarm)
+        instance = graph.get_vertex('instance_3')
+        instance[VProps.PROJECT_ID] = 'project_1'
+        graph.update_vertex(instance)
+        alarms = apis.get_alarms(ctx, vitrage_id='all', all_tenants=False)
+        alarms = json.loads(alarms)['alarms']
+
+        # Test assertions
+        self.assertEqual({'alarm_on_host', 'alarm_on_instance_1',
+                          'alarm_on_instance_3'},
+                         set(alarm[VProps.VITRAGE_ID] for alarm in alarms))
+
+    def test_get_alarm_counts_match_recount(self):
+        # Setup
+        graph = NXGraph('Multi tenancy graph')
+        apis = AlarmApis(graph, None)
+        self._create_graph(graph)
+        self._check_alarm_counts(apis, graph)
+
+        # Action - the severity of an alarm changes
+        alarm = graph.get_vertex('alarm_on_instance_1')
+        alarm[VProps.VITRAGE_OPERATIONAL_SEVERITY] = \
+            OperationalAlarmSeverity.WARNING
+        graph.update_vertex(alarm)
+        self._check_alarm_counts(apis, graph)
+
+        # Action - a resource moves to another project
+        instance = graph.get_vertex('instance_2')
+        instance[VProps.PROJECT_ID] = 'project_2'
+        graph.update_vertex(instance)
+        self._check_alarm_counts(apis, graph)
+
+        # Action - a new alarm is raised on a resource
+        new_alarm = self._create_alarm(
+            'alarm_on_instance_2b', 'deduced_alarm',
+            metadata={VProps.VITRAGE_OPERATIONAL_SEVERITY:
+                      OperationalAlarmSeverity.CRITICAL})
+        graph.add_vertex(new_alarm)
+        graph.add_edge(graph_utils.create_edge(
+            'alarm_on_instance_2b', 'instance_2', EdgeLabel.ON))
+        self._check_alarm_counts(apis, graph)
+
+        # Action - a resource and an alarm are deleted
+        instance = graph.get_vertex('instance_3')
+        instance[VProps.VITRAGE_IS_DELETED] = True
+        graph.update_vertex(instance)
+        alarm = graph.get_vertex('alarm_on_host')
+        alarm[VProps.VITRAGE_IS_DELETED] = True
+        graph.update_vertex(alarm)
+        self._check_alarm_counts(apis, graph)
+
+        # Action - an alarm becomes a placeholder
+        alarm = graph.get_vertex('alarm_on_instance_1')
+        alarm[VProps.VITRAGE_IS_PLACEHOLDER] = True
+        graph.update_vertex(alarm)
+        self._check_alarm_counts(apis, graph)
+
+    def test_get_alarms_response_is_cached(self):
+        # Setup
+        graph = self._create_graph()
+        apis = AlarmApis(graph, None)
+        ctx = {'tenant': 'project_1', 'is_admin': True}
+
+        # Action
+        response = apis.get_alarms(ctx, vitrage_id='all', all_tenants=False)
+        cached_response = apis.get_alarms(ctx, vitrage_id='all',
+                                          all_tenants=False)
+        other_project_response = apis.get_alarms(
+            {'tenant': 'project_2', 'is_admin': True},
+            vitrage_id='all', all_tenants=False)
+
+        # Test assertions
+        self.assertIs(response, cached_response)
+        self.assertNotEqual(response, other_project_response)
+        self.assertEqual(1, apis.response_cache.hits)
+        self.assertEqual(2, apis.response_cache.misses)
+
+        # Action
+        alarm = graph.get_vertex('alarm_on_instance_1')
+        alarm[VProps.VITRAGE_IS_DELETED] = True
+        graph.update_vertex(alarm)
+        alarms = apis.get_alarms(ctx, vitrage_id='all', all_tenants=False)
+        alarms = json.loads(alarms)['alarms']
+
+        # Test assertions
+        self.assertEqual(2, len(alarms))
+        self.assertEqual(3, apis.response_cache.misses)
+
     def test_get_rca_with_admin_project(self):
         # Setup
         graph = self._create_graph()
@@ -169,6 +286,34 @@ class TestApis(TestEntityGraphUnitBase):
         self.assertEqual(5, len(graph_rca['nodes']))
         self._check_projects_entities(graph_rca['nodes'], None, True)
 
+    def test_get_rca_of_causing_chain(self):
+        # Setup
+        graph = self._create_graph()
+        graph.add_vertex(self._create_alarm('alarm_on_zone', 'zone_alarm'))
+        graph.add_edge(graph_utils.create_edge(
+            'alarm_on_zone', 'alarm_on_host', EdgeLabel.CAUSES))
+        graph.add_edge(graph_utils.create_edge(
+            'alarm_on_instance_1', 'alarm_on_zone', EdgeLabel.CAUSES,
+            vitrage_is_deleted=True))
+        apis = RcaApis(graph, None)
+        ctx = {'tenant': 'project_1', 'is_admin': False}
+
+        # Action
+        graph_rca = apis.get_rca(ctx,
+                                 root='alarm_on_instance_1',
+                                 all_tenants=True)
+        graph_rca = json.loads(graph_rca)
+
+        # Test assertions
+        nodes = [node[VProps.VITRAGE_ID] for node in graph_rca['nodes']]
+        self.assertEqual(['alarm_on_instance_1', 'alarm_on_host',
+                          'alarm_on_zone'], nodes)
+        self.assertEqual(0, graph_rca['inspected_index'])
+        links = set((nodes[link['source']], nodes[link['target']])
+                    for link in graph_rca['links'])
+        self.assertEqual({('alarm_on_zone', 'alarm_on_host'),
+                          ('alarm_on_host', 'alarm_on_instance_1')}, links)
+
     def test_get_topology_with_admin_project(self):
         # Setup
         graph = self._create_graph()
@@ -232,6 +377,31 @@ class TestApis(TestEntityGraphUnitBase):
         # Test assertions
         self.assertEqual(12, len(graph_topology['nodes']))
 
+    def test_get_topology_tree(self):
+        # Setup
+        graph = self._create_graph()
+        apis = TopologyApis(graph, None)
+        ctx = {'tenant': 'project_1', 'is_admin': False}
+
+        # Action
+        tree = apis.get_topology(
+            ctx,
+            graph_type='tree',
+            depth=None,
+            query=TREE_TOPOLOGY_QUERY,
+            root=None,
+            all_tenants=True)
+        tree = json.loads(tree)
+
+        # Test assertions
+        self.assertEqual(OPENSTACK_CLUSTER, tree[VProps.VITRAGE_TYPE])
+        zone = self._get_first(tree['children'])
+        self.assertEqual('zone_1', zone[VProps.ID])
+        host = self._get_first(zone['children'])
+        self.assertEqual('host_1', host[VProps.ID])
+        self.assertEqual(4, len(host['children']))
+        self.assertNotIn('children', host['children'][0])
+
     def test_resource_list_with_admin_project(self):
         # Setup
         graph = self._create_graph()
@@ -399,6 +569,74 @@ class TestApis(TestEntityGraphUnitBase):
                                         NOVA_INSTANCE_DATASOURCE,
                                         project_id='project_1')
 
+    def _check_alarm_counts(self, apis, graph):
+        for ctx in ({'tenant': 'project_1', 'is_admin': True},
+                    {'tenant': 'project_1', 'is_admin': False},
+                    {'tenant': 'project_2', 'is_admin': True},
+                    {'tenant': 'project_2', 'is_admin': False},
+                    {'tenant': 'project_3', 'is_admin': True}):
+            counts = json.loads(apis.get_alarm_counts(ctx, False))
+            expected = self._recount_alarms(graph, ctx['tenant'],
+                                            ctx['is_admin'])
+            self.assertEqual(expected, counts, ctx)
+
+        counts = json.loads(apis.get_alarm_counts({}, True))
+        self.assertEqual(self._recount_alarms(graph), counts)
+
+    @staticmethod
+    def _recount_alarms(graph, project_id=None, is_admin_project=None):
+        """Count the alarms by full scans of the graph
+
+        The alarms are found the way the apis found them before they used
+        the ProjectView.
+        """
+        if is_admin_project is None:
+            alarms = graph.get_vertices(query_dict=ALARMS_ALL_QUERY)
+        else:
+            alarm_query = EntityGraphApisBase._get_query_with_project(
+                EntityCategory.ALARM, project_id, is_admin_project)
+            alarms = [alarm for alarm in
+                      graph.get_vertices(query_dict=alarm_query)
+                      if not TestApis._is_of_other_project(graph, alarm,
+                                                           project_id)]
+            resource_query = EntityGraphApisBase._get_query_with_project(
+                EntityCategory.RESOURCE, project_id, is_admin_project)
+            for resource in graph.get_vertices(query_dict=resource_query):
+                alarms += graph.neighbors(resource.vertex_id,
+                                          vertex_attr_filter=ALARM_QUERY)
+            alarms = set(alarms)
+
+        counts = dict((severity, 0) for severity in (
+            OperationalAlarmSeverity.SEVERE,
+            OperationalAlarmSeverity.CRITICAL,
+            OperationalAlarmSeverity.WARNING,
+            OperationalAlarmSeverity.OK,
+            OperationalAlarmSeverity.NA))
+        for alarm in alarms:
+            severity = alarm.get(VProps.VITRAGE_OPERATIONAL_SEVERITY)
+            if severity:
+                counts[severity] += 1
+        return counts
+
+    @staticmethod
+    def _is_of_other_project(graph, alarm, project_id):
+        alarm_project_id = alarm.get(VProps.PROJECT_ID, None)
+        if alarm_project_id:
+            return alarm_project_id != project_id
+        resources = graph.neighbors(
+            alarm.vertex_id,
+            vertex_attr_filter={
+                VProps.VITRAGE_CATEGORY: EntityCategory.RESOURCE})
+        if resources:
+            resource_project_id = resources[0].get(VProps.PROJECT_ID, None)
+            return bool(resource_project_id) and \
+                resource_project_id != project_id
+        return False
+
+    def _get_first(self, lst):
+        self.assertEqual(1, len(lst))
+        return lst[0]
+
     def _check_projects_entities(self,
                                  alarms,
                                  project_id,
@@ -428,8 +666,9 @@ class TestApis(TestEntityGraphUnitBase):
         if project_id:
             self.assertEqual(resource[VProps.PROJECT_ID], project_id)
 
-    def _create_graph(self):
-        graph = NXGraph('Multi tenancy graph')
+    def _create_graph(self, graph=None):
+        if graph is None:
+            graph = NXGraph('Multi tenancy graph')
 
         # create vertices
         cluster_vertex = create_cluster_placeholder_vertex()
@@ -66,6 +66,9 @@ class TestConsistencyFunctional(TestFunctionalBase):
         cfg.StrOpt('notifier_topic',
                    default='vitrage.evaluator',
                    ),
+        cfg.FloatOpt('active_actions_write_interval',
+                     default=0,
+                     ),
     ]
 
     # noinspection PyAttributeOutsideInit,PyPep8Naming
@@ -14,6 +14,10 @@
 from oslo_log import log
 LOG = log.getLogger(__name__)
 
+import os
+import shutil
+import tempfile
+
 from oslo_db.options import database_opts
 from six.moves import queue
 
@@ -37,10 +41,16 @@ from vitrage.datasources.nova.instance import NOVA_INSTANCE_DATASOURCE
 from vitrage.datasources.nova.zone import NOVA_ZONE_DATASOURCE
 from vitrage.entity_graph.mappings.operational_resource_state import \
     OperationalResourceState
+from vitrage.evaluator.actions.base import ActionMode
+from vitrage.evaluator.actions.base import ActionType
 from vitrage.evaluator.actions.evaluator_event_transformer \
     import VITRAGE_DATASOURCE
+from vitrage.evaluator.scenario_evaluator import ActionInfo
+from vitrage.evaluator.scenario_evaluator import ActiveActionsTracker
 from vitrage.evaluator.scenario_evaluator import ScenarioEvaluator
 from vitrage.evaluator.scenario_repository import ScenarioRepository
+from vitrage.evaluator.template_data import ActionSpecs
+from vitrage.evaluator.template_fields import TemplateFields as TFields
 from vitrage.graph import create_edge
 from vitrage import storage
 from vitrage.storage.sqlalchemy import models
@@ -71,6 +81,9 @@ class TestScenarioEvaluator(TestFunctionalBase):
         cfg.StrOpt('notifier_topic',
                    default='vitrage.evaluator',
                    ),
+        cfg.FloatOpt('active_actions_write_interval',
+                     default=0,
+                     ),
     ]
 
     # noinspection PyPep8Naming
@@ -82,7 +95,9 @@ class TestScenarioEvaluator(TestFunctionalBase):
         cls.conf.register_opts(cls.EVALUATOR_OPTS, group='evaluator')
         cls.conf.register_opts(cls.DATASOURCES_OPTS, group='datasources')
         cls.conf.register_opts(database_opts, group='database')
-        cls.conf.set_override('connection', 'sqlite:///test.db',
+        cls.db_dir = tempfile.mkdtemp()
+        cls.conf.set_override('connection', 'sqlite:///' +
+                              os.path.join(cls.db_dir, 'test.db'),
                               group='database')
         cls._db = storage.get_connection_from_config(cls.conf)
         engine = cls._db._engine_facade.get_engine()
@@ -91,6 +106,12 @@ class TestScenarioEvaluator(TestFunctionalBase):
         TestScenarioEvaluator.load_datasources(cls.conf)
         cls.scenario_repository = ScenarioRepository(cls.conf)
 
+    @classmethod
+    def tearDownClass(cls):
+        cls._db.disconnect()
+        shutil.rmtree(cls.db_dir, ignore_errors=True)
+        super(TestScenarioEvaluator, cls).tearDownClass()
+
     def test_deduced_state(self):
 
         event_queue, processor, evaluator = self._init_system()
@@ -122,6 +143,78 @@ class TestScenarioEvaluator(TestFunctionalBase):
         self.assertEqual('AVAILABLE', host_v[VProps.VITRAGE_AGGREGATED_STATE],
                          'host should be AVAILABLE when alarm disabled')
 
+    def test_active_actions_are_written_in_batches(self):
+        self.conf.set_override('active_actions_write_interval', 60,
+                               'evaluator')
+        self.addCleanup(self.conf.clear_override,
+                        'active_actions_write_interval', 'evaluator')
+        event_queue, processor, evaluator = self._init_system()
+
+        host_v = self._get_entity_from_graph(NOVA_HOST_DATASOURCE,
+                                             _TARGET_HOST,
+                                             _TARGET_HOST,
+                                             processor.entity_graph)
+
+        def query_active_actions():
+            return self._db.active_actions.query(
+                target_vertex_id=host_v.vertex_id)
+
+        # generate nagios alarm to trigger template scenario
+        test_vals = {NagiosProperties.STATUS: NagiosTestStatus.WARNING,
+                     NagiosProperties.SERVICE: 'cause_suboptimal_state'}
+        test_vals.update(_NAGIOS_TEST_INFO)
+        generator = mock_driver.simple_nagios_alarm_generators(1, 1, test_vals)
+        warning_test = mock_driver.generate_random_events_list(generator)[0]
+
+        host_v = self.get_host_after_event(event_queue, warning_test,
+                                           processor, _TARGET_HOST)
+        self.assertEqual(OperationalResourceState.SUBOPTIMAL,
+                         host_v[VProps.VITRAGE_AGGREGATED_STATE])
+        self.assertEqual([], query_active_actions())
+
+        evaluator.flush_active_actions()
+        self.assertIn('set_state',
+                      [a.action_type for a in query_active_actions()])
+
+        # next disable the alarm
+        warning_test[NagiosProperties.STATUS] = NagiosTestStatus.OK
+        host_v = self.get_host_after_event(event_queue, warning_test,
+                                           processor, _TARGET_HOST)
+        self.assertEqual('AVAILABLE', host_v[VProps.VITRAGE_AGGREGATED_STATE])
+        self.assertNotEqual([], query_active_actions())
+
+        evaluator.flush_active_actions()
+        self.assertEqual([], query_active_actions())
+
+    def test_active_actions_are_shared_by_trackers(self):
+        self.conf.set_override('active_actions_write_interval', 60,
+                               'evaluator')
+        self.addCleanup(self.conf.clear_override,
+                        'active_actions_write_interval', 'evaluator')
+        tracker1 = ActiveActionsTracker(self.conf, self._db, shared=True)
+        tracker2 = ActiveActionsTracker(self.conf, self._db, shared=True)
+        targets = {TFields.TARGET: {VProps.VITRAGE_ID: 'shared-host'}}
+        specs = ActionSpecs('mark_host_down', ActionType.MARK_DOWN,
+                            targets, {})
+        action1 = ActionInfo(specs, ActionMode.DO, 'mark_host_down', 't1')
+        action2 = ActionInfo(specs, ActionMode.DO, 'mark_host_down', 't2')
+
+        self.assertEqual((True, False), tracker1.calc_do_action(action1))
+        self.assertEqual((True, True), tracker1.calc_do_action(action1))
+
+        # the action of the first tracker is dominant for the second one,
+        # without waiting for any write interval
+        self.assertEqual((False, False), tracker2.calc_do_action(action2))
+
+        is_highest_score, second_highest = tracker1.calc_undo_action(action1)
+        self.assertTrue(is_highest_score)
+        self.assertEqual('t2', second_highest.trigger)
+
+        self.assertEqual((True, True), tracker2.calc_do_action(action2))
+        self.assertEqual((True, None), tracker2.calc_undo_action(action2))
+        self.assertEqual([], self._db.active_actions.query(
+            target_vertex_id='shared-host'))
+
     def test_overlapping_deduced_state_1(self):
 
         event_queue, processor, evaluator = self._init_system()
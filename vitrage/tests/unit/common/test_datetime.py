@@ -0,0 +1,49 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from dateutil import parser
+
+from vitrage.tests import base
+from vitrage.utils import datetime as datetime_utils
+
+
+class DatetimeUtilsTest(base.BaseTest):
+
+    def test_parse_timestamp(self):
+        timestamps = [
+            str(datetime_utils.utcnow()),
+            str(datetime_utils.utcnow(with_timezone=False)),
+            '2018-03-04 10:11:12+00:00',
+            '2018-03-04 10:11:12.5+02:00',
+            '2018-03-04T10:11:12Z',
+            '2018-03-04T10:11:12.123456-0330',
+            '2018-03-04 10:11:12',
+            'Sun, 04 Mar 2018 10:11:12 GMT',
+        ]
+        for timestamp in timestamps:
+            expected = parser.parse(timestamp)
+            parsed = datetime_utils.parse_timestamp(timestamp)
+            self.assertEqual(expected, parsed, timestamp)
+            self.assertEqual(expected.utcoffset(), parsed.utcoffset(),
+                             timestamp)
+
+    def test_parse_timestamp_is_cached(self):
+        timestamp = '2018-03-04 10:11:12.654321+00:00'
+        self.assertIs(datetime_utils.parse_timestamp(timestamp),
+                      datetime_utils.parse_timestamp(timestamp))
+
+    def test_parse_invalid_timestamp(self):
+        self.assertRaises(ValueError,
+                          datetime_utils.parse_timestamp,
+                          '2018-02-30 10:11:12')
@@ -68,3 +68,22 @@ class UtilsTest(base.BaseTest):
         expected_max_difference = 1 if len(all_items) % len(chunks) else 0
         self.assertEqual(expected_max_difference, max_size - min_size,
                          'chunks sizes should not differ by more than 1')
+
+    def test_lru_cache(self):
+        cache = utils.LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(1, cache.get('a'))
+
+        # 'b' is now the least recently used
+        cache.put('c', 3)
+        self.assertEqual(2, len(cache))
+        self.assertNotIn('b', cache)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(3, cache.get('c'))
+        self.assertEqual(3, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+        cache.clear()
+        self.assert_is_empty(cache)
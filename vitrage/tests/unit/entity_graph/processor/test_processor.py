@@ -74,6 +74,49 @@ class TestProcessor(TestEntityGraphUnitBase):
         self._check_graph(processor, self.NUM_VERTICES_AFTER_DELETION,
                           self.NUM_EDGES_AFTER_DELETION)
 
+    def test_process_transformed_event(self):
+        processor = self.create_processor_and_graph(self.conf)
+        event = self._create_event(spec_type=self.INSTANCE_SPEC,
+                                   datasource_action=DSAction.INIT_SNAPSHOT)
+        entity = processor.transform_event(event)
+        self.assertIsNotNone(entity)
+        self._check_graph(processor, 0, 0)
+
+        processor.process_event(event, entity)
+        self._check_graph(processor, self.NUM_VERTICES_AFTER_CREATION,
+                          self.NUM_EDGES_AFTER_CREATION)
+
+    def test_process_transformed_event_after_delete(self):
+        processor = self.create_processor_and_graph(self.conf)
+        event = self._create_event(spec_type=self.INSTANCE_SPEC,
+                                   datasource_action=DSAction.INIT_SNAPSHOT)
+        processor.process_event(event)
+        event[DSProps.DATASOURCE_ACTION] = DSAction.UPDATE
+        event['instance_id'] = event['id']
+        event['state'] = event['status']
+        event['host'] = event['OS-EXT-SRV-ATTR:host']
+        delete_event = dict(event)
+        delete_event[DSProps.EVENT_TYPE] = 'compute.instance.delete.end'
+        create_event = dict(event)
+        create_event[DSProps.EVENT_TYPE] = 'compute.instance.create.end'
+
+        # both events are transformed before the delete is processed
+        deleted = processor.transform_event(delete_event)
+        created = processor.transform_event(create_event)
+        self.assertEqual(deleted.vertex.vertex_id, created.vertex.vertex_id)
+        processor.process_event(delete_event, deleted)
+        processor.process_event(create_event, created)
+
+        deleted_vertex = processor.entity_graph.get_vertex(
+            deleted.vertex.vertex_id)
+        self.assertTrue(deleted_vertex[VProps.VITRAGE_IS_DELETED])
+        instances = processor.entity_graph.get_vertices(
+            vertex_attr_filter={VProps.ID: event['id'],
+                                VProps.VITRAGE_IS_DELETED: False})
+        self.assertEqual(1, len(instances))
+        self.assertNotEqual(deleted.vertex.vertex_id,
+                            instances[0].vertex_id)
+
     def test_create_entity_with_placeholder_neighbor(self):
         # create instance event with host neighbor and check validity
         self._create_and_check_entity()
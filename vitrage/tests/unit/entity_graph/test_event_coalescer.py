@@ -0,0 +1,113 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import time
+
+from vitrage.common.constants import DatasourceAction
+from vitrage.common.constants import DatasourceProperties as DSProps
+from vitrage.entity_graph.event_coalescer import EventCoalescer
+from vitrage.tests import base
+
+
+def _event(entity_id, sample_date, action=DatasourceAction.SNAPSHOT):
+    return {'id': entity_id,
+            DSProps.SAMPLE_DATE: sample_date,
+            DSProps.DATASOURCE_ACTION: action}
+
+
+class EventCoalescerTest(base.BaseTest):
+
+    def setUp(self):
+        super(EventCoalescerTest, self).setUp()
+        self.processed = []
+        self.coalescer = EventCoalescer(60,
+                                        lambda event: event['id'],
+                                        self.processed.append)
+
+    def tearDown(self):
+        self.coalescer.flush()
+        super(EventCoalescerTest, self).tearDown()
+
+    def test_superseded_events_are_dropped(self):
+        events = [_event('a', '2018-01-01 10:00:00.000000'),
+                  _event('b', '2018-01-01 10:00:00.000000'),
+                  _event('a', '2018-01-01 10:00:01.000000'),
+                  _event('c', '2018-01-01 10:00:00.000000'),
+                  _event('b', '2018-01-01 10:00:01.000000',
+                         DatasourceAction.UPDATE)]
+        for event in events:
+            self.coalescer.add(event)
+        self.coalescer.flush()
+
+        self.assertEqual([events[2], events[3], events[4]], self.processed)
+        self.assertEqual(5, self.coalescer.received_count)
+        self.assertEqual(2, self.coalescer.dropped_count)
+
+    def test_newest_event_is_kept(self):
+        newer = _event('a', '2018-01-01 10:00:01.000000')
+        older = _event('a', '2018-01-01 10:00:00.000000')
+        self.coalescer.add(newer)
+        self.coalescer.add(older)
+        self.coalescer.flush()
+
+        self.assertEqual([newer], self.processed)
+
+    def test_sample_dates_of_different_formats(self):
+        newer = _event('a', '2018-01-01T10:00:00.5Z')
+        older = _event('a', '2018-01-01 10:00:00.000000+00:00')
+        self.coalescer.add(newer)
+        self.coalescer.add(older)
+        self.coalescer.add(_event('b', '2018-01-01 11:00:00'))
+        self.coalescer.add(_event('b', '2018-01-01T10:30:00-01:00'))
+        self.coalescer.flush()
+
+        self.assertEqual([newer['id'], 'b'],
+                         [event['id'] for event in self.processed])
+        self.assertIs(newer, self.processed[0])
+        self.assertEqual('2018-01-01T10:30:00-01:00',
+                         self.processed[1][DSProps.SAMPLE_DATE])
+
+    def test_invalid_sample_date_keeps_the_last_event(self):
+        first = _event('a', '2018-01-01 10:00:01.000000')
+        last = _event('a', 'not a date')
+        self.coalescer.add(first)
+        self.coalescer.add(last)
+        self.coalescer.flush()
+
+        self.assertEqual([last], self.processed)
+
+    def test_init_snapshot_events_are_not_coalesced(self):
+        events = [_event('a', '2018-01-01 10:00:00.000000',
+                         DatasourceAction.INIT_SNAPSHOT),
+                  _event('a', '2018-01-01 10:00:00.000000',
+                         DatasourceAction.INIT_SNAPSHOT)]
+        for event in events:
+            self.coalescer.add(event)
+        self.coalescer.flush()
+
+        self.assertEqual(events, self.processed)
+        self.assertEqual(0, self.coalescer.dropped_count)
+
+    def test_events_are_processed_after_the_window(self):
+        coalescer = EventCoalescer(0.01,
+                                   lambda event: event['id'],
+                                   self.processed.append)
+        event = _event('a', '2018-01-01 10:00:00.000000')
+        coalescer.add(event)
+
+        for i in range(100):
+            if self.processed:
+                break
+            time.sleep(0.05)
+        self.assertEqual([event], self.processed)
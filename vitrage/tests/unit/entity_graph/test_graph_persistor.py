@@ -0,0 +1,166 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import fixtures
+from oslo_config import cfg
+
+from vitrage.common.constants import EdgeLabel
+from vitrage.common.constants import EntityCategory
+from vitrage.common.constants import VertexProperties as VProps
+from vitrage.datasources.nova.host import NOVA_HOST_DATASOURCE
+from vitrage.datasources.nova.instance import NOVA_INSTANCE_DATASOURCE
+from vitrage.datasources.static import STATIC_DATASOURCE
+import vitrage.datasources.static_physical as static_physical_opts
+from vitrage.datasources.static_physical import STATIC_PHYSICAL_DATASOURCE
+from vitrage.datasources.static_physical import SWITCH
+from vitrage.datasources.transformer_base import TransformerBase
+import vitrage.entity_graph as entity_graph_opts
+from vitrage.entity_graph.consistency.consistency_enforcer \
+    import ConsistencyEnforcer
+from vitrage.entity_graph.graph_persistor import GraphPersistor
+from vitrage.entity_graph.vitrage_init import VitrageInit
+from vitrage.evaluator.actions.evaluator_event_transformer \
+    import VITRAGE_DATASOURCE
+from vitrage.graph.driver.networkx_graph import NXGraph
+import vitrage.graph.utils as graph_utils
+from vitrage.tests import base
+
+
+class GraphPersistorTest(base.BaseTest):
+
+    def setUp(self):
+        super(GraphPersistorTest, self).setUp()
+        self.conf = cfg.ConfigOpts()
+        self.conf.register_opts(entity_graph_opts.OPTS, group='entity_graph')
+        self.conf.set_override('graph_snapshots_dir',
+                               self.useFixture(fixtures.TempDir()).path,
+                               'entity_graph')
+        key_to_uuid_cache = dict(TransformerBase.key_to_uuid_cache)
+        self.addCleanup(self._restore_key_to_uuid_cache, key_to_uuid_cache)
+
+    @staticmethod
+    def _restore_key_to_uuid_cache(key_to_uuid_cache):
+        TransformerBase.key_to_uuid_cache.clear()
+        TransformerBase.uuid_to_key_cache.clear()
+        TransformerBase.load_uuid_cache(key_to_uuid_cache)
+
+    def _create_graph(self):
+        graph = NXGraph('Entity Graph')
+        host = graph_utils.create_vertex(
+            'host1', vitrage_category=EntityCategory.RESOURCE,
+            vitrage_type=NOVA_HOST_DATASOURCE, entity_id='1',
+            vitrage_sample_timestamp='2018-03-04 10:00:00')
+        instance = graph_utils.create_vertex(
+            'instance1', vitrage_category=EntityCategory.RESOURCE,
+            vitrage_type=NOVA_INSTANCE_DATASOURCE, entity_id='2',
+            vitrage_sample_timestamp='2018-03-04 10:00:00',
+            metadata={VProps.VITRAGE_STATE: 'ERROR'})
+        deduced_alarm = graph_utils.create_vertex(
+            'alarm1', vitrage_category=EntityCategory.ALARM,
+            vitrage_type=VITRAGE_DATASOURCE)
+        graph.add_vertices([host, instance, deduced_alarm])
+        graph.add_edge(graph_utils.create_edge(
+            'host1', 'instance1', EdgeLabel.CONTAINS))
+        graph.add_edge(graph_utils.create_edge(
+            'alarm1', 'instance1', EdgeLabel.ON))
+        graph.add_edge(graph_utils.create_edge(
+            'host1', 'instance1', EdgeLabel.CAUSES))
+        return graph
+
+    def test_store_and_load_graph(self):
+        graph = self._create_graph()
+        TransformerBase.load_uuid_cache({'RESOURCE:nova.host:1': 'host1'})
+        GraphPersistor(self.conf, graph).store_graph()
+        TransformerBase.delete_id_from_cache('host1')
+
+        loaded_graph = NXGraph('Entity Graph')
+        self.assertTrue(
+            GraphPersistor(self.conf, loaded_graph).load_graph())
+
+        # the results of the evaluator are not loaded
+        self.assertEqual(2, loaded_graph.num_vertices())
+        self.assertEqual(1, loaded_graph.num_edges())
+        self.assertEqual(graph.get_vertex('host1'),
+                         loaded_graph.get_vertex('host1'))
+        self.assertIsNone(loaded_graph.get_vertex('alarm1'))
+        self.assertIsNone(
+            loaded_graph.get_vertex('instance1').get(VProps.VITRAGE_STATE))
+        self.assertEqual(
+            graph.get_edge('host1', 'instance1', EdgeLabel.CONTAINS),
+            loaded_graph.get_edge('host1', 'instance1', EdgeLabel.CONTAINS))
+        self.assertEqual('host1',
+                         TransformerBase.key_to_uuid_cache.get(
+                             'RESOURCE:nova.host:1'))
+        self.assertEqual('RESOURCE:nova.host:1',
+                         TransformerBase.uuid_to_key_cache.get('host1'))
+
+    def test_delete_restored_entities_not_sampled_again(self):
+        GraphPersistor(self.conf, self._create_graph()).store_graph()
+        graph = NXGraph('Entity Graph')
+        persistor = GraphPersistor(self.conf, graph)
+        self.assertTrue(persistor.load_graph())
+        self.assertEqual({'host1': '2018-03-04 10:00:00',
+                          'instance1': '2018-03-04 10:00:00'},
+                         persistor.restored_sample_timestamps)
+
+        # the host is reported again, with a sample timestamp that is
+        # older than the local time of the load
+        host = graph.get_vertex('host1')
+        host[VProps.VITRAGE_SAMPLE_TIMESTAMP] = '2018-03-04 10:00:10'
+        graph.update_vertex(host)
+
+        events = []
+        enforcer = ConsistencyEnforcer(
+            self.conf, lambda name, event: events.append(event), graph)
+        enforcer.delete_entities_not_sampled_since(
+            persistor.restored_sample_timestamps, {NOVA_HOST_DATASOURCE})
+        self.assertEqual([], events)
+
+        enforcer.delete_entities_not_sampled_since(
+            persistor.restored_sample_timestamps)
+        self.assertEqual(['instance1'],
+                         [event[VProps.VITRAGE_ID] for event in events])
+
+    def test_restored_vitrage_types_of_datasources(self):
+        self.conf.register_opt(cfg.ListOpt('types'), group='datasources')
+        self.conf.set_override('types', [NOVA_HOST_DATASOURCE,
+                                         NOVA_INSTANCE_DATASOURCE,
+                                         STATIC_PHYSICAL_DATASOURCE,
+                                         STATIC_DATASOURCE], 'datasources')
+        self.conf.register_opts(static_physical_opts.OPTS,
+                                group=STATIC_PHYSICAL_DATASOURCE)
+        graph = self._create_graph()
+        graph.add_vertices([
+            graph_utils.create_vertex(vitrage_id, vitrage_type=vitrage_type)
+            for vitrage_id, vitrage_type in (('switch1', SWITCH),
+                                             ('router1', 'router'))])
+        init = VitrageInit(self.conf, graph)
+        init.restored_sample_timestamps = {
+            v_id: None for v_id in ('host1', 'instance1', 'switch1',
+                                    'router1')}
+
+        # the switch is of static_physical, and the router of static
+        self.assertEqual(
+            {NOVA_HOST_DATASOURCE, SWITCH},
+            init._restored_vitrage_types_of({NOVA_HOST_DATASOURCE,
+                                             STATIC_PHYSICAL_DATASOURCE}))
+        self.assertEqual(
+            {NOVA_INSTANCE_DATASOURCE, 'router'},
+            init._restored_vitrage_types_of({NOVA_INSTANCE_DATASOURCE,
+                                             STATIC_DATASOURCE}))
+
+    def test_load_without_snapshot(self):
+        graph = NXGraph('Entity Graph')
+        self.assertFalse(GraphPersistor(self.conf, graph).load_graph())
+        self.assertEqual(0, graph.num_vertices())
@@ -12,8 +12,16 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import threading
+import time
 
+from mock import mock
+from oslo_config import cfg
+
+import vitrage.entity_graph as entity_graph_opts
+from vitrage.entity_graph import priority_scheduler
+from vitrage.entity_graph.priority_scheduler import PriorityScheduler
 from vitrage.entity_graph.service import TwoPriorityListener
+from vitrage.entity_graph.transform_pool import TransformPool
 from vitrage.tests import base
 
 
@@ -23,6 +31,9 @@ class TwoPriorityListenerTest(base.BaseTest):
     def setUpClass(cls):
         super(TwoPriorityListenerTest, cls).setUpClass()
         cls.calc_result = 0
+        cls.conf = cfg.ConfigOpts()
+        cls.conf.register_opts(entity_graph_opts.OPTS, group='entity_graph')
+        cls.conf.set_override('max_queued_events', 0, 'entity_graph')
 
     def do_work(self, x):
         if x:
@@ -38,8 +49,11 @@ class TwoPriorityListenerTest(base.BaseTest):
         so, if all the high calls are performed first, and then all the low,
         the result should be the number of low priority calls.
         0*(2^n) + 1*n
+        The calls are queued while an exclusive function runs, so they are
+        all queued before any of them is performed.
         """
-        priority_listener = TwoPriorityListener(None, self.do_work, None, None)
+        priority_listener = TwoPriorityListener(self.conf, self.do_work,
+                                                None, None)
 
         def write_high():
             for i in range(10000):
@@ -50,23 +64,91 @@ class TwoPriorityListenerTest(base.BaseTest):
                 priority_listener._do_low_priority_work(False)
 
         self.calc_result = 0
+        priority_listener.start()
         t1 = threading.Thread(name='high_1', target=write_high)
         t2 = threading.Thread(name='high_2', target=write_high)
         t3 = threading.Thread(name='low_1', target=write_low)
         t4 = threading.Thread(name='low_2', target=write_low)
-        self._start_and_join(t1, t2, t3, t4)
+        priority_listener.run_exclusively(
+            lambda: self._start_and_join(t1, t2, t3, t4))
+        priority_listener.wait()
         self.assertEqual(20000, self.calc_result, explain)
 
         self.calc_result = 0
+        priority_listener.start()
         t1 = threading.Thread(name='high_1', target=write_high)
         t2 = threading.Thread(name='low_1', target=write_low)
         t3 = threading.Thread(name='low_2', target=write_low)
         t4 = threading.Thread(name='high_2', target=write_high)
-        self._start_and_join(t1, t2, t3, t4)
+        priority_listener.run_exclusively(
+            lambda: self._start_and_join(t1, t2, t3, t4))
+        priority_listener.wait()
         self.assertEqual(20000, self.calc_result, explain)
 
+    def test_events_are_transformed_ahead_in_order(self):
+        def transform(x):
+            time.sleep(0.001 * (x % 7))
+            return -x
+
+        processed = []
+        transform_pool = TransformPool(transform, 4)
+        priority_listener = TwoPriorityListener(
+            self.conf, lambda future: processed.append(future.result()),
+            None, None, prepare_func=transform_pool.submit)
+        priority_listener.start()
+        for i in range(100):
+            priority_listener._do_low_priority_work(i)
+        priority_listener.wait()
+        transform_pool.shutdown()
+
+        self.assertEqual([(i, -i) for i in range(100)], processed)
+
     def _start_and_join(self, *args):
         for t in args:
             t.start()
         for t in args:
             t.join()
+
+
+class PrioritySchedulerTest(base.BaseTest):
+
+    def test_full_queue_blocks_put(self):
+        done = []
+        scheduler = PriorityScheduler(done.append, 2, max_size=2)
+        scheduler.put(1, 'a')
+        scheduler.put(1, 'b')
+        scheduler.put(0, 'c')
+
+        put_thread = threading.Thread(target=scheduler.put, args=(1, 'd'))
+        put_thread.daemon = True
+        put_thread.start()
+        time.sleep(0.1)
+        self.assertTrue(put_thread.is_alive())
+        self.assertEqual([1, 2], scheduler.queue_sizes())
+
+        scheduler.start()
+        put_thread.join()
+        scheduler.stop()
+        self.assertEqual(['c', 'a', 'b', 'd'], done)
+        self.assertEqual([0, 0], scheduler.queue_sizes())
+        self.assertEqual([1, 3], scheduler.done_counts)
+        self.assertGreater(scheduler.max_wait_times[1], 0)
+
+    def test_stats_are_logged_per_interval(self):
+        scheduler = PriorityScheduler(lambda item: None, 2)
+        scheduler.put(0, 'a')
+        scheduler.put(1, 'b')
+        scheduler.put(1, 'c')
+        scheduler.start()
+        scheduler.stop()
+
+        with mock.patch.object(priority_scheduler.LOG, 'info') as log_info:
+            scheduler.log_stats()
+            scheduler.put(1, 'd')
+            scheduler.log_stats()
+
+        # (priority, queued, done) of every log
+        self.assertEqual([(0, 0, 1), (1, 0, 2), (0, 0, 0), (1, 1, 0)],
+                         [call[0][1:4] for call in log_info.call_args_list])
+        self.assertEqual(0.0, log_info.call_args_list[3][0][5])
+        self.assertEqual([1, 2], scheduler.done_counts)
@@ -0,0 +1,218 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import threading
+
+from mock import mock
+from oslo_config import cfg
+
+import vitrage.evaluator as evaluator_opts
+from vitrage.evaluator.change_log import SharedChangeLog
+from vitrage.evaluator import evaluator_service
+from vitrage.evaluator.evaluator_service import EvaluatorManager
+from vitrage.evaluator.evaluator_service import EvaluatorWorker
+from vitrage.evaluator.evaluator_service import START_EVALUATION
+from vitrage.tests import base
+
+
+class FakeQueue(object):
+    """A worker queue, whose batches are handled once put, if handled_seq"""
+
+    def __init__(self, handled_seq=None):
+        self.items = []
+        self.joins = 0
+        self.handled_seq = handled_seq
+
+    def put(self, item):
+        self.items.append(item)
+        if self.handled_seq and item:
+            self.handled_seq.value = item[0]
+
+    def join(self):
+        self.joins += 1
+
+
+class FakeValue(object):
+    def __init__(self, value):
+        self.value = value
+
+
+class EvaluatorManagerTest(base.BaseTest):
+
+    def _create_manager(self, batch_size, batch_interval=0,
+                        max_pending_batches=100, change_log_size=0,
+                        handling_workers=0):
+        conf = cfg.ConfigOpts()
+        conf.register_opts(evaluator_opts.OPTS, group='evaluator')
+        conf.set_override('workers', 2, 'evaluator')
+        conf.set_override('notification_batch_size', batch_size, 'evaluator')
+        conf.set_override('notification_batch_interval', batch_interval,
+                          'evaluator')
+        conf.set_override('notification_max_pending_batches',
+                          max_pending_batches, 'evaluator')
+        conf.set_override('shared_change_log_size', change_log_size,
+                          'evaluator')
+        with mock.patch.object(evaluator_service.os_service,
+                               'ProcessLauncher'):
+            manager = EvaluatorManager(conf, None)
+        manager._worker_handled_seqs = [FakeValue(0), FakeValue(0)]
+        manager._worker_queues = [
+            FakeQueue(handled_seq if i < handling_workers else None)
+            for i, handled_seq in enumerate(manager._worker_handled_seqs)]
+        manager._worker_pids = [1001, 1002]
+        return manager
+
+    def test_notify_and_wait_per_change(self):
+        manager = self._create_manager(batch_size=1, handling_workers=2)
+        waited = []
+        wait_for_workers = manager._wait_for_workers
+
+        def wait(batch_seq):
+            waited.append(batch_seq)
+            wait_for_workers(batch_seq)
+        manager._wait_for_workers = wait
+
+        manager._notify_all('before1', 'current1', True)
+        manager._notify_all('before2', 'current2', False)
+
+        for q in manager._worker_queues:
+            self.assertEqual(
+                [(1, [('before1', 'current1', True, None)], None),
+                 (2, [('before2', 'current2', False, None)], None)],
+                q.items)
+        self.assertEqual([1, 2], [seq for seq in waited if seq > 0])
+
+    @mock.patch.object(evaluator_service, 'WORKER_WAIT_TIMEOUT', 0.01)
+    def test_dead_worker_is_not_waited_for(self):
+        manager = self._create_manager(batch_size=1, handling_workers=1)
+        manager._is_alive = lambda pid: pid != 1002
+
+        manager._notify_all('before1', 'current1', True)
+        manager._notify_all('before2', 'current2', False)
+
+        self.assertEqual({1}, manager._dead_workers)
+        self.assertEqual([1, 2], [batch[0] for batch in
+                                  manager._worker_queues[0].items])
+        self.assertEqual([1], [batch[0] for batch in
+                               manager._worker_queues[1].items])
+
+    @mock.patch.object(evaluator_service, 'WORKER_WAIT_TIMEOUT', 0.01)
+    def test_lagging_worker_is_waited_for(self):
+        manager = self._create_manager(batch_size=1, handling_workers=1)
+        manager._is_alive = lambda pid: True
+        handled_seq = manager._worker_handled_seqs[1]
+        timer = threading.Timer(0.1, setattr, [handled_seq, 'value', 1])
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        manager._notify_all('before1', 'current1', True)
+
+        self.assertEqual(1, handled_seq.value)
+        self.assertEqual(set(), manager._dead_workers)
+
+    def test_batches(self):
+        manager = self._create_manager(batch_size=3)
+
+        for i in range(7):
+            manager._notify_all(i, i, True)
+        self.assertEqual([1, 2], [batch[0] for batch in
+                                  manager._worker_queues[0].items])
+
+        manager.flush_event_changes()
+
+        for q in manager._worker_queues:
+            self.assertEqual([1, 2, 3], [batch[0] for batch in q.items])
+            self.assertEqual(list(range(7)),
+                             [task[0] for seq, tasks, position in q.items
+                              for task in tasks])
+            self.assertEqual(0, q.joins)
+
+    def test_control_action_is_sent_with_pending_changes(self):
+        manager = self._create_manager(batch_size=10, handling_workers=2)
+
+        manager._notify_all('before', 'current', True)
+        manager._notify_all(None, None, None,
+                            evaluator_action=START_EVALUATION)
+
+        for q in manager._worker_queues:
+            self.assertEqual(
+                [(1, [('before', 'current', True, None),
+                      (None, None, None, START_EVALUATION)], None)],
+                q.items)
+            self.assertEqual(1, q.handled_seq.value)
+
+    def test_wait_for_pending_batches(self):
+        manager = self._create_manager(batch_size=2, max_pending_batches=1)
+        manager._worker_handled_seqs[0].value = 1
+        manager._worker_handled_seqs[1].value = 1
+
+        for i in range(4):
+            manager._notify_all(i, i, True)
+
+        self.assertEqual([1, 2],
+                         [batch[0] for batch in
+                          manager._worker_queues[0].items])
+
+    def test_batches_through_shared_change_log(self):
+        manager = self._create_manager(batch_size=2, change_log_size=1)
+        worker = EvaluatorWorker(None, None, None, None,
+                                 handled_seq=FakeValue(0),
+                                 change_log=manager._change_log)
+        done_tasks = []
+        worker._do_task = done_tasks.append
+
+        for i in range(4):
+            manager._notify_all(i, i, True)
+
+        for batch in manager._worker_queues[0].items:
+            self.assertIsNone(batch[1])
+            worker._do_batch(batch)
+        self.assertEqual([(i, i, True, None) for i in range(4)], done_tasks)
+
+
+class SharedChangeLogTest(base.BaseTest):
+
+    def test_wrap_around(self):
+        waited = []
+        change_log = SharedChangeLog(100, waited.append)
+
+        for i in range(20):
+            position = change_log.append(i, 'record %s' % i)
+            self.assertEqual('record %s' % i, change_log.read(position))
+
+        # only the last records fit in the buffer, and the writer waited for
+        # the previous ones to be read before overwriting them
+        self.assertEqual(list(range(len(waited))), waited)
+        self.assertGreater(len(waited), 15)
+        self.assertLess(len(waited), 20)
+
+    def test_too_big_record(self):
+        change_log = SharedChangeLog(10, None)
+        self.assertIsNone(change_log.append(1, 'a long record'))
+
+
+class EvaluatorWorkerTest(base.BaseTest):
+
+    def test_do_batch(self):
+        handled_seq = FakeValue(4)
+        worker = EvaluatorWorker(None, None, None, None,
+                                 handled_seq=handled_seq)
+        done_tasks = []
+        worker._do_task = done_tasks.append
+
+        worker._do_batch((5, ['task1', 'task2'], None))
+        worker._do_batch((6, ['task3'], None))
+
+        self.assertEqual(['task1', 'task2', 'task3'], done_tasks)
+        self.assertEqual(6, handled_seq.value)
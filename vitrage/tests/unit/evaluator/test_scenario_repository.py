@@ -19,8 +19,11 @@ from oslo_config import cfg
 from vitrage.common.constants import EntityCategory
 from vitrage.common.constants import VertexProperties as VProps
 from vitrage.evaluator.scenario_repository import ScenarioRepository
+from vitrage.evaluator.template_data import EdgeDescription
 from vitrage.evaluator.template_validation.template_syntax_validator import \
     syntax_validation
+from vitrage.graph import Edge
+from vitrage.graph.filter import check_filter
 from vitrage.graph import Vertex
 from vitrage.tests import base
 from vitrage.tests.mocks import utils
@@ -91,10 +94,55 @@ class ScenarioRepositoryTest(base.BaseTest):
                                 self.scenario_repository.entity_scenarios)
 
     def test_get_scenario_by_edge(self):
-        pass
+        relationship_scenarios = \
+            self.scenario_repository.relationship_scenarios
+        self.assertTrue(relationship_scenarios)
+
+        for key in relationship_scenarios:
+            edge_desc = EdgeDescription(
+                Edge('source', 'target', key.label),
+                Vertex('source', dict(key.source)),
+                Vertex('target', dict(key.target)))
+
+            # Test Action
+            scenarios = \
+                self.scenario_repository.get_scenarios_by_edge(edge_desc)
+            cached_scenarios = \
+                self.scenario_repository.get_scenarios_by_edge(edge_desc)
+
+            # Test assertions
+            expected = [
+                (e, s)
+                for k, value in relationship_scenarios.items()
+                if k.label == key.label and
+                check_filter(edge_desc.source, dict(k.source)) and
+                check_filter(edge_desc.target, dict(k.target))
+                for e, s in value if s.enabled]
+            self.assertEqual(expected, scenarios)
+            self.assertEqual(expected, cached_scenarios)
+            self.assertIn(relationship_scenarios[key][0], scenarios)
 
     def test_get_scenario_by_entity(self):
-        pass
+        entity_scenarios = self.scenario_repository.entity_scenarios
+        self.assertTrue(entity_scenarios)
+
+        for key in entity_scenarios:
+            vertex = Vertex('vertex', dict(key))
+
+            # Test Action
+            scenarios = self.scenario_repository.get_scenarios_by_vertex(
+                vertex)
+            cached_scenarios = \
+                self.scenario_repository.get_scenarios_by_vertex(vertex)
+
+            # Test assertions
+            expected = [(e, s)
+                        for k, value in entity_scenarios.items()
+                        if check_filter(vertex, dict(k))
+                        for e, s in value if s.enabled]
+            self.assertEqual(expected, scenarios)
+            self.assertEqual(expected, cached_scenarios)
+            self.assertIn(entity_scenarios[key][0], scenarios)
 
     def test_add_template(self):
         pass
@@ -19,10 +19,15 @@ test_vitrage graph
 Tests for `vitrage` graph driver
 """
 
+import json
+
+from networkx.readwrite import json_graph
+
 from vitrage.common.constants import EdgeProperties as EProps
 from vitrage.graph import Direction
 from vitrage.graph.filter import check_filter
 from vitrage.graph import utils
+from vitrage.graph import Vertex
 from vitrage.tests.unit.graph.base import *  # noqa
 
 LOG = logging.getLogger(__name__)
@@ -420,6 +425,286 @@ class TestGraph(GraphTestBase):
         self.assertEqual(OPENSTACK_CLUSTER, found_vertex[VProps.VITRAGE_TYPE],
                          'get_vertices check node vertex')
 
+    def test_get_vertices_uses_updated_index(self):
+        g = NXGraph('test_get_vertices_uses_updated_index')
+        g.add_vertex(v_node)
+        g.add_vertex(v_host)
+        g.add_vertex(v_instance)
+        g.add_vertex(v_alarm)
+
+        alarms_query = {'and': [
+            {'==': {VProps.VITRAGE_CATEGORY: ALARM}},
+            {'==': {VProps.VITRAGE_IS_DELETED: False}}]}
+        resources_query = {'and': [
+            {'==': {VProps.VITRAGE_CATEGORY: RESOURCE}},
+            {'or': [
+                {'==': {VProps.VITRAGE_TYPE: NOVA_HOST_DATASOURCE}},
+                {'==': {VProps.VITRAGE_TYPE: NOVA_INSTANCE_DATASOURCE}}]}]}
+
+        self._assert_set_equal(
+            {v_alarm.vertex_id},
+            {v.vertex_id for v in g.get_vertices(query_dict=alarms_query)},
+            'get_vertices alarms')
+        self._assert_set_equal(
+            {v_host.vertex_id, v_instance.vertex_id},
+            {v.vertex_id for v in g.get_vertices(query_dict=resources_query)},
+            'get_vertices hosts and instances')
+
+        # Index is built now, check it follows the graph changes
+        deleted_alarm = g.get_vertex(v_alarm.vertex_id)
+        deleted_alarm[VProps.VITRAGE_IS_DELETED] = True
+        g.update_vertex(deleted_alarm)
+        self.assertEqual([], g.get_vertices(query_dict=alarms_query),
+                         'get_vertices after alarm was marked deleted')
+
+        g.remove_vertex(v_instance)
+        self._assert_set_equal(
+            {v_host.vertex_id},
+            {v.vertex_id for v in g.get_vertices(query_dict=resources_query)},
+            'get_vertices after instance was removed')
+
+        g.add_vertex(v_instance)
+        self._assert_set_equal(
+            {v_host.vertex_id, v_instance.vertex_id},
+            {v.vertex_id for v in g.get_vertices(
+                vertex_attr_filter={VProps.VITRAGE_TYPE: [
+                    NOVA_HOST_DATASOURCE, NOVA_INSTANCE_DATASOURCE]})},
+            'get_vertices after instance was added again')
+
+        # A vertex without the property is found by a None value
+        no_project = g.get_vertices(
+            query_dict={'==': {VProps.PROJECT_ID: None}})
+        self.assertEqual(4, len(no_project), 'get_vertices without project')
+
+    def test_neighbor_ids(self):
+        g = NXGraph('test_neighbor_ids')
+        g.add_vertex(v_node)
+        g.add_vertex(v_host)
+        g.add_vertex(v_switch)
+        g.add_edge(e_node_to_host)
+        node_id = v_node.vertex_id
+        label = e_node_to_host.label
+
+        self.assertEqual([v_host.vertex_id], g.neighbor_ids(node_id))
+        self.assertEqual([node_id], g.neighbor_ids(
+            v_host.vertex_id, label, OPENSTACK_CLUSTER))
+        self.assertEqual([], g.neighbor_ids(node_id, label, SWITCH))
+
+        # Index is built now, check it follows the graph changes
+        g.add_edge(e_node_to_switch)
+        self.assertEqual([v_switch.vertex_id],
+                         g.neighbor_ids(node_id, label, SWITCH))
+        self._assert_set_equal({v_host.vertex_id, v_switch.vertex_id},
+                               g.neighbor_ids(node_id, label),
+                               'neighbors by label')
+
+        updated_switch = g.get_vertex(v_switch.vertex_id)
+        updated_switch[VProps.VITRAGE_TYPE] = NOVA_HOST_DATASOURCE
+        g.update_vertex(updated_switch)
+        self.assertEqual([], g.neighbor_ids(node_id, label, SWITCH))
+        self._assert_set_equal(
+            {v_host.vertex_id, v_switch.vertex_id},
+            g.neighbor_ids(node_id, vitrage_type=NOVA_HOST_DATASOURCE),
+            'neighbors after the vitrage_type was changed')
+
+        g.remove_edge(e_node_to_host)
+        self.assertEqual([v_switch.vertex_id], g.neighbor_ids(node_id))
+        g.remove_vertex(v_switch)
+        self.assertEqual([], g.neighbor_ids(node_id))
+
+    def test_containment_path(self):
+        g = NXGraph('test_containment_path')
+        g.add_vertices([v_node, v_host, v_switch, v_instance])
+        host_contains_instance = utils.create_edge(
+            v_host.vertex_id, v_instance.vertex_id, ELabel.CONTAINS)
+        g.add_edge(e_node_to_host)
+        g.add_edge(e_node_to_switch)
+        g.add_edge(host_contains_instance)
+        g.add_edge(utils.create_edge(
+            v_switch.vertex_id, v_host.vertex_id, ELabel.ATTACHED))
+
+        self.assertEqual(
+            [v_instance.vertex_id, v_host.vertex_id, v_node.vertex_id],
+            g.containment_path(v_instance.vertex_id))
+        self.assertEqual([v_node.vertex_id],
+                         g.containment_path(v_node.vertex_id))
+
+        # a non deleted containing edge is preferred
+        switch_contains_instance = utils.create_edge(
+            v_switch.vertex_id, v_instance.vertex_id, ELabel.CONTAINS)
+        g.add_edge(switch_contains_instance)
+        host_contains_instance[EProps.VITRAGE_IS_DELETED] = True
+        g.update_edge(host_contains_instance)
+        self.assertEqual(
+            [v_instance.vertex_id, v_switch.vertex_id, v_node.vertex_id],
+            g.containment_path(v_instance.vertex_id))
+
+        g.remove_edge(switch_contains_instance)
+        g.remove_vertex(v_host)
+        self.assertEqual([v_instance.vertex_id],
+                         g.containment_path(v_instance.vertex_id))
+
+    def test_neighbor_ids_by_direction(self):
+        g = NXGraph('test_neighbor_ids_by_direction')
+        g.add_vertices([v_node, v_host, v_switch, v_instance])
+        g.add_edge(e_node_to_host)
+        g.add_edge(e_node_to_switch)
+        g.add_edge(utils.create_edge(
+            v_host.vertex_id, v_instance.vertex_id, ELabel.CONTAINS))
+        g.add_edge(utils.create_edge(
+            v_instance.vertex_id, v_host.vertex_id, ELabel.ATTACHED))
+
+        host_id = v_host.vertex_id
+        self.assertEqual({v_node.vertex_id, v_instance.vertex_id},
+                         set(g.neighbor_ids(host_id)))
+        self.assertEqual({v_instance.vertex_id},
+                         set(g.neighbor_ids(host_id,
+                                            direction=Direction.OUT)))
+        self.assertEqual({v_node.vertex_id, v_instance.vertex_id},
+                         set(g.neighbor_ids(host_id,
+                                            direction=Direction.IN)))
+        self.assertEqual({v_node.vertex_id},
+                         set(g.neighbor_ids(host_id, ELabel.CONTAINS,
+                                            direction=Direction.IN)))
+        self.assertEqual({v_instance.vertex_id},
+                         set(g.neighbor_ids(host_id, ELabel.ATTACHED,
+                                            direction=Direction.IN)))
+        self.assertEqual(set(),
+                         set(g.neighbor_ids(host_id, ELabel.ATTACHED,
+                                            direction=Direction.OUT)))
+
+    def test_version(self):
+        g = NXGraph('test_version')
+        versions = [g.version]
+
+        def assert_version_increased():
+            self.assertGreater(g.version, versions[-1])
+            versions.append(g.version)
+
+        g.add_vertex(v_node)
+        assert_version_increased()
+        g.add_vertex(v_host)
+        g.add_edge(e_node_to_host)
+        assert_version_increased()
+        g.update_vertex(v_host)
+        assert_version_increased()
+        g.update_edge(e_node_to_host)
+        assert_version_increased()
+        g.get_vertices()
+        g.neighbors(v_node.vertex_id)
+        self.assertEqual(versions[-1], g.version)
+        g.remove_edge(e_node_to_host)
+        assert_version_increased()
+        g.remove_vertex(v_host)
+        assert_version_increased()
+
+    def test_version_increases_after_notification(self):
+        g = NXGraph('test_version_increases_after_notification')
+        notified_versions = []
+        g.subscribe(lambda before, current, is_vertex, graph:
+                    notified_versions.append(graph.version))
+
+        version = g.version
+        g.add_vertex(v_node)
+        g.update_vertex(v_node)
+        self.assertEqual([version, version + 1], notified_versions)
+        self.assertEqual(version + 2, g.version)
+
+    def _create_tree_graph(self):
+        g = NXGraph('test_json_output')
+        g.add_vertices([v_node, v_host, v_switch, v_instance])
+        g.add_vertex(Vertex('no_entity_id', {VProps.NAME: 'no entity id'}))
+        g.add_edge(e_node_to_host)
+        g.add_edge(e_node_to_switch)
+        g.add_edge(utils.create_edge(v_host.vertex_id,
+                                     v_instance.vertex_id,
+                                     ELabel.CONTAINS))
+        g.add_edge(utils.create_edge(v_switch.vertex_id,
+                                     'no_entity_id',
+                                     ELabel.CONTAINS))
+        return g
+
+    def test_json_output_graph(self):
+        g = self._create_tree_graph()
+
+        # the node-link format of networkx, with entity ids as the node ids
+        expected = json_graph.node_link_data(g._g)
+        expected['inspected_index'] = 2
+        for index, node in enumerate(expected['nodes']):
+            if VProps.ID in g._g.node[node[VProps.ID]]:
+                node[VProps.ID] = g._g.node[node[VProps.ID]][VProps.ID]
+                node[VProps.GRAPH_INDEX] = index
+
+        self.assertEqual(expected,
+                         json.loads(g.json_output_graph(inspected_index=2)))
+        self.assertEqual(
+            {'directed': True, 'multigraph': True, 'graph': {},
+             'nodes': [], 'links': []},
+            json.loads(NXGraph('empty').json_output_graph()))
+
+    def test_json_output_tree(self):
+        g = self._create_tree_graph()
+
+        # the tree format of networkx, of the node-link output
+        linked_graph = json_graph.node_link_graph(
+            json.loads(g.json_output_graph()))
+        expected = json_graph.tree_data(linked_graph, v_node[VProps.ID])
+
+        self.assertEqual(expected,
+                         json.loads(g.json_output_tree(v_node.vertex_id)))
+        self.assertEqual({}, json.loads(
+            NXGraph('empty').json_output_tree(v_node.vertex_id)))
+
+        g.add_edge(utils.create_edge(v_instance.vertex_id,
+                                     v_switch.vertex_id,
+                                     ELabel.CONTAINS))
+        self.assertRaises(TypeError, g.json_output_tree, v_node.vertex_id)
+
+    def test_read_only_views(self):
+        g = NXGraph('test_read_only_views')
+        g.add_vertex(v_node)
+        g.add_vertex(v_host)
+        g.add_edge(e_node_to_host)
+
+        with g.read_only_views():
+            with g.read_only_views():
+                host = g.get_vertex(v_host.vertex_id)
+            edge = g.get_edge(v_node.vertex_id, v_host.vertex_id,
+                              e_node_to_host.label)
+            neighbors = g.neighbors(v_node.vertex_id)
+        copied_host = g.get_vertex(v_host.vertex_id)
+
+        self.assertEqual(copied_host, host, 'view equals the copy')
+        self.assertEqual([copied_host], neighbors, 'neighbors views')
+        self.assertEqual(v_host[VProps.VITRAGE_TYPE],
+                         host[VProps.VITRAGE_TYPE], 'view item')
+        self.assertEqual(e_node_to_host, edge, 'edge view')
+
+        def update_view():
+            host.properties['new_prop'] = 'new_value'
+        self.assertRaises(TypeError, update_view)
+        self.assertIsInstance(copied_host.properties, dict,
+                              'copies returned outside of the context')
+
+        # Modifying a view copies it, the graph is left untouched
+        host['new_prop'] = 'new_value'
+        self.assertEqual('new_value', host.get('new_prop'))
+        self.assertIsNone(g.get_vertex(v_host.vertex_id).get('new_prop'),
+                          'view modification changed the graph')
+        self.assertIsInstance(host.properties, dict, 'owned after update')
+
+        # A view keeps the properties it was taken with
+        with g.read_only_views():
+            host = g.get_vertex(v_host.vertex_id)
+        updated_host = g.get_vertex(v_host.vertex_id)
+        updated_host[VProps.NAME] = 'updated_name'
+        g.update_vertex(updated_host)
+        g.add_vertex(updated_host)
+        self.assertEqual(v_host.get(VProps.NAME), host.get(VProps.NAME),
+                         'view changed by a graph update')
+        self.assertEqual('updated_name',
+                         g.get_vertex(v_host.vertex_id).get(VProps.NAME))
+
     def _check_callback_result(self, result, msg, exp_prev, exp_curr):
 
         def assert_none_or_equals(exp, act, message):
@@ -490,6 +775,59 @@ class TestGraph(GraphTestBase):
         self._check_callback_result(self.result, 'update edge', e_node_to_host,
                                     updated_edge)
 
+    def test_graph_callbacks_filters(self):
+        g = NXGraph('test_graph_callbacks_filters')
+        alarm_changes = []
+        edge_changes = []
+
+        def alarm_callback(before, current, is_vertex, graph, changes):
+            alarm_changes.append((current.vertex_id, changes))
+
+        def edge_callback(before, current, is_vertex, graph):
+            edge_changes.append(current)
+
+        g.subscribe(alarm_callback,
+                    edges=False,
+                    categories=[ALARM],
+                    changed_keys=[VProps.NAME],
+                    with_changes=True)
+        g.subscribe(edge_callback, vertices=False)
+
+        g.add_vertex(v_host)
+        g.add_vertex(v_alarm)
+        g.add_edge(e_node_to_host)
+        self.assertEqual(1, len(alarm_changes))
+        self.assertEqual(v_alarm.vertex_id, alarm_changes[0][0])
+        self.assertEqual((None, 'anotheralarm'),
+                         alarm_changes[0][1][VProps.NAME])
+        self.assertEqual([e_node_to_host], edge_changes)
+
+        # a change of another key is not notified
+        updated_alarm = g.get_vertex(v_alarm.vertex_id)
+        updated_alarm[VProps.VITRAGE_SAMPLE_TIMESTAMP] = '123'
+        g.update_vertex(updated_alarm)
+        self.assertEqual(1, len(alarm_changes))
+
+        updated_alarm[VProps.NAME] = 'renamed'
+        g.update_vertex(updated_alarm)
+        self.assertEqual(2, len(alarm_changes))
+        self.assertEqual({VProps.NAME: ('anotheralarm', 'renamed')},
+                         alarm_changes[1][1])
+
+        # a resource that became an alarm is notified
+        updated_host = g.get_vertex(v_host.vertex_id)
+        updated_host[VProps.VITRAGE_CATEGORY] = ALARM
+        updated_host[VProps.NAME] = 'host alarm'
+        g.update_vertex(updated_host)
+        self.assertEqual(3, len(alarm_changes))
+        self.assertEqual(1, len(edge_changes))
+
+        # without subscribers of the edges, the edges are not fetched
+        g = NXGraph('test_graph_callbacks_filters')
+        g.subscribe(alarm_callback, edges=False)
+        self.assertTrue(g.is_subscribed(is_vertex=True))
+        self.assertFalse(g.is_subscribed(is_vertex=False))
+
     def test_union(self):
         v1 = v_node
         v2 = v_host
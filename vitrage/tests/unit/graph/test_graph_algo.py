@@ -1374,6 +1374,62 @@ class GraphAlgorithmTest(GraphTestBase):
             len(mappings),
             'Template - Two not connected vertices (vm <- alarm)')
 
+    def test_template_matching_with_not_operators_on_same_type(self):
+        """Test 'not' operators on two template vertices of the same type
+
+        A graph vertex that satisfies one 'not' condition is not taken by
+        it, and must still be checked against the other 'not' condition.
+        """
+        graph = NXGraph('entity_graph')
+        host = graph_utils.create_vertex(
+            vitrage_id='host', vitrage_category=RESOURCE,
+            vitrage_type=NOVA_HOST_DATASOURCE)
+        alarm = graph_utils.create_vertex(
+            vitrage_id='alarm', vitrage_category=ALARM,
+            vitrage_type=ALARM_ON_HOST)
+        graph.add_vertex(host)
+        graph.add_vertex(alarm)
+        graph.add_edge(graph_utils.create_edge(
+            host.vertex_id, alarm.vertex_id, ELabel.CONTAINS))
+
+        template_graph = NXGraph('template_graph')
+        t_v_host = graph_utils.create_vertex(
+            vitrage_id='1', vitrage_category=RESOURCE,
+            vitrage_type=NOVA_HOST_DATASOURCE)
+        t_v_alarm_on = graph_utils.create_vertex(
+            vitrage_id='2', vitrage_category=ALARM,
+            vitrage_type=ALARM_ON_HOST)
+        t_v_alarm_contained = graph_utils.create_vertex(
+            vitrage_id='3', vitrage_category=ALARM,
+            vitrage_type=ALARM_ON_HOST)
+        e_alarm_not_on_host = graph_utils.create_edge(
+            t_v_alarm_on.vertex_id, t_v_host.vertex_id, ELabel.ON)
+        e_host_not_contains_alarm = graph_utils.create_edge(
+            t_v_host.vertex_id, t_v_alarm_contained.vertex_id,
+            ELabel.CONTAINS)
+        for e in [e_alarm_not_on_host, e_host_not_contains_alarm]:
+            e[NEG_CONDITION] = True
+            e[EProps.VITRAGE_IS_DELETED] = True
+        for v in [t_v_host, t_v_alarm_on, t_v_alarm_contained]:
+            del(v[VProps.VITRAGE_ID])
+            template_graph.add_vertex(v)
+        template_graph.add_edge(e_alarm_not_on_host)
+        template_graph.add_edge(e_host_not_contains_alarm)
+
+        mappings = graph.algo.sub_graph_matching(
+            template_graph,
+            Mapping(t_v_host, graph.get_vertex(host.vertex_id), True))
+        self.assertEqual(0, len(mappings),
+                         'Template - host contains an alarm ' + str(mappings))
+
+        graph.remove_edge(graph_utils.create_edge(
+            host.vertex_id, alarm.vertex_id, ELabel.CONTAINS))
+        mappings = graph.algo.sub_graph_matching(
+            template_graph,
+            Mapping(t_v_host, graph.get_vertex(host.vertex_id), True))
+        self.assertEqual(1, len(mappings),
+                         'Template - host without alarms ' + str(mappings))
+
     @staticmethod
     def _build_problematic_subgraph_in_entity_graph(alarm,
                                                     vm,
@@ -0,0 +1,81 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+test_vitrage graph benchmark
+----------------------------------
+
+Memory allocations of the graph read paths, with copies and with views
+"""
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from testtools import skipIf
+
+from vitrage.tests.unit.graph.base import *  # noqa
+
+
+@skipIf(tracemalloc is None, 'tracemalloc is not available')
+class GraphReadViewsBenchmark(GraphTestBase):
+
+    # noinspection PyPep8Naming
+    @classmethod
+    def setUpClass(cls):
+        super(GraphReadViewsBenchmark, cls).setUpClass()
+        cls.vm_id = 10000000
+        cls.vm_alarm_id = 30000000
+        cls.vms = []
+        cls.host_alarm_id = 20000000
+        cls.host_test_id = 40000000
+        cls.entity_graph = cls._create_entity_graph(
+            'entity_graph',
+            num_of_hosts_per_node=ENTITY_GRAPH_HOSTS_PER_CLUSTER,
+            num_of_vms_per_host=ENTITY_GRAPH_VMS_PER_HOST,
+            num_of_alarms_per_host=ENTITY_GRAPH_ALARMS_PER_HOST,
+            num_of_alarms_per_vm=ENTITY_GRAPH_ALARMS_PER_VM,
+            num_of_tests_per_host=ENTITY_GRAPH_TESTS_PER_HOST)
+
+    def _read_graph(self):
+        g = self.entity_graph
+        alarms = g.get_vertices(
+            vertex_attr_filter={VProps.VITRAGE_CATEGORY: ALARM})
+        for vm in self.vms:
+            g.neighbors(vm.vertex_id)
+            g.get_edges(vm.vertex_id)
+        return alarms
+
+    def _measure(self, func):
+        tracemalloc.start()
+        try:
+            result = func()
+            size, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return result, peak
+
+    def test_read_only_views_allocations(self):
+        def read_with_views():
+            with self.entity_graph.read_only_views():
+                return self._read_graph()
+
+        copies, copies_peak = self._measure(self._read_graph)
+        views, views_peak = self._measure(read_with_views)
+
+        LOG.info('Graph reads peak allocations: copies %d bytes, '
+                 'views %d bytes', copies_peak, views_peak)
+        self.assertEqual(copies, views)
+        self.assertLess(views_peak, copies_peak)
@@ -0,0 +1,90 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from vitrage.common.exception import VitrageError
+from vitrage.graph.query import compile_query
+from vitrage.graph.query import create_predicate
+from vitrage.graph.query import get_equality_constraints
+from vitrage.tests import base
+
+QUERY = {
+    'and': [
+        {'==': {'CATEGORY': 'ALARM'}},
+        {'or': [
+            {'>': {'TIME': 150}},
+            {'==': {'VITRAGE_IS_DELETED': True}}
+        ]}
+    ]
+}
+
+
+class QueryTest(base.BaseTest):
+
+    def test_create_predicate(self):
+        match = create_predicate(QUERY)
+
+        self.assertTrue(match({'CATEGORY': 'ALARM', 'TIME': 200}))
+        self.assertTrue(match({'CATEGORY': 'ALARM', 'TIME': 100,
+                               'VITRAGE_IS_DELETED': True}))
+        self.assertFalse(match({'CATEGORY': 'ALARM', 'TIME': 100,
+                                'VITRAGE_IS_DELETED': False}))
+        self.assertFalse(match({'CATEGORY': 'RESOURCE', 'TIME': 200}))
+
+        match = create_predicate({'!=': {'NAME': "it's quoted"}})
+        self.assertFalse(match({'NAME': "it's quoted"}))
+        self.assertTrue(match({}))
+
+    def test_create_predicate_invalid_query(self):
+        self.assertRaises(VitrageError, create_predicate, {'~': {'a': 1}})
+        self.assertRaises(VitrageError, create_predicate, {'and': {'a': 1}})
+
+    def test_compiled_query_is_cached(self):
+        same_query = {
+            'and': [
+                {'==': {'CATEGORY': 'ALARM'}},
+                {'or': [
+                    {'>': {'TIME': 150}},
+                    {'==': {'VITRAGE_IS_DELETED': True}}
+                ]}
+            ]
+        }
+        self.assertIs(compile_query(QUERY), compile_query(same_query))
+
+        # equal but differently typed values must not share a predicate
+        match_true = create_predicate({'==': {'VITRAGE_IS_DELETED': True}})
+        match_one = create_predicate({'==': {'VITRAGE_IS_DELETED': 1}})
+        self.assertIsNot(match_true, match_one)
+
+    def test_get_equality_constraints(self):
+        self.assertEqual({'CATEGORY': {'ALARM'}},
+                         get_equality_constraints(QUERY))
+
+        query = {
+            'and': [
+                {'==': {'IS_DELETED': False}},
+                {'or': [
+                    {'==': {'TYPE': 'nova.host', 'CATEGORY': 'RESOURCE'}},
+                    {'==': {'TYPE': 'nova.instance'}}
+                ]}
+            ]
+        }
+        self.assertEqual({'IS_DELETED': {False},
+                          'TYPE': {'nova.host', 'nova.instance'}},
+                         get_equality_constraints(query))
+
+        query = {'and': [{'==': {'TYPE': 'nova.host'}},
+                         {'==': {'TYPE': 'nova.instance'}}]}
+        self.assertEqual({'TYPE': set()}, get_equality_constraints(query))
+
+        self.assertEqual({}, get_equality_constraints({'<': {'TIME': 1}}))
@@ -20,12 +20,14 @@ Tests for `vitrage` graph driver
 """
 
 import copy
+import threading
 
 from vitrage.common.constants import EntityCategory
 from vitrage.common.constants import NotifierEventTypes as NType
 from vitrage.common.constants import VertexProperties as VProps
 from vitrage.datasources.nova.host import NOVA_HOST_DATASOURCE
 from vitrage.entity_graph.processor.notifier import _get_notification_type
+from vitrage.entity_graph.processor.notifier import NotificationSender
 from vitrage.evaluator.actions import evaluator_event_transformer as evaluator
 from vitrage.graph import Vertex
 from vitrage.tests import base
@@ -194,3 +196,77 @@ class GraphTest(base.BaseTest):
         ret = _get_notification_type(None, placeholder_host, True)
         self.assertIsNone(self.get_first(ret),
                           'A not new host vertex should be ignored')
+
+
+class NotificationSenderTest(base.BaseTest):
+
+    def setUp(self):
+        super(NotificationSenderTest, self).setUp()
+        self.batches = []
+        self.sending = threading.Event()
+        self.can_send = threading.Event()
+
+    def _send(self, notifications):
+        self.sending.set()
+        self.can_send.wait(10)
+        self.batches.append(notifications)
+
+    def _block_sender(self, sender):
+        sender.put(['first'])
+        self.assertTrue(self.sending.wait(10))
+
+    def test_queued_notifications_are_sent_in_batches(self):
+        sender = NotificationSender(self._send)
+        self._block_sender(sender)
+        sender.put(['a', 'b'])
+        sender.put(['c'])
+
+        self.can_send.set()
+        sender.stop()
+
+        self.assertEqual([['first'], ['a', 'b', 'c']], self.batches)
+        self.assertEqual(4, sender.sent_count)
+        self.assertEqual(0, sender.dropped_count)
+
+    def test_overflow_is_dropped(self):
+        sender = NotificationSender(self._send, max_queued=2,
+                                    drop_overflow=True)
+        self._block_sender(sender)
+        sender.put(['a', 'b', 'c'])
+
+        self.can_send.set()
+        sender.stop()
+
+        self.assertEqual([['first'], ['a', 'b']], self.batches)
+        self.assertEqual(1, sender.dropped_count)
+
+    def test_overflow_blocks(self):
+        sender = NotificationSender(self._send, max_queued=2)
+        self._block_sender(sender)
+        sender.put(['a', 'b'])
+        put_thread = threading.Thread(target=sender.put, args=[['c']])
+        put_thread.daemon = True
+        put_thread.start()
+        put_thread.join(0.1)
+        self.assertTrue(put_thread.is_alive())
+
+        self.can_send.set()
+        put_thread.join(10)
+        self.assertFalse(put_thread.is_alive())
+        sender.stop()
+
+        self.assertEqual(['first', 'a', 'b', 'c'],
+                         [n for batch in self.batches for n in batch])
+        self.assertEqual(0, sender.dropped_count)
+
+    def test_notifications_after_stop_are_dropped(self):
+        sender = NotificationSender(self._send)
+        self.can_send.set()
+        sender.put(['a'])
+        sender.stop()
+
+        sender.put(['b', 'c'])
+
+        self.assertEqual([['a']], self.batches)
+        self.assertEqual(1, sender.sent_count)
+        self.assertEqual(2, sender.dropped_count)
@@ -0,0 +1,153 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from datetime import timedelta
+import os
+
+import fixtures
+from mock import mock
+from oslo_config import cfg
+from oslo_db.options import database_opts
+
+from vitrage.common.constants import DatasourceProperties as DSProps
+from vitrage.common.constants import GraphAction
+from vitrage.persistor import service
+from vitrage.persistor.service import VitragePersistorEndpoint
+from vitrage import storage
+from vitrage.storage.sqlalchemy import models
+from vitrage.tests import base
+from vitrage.utils.datetime import utcnow
+
+
+def _message(payload, timestamp=None):
+    return {'ctxt': {},
+            'publisher_id': 'vitrage.collector',
+            'event_type': 'vitrage_event',
+            'payload': payload,
+            'metadata': {'timestamp': timestamp}}
+
+
+class PersistorEndpointTest(base.BaseTest):
+
+    def setUp(self):
+        super(PersistorEndpointTest, self).setUp()
+        self.conf = cfg.ConfigOpts()
+        self.conf.register_opts(database_opts, group='database')
+        db_path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                               'vitrage.db')
+        self.conf.set_override('connection', 'sqlite:///' + db_path,
+                               group='database')
+        self.conf.set_override('max_retries', 2, group='database')
+        self.conf.set_override('retry_interval', 0, group='database')
+        self.db_connection = storage.get_connection_from_config(self.conf)
+        engine = self.db_connection._engine_facade.get_engine()
+        models.Base.metadata.create_all(engine)
+        self.addCleanup(self.db_connection.disconnect)
+
+    def test_batch_is_persisted(self):
+        endpoint = VitragePersistorEndpoint(self.conf, self.db_connection)
+        payloads = [{'id': str(i),
+                     DSProps.SAMPLE_DATE: '2018-03-04 10:11:%02d' % i}
+                    for i in range(10)]
+        end_message = {DSProps.EVENT_TYPE: GraphAction.END_MESSAGE}
+
+        endpoint.info([_message(p) for p in payloads + [end_message]])
+
+        events = sorted(self.db_connection.events.query(),
+                        key=lambda event: event.event_id)
+        self.assertEqual(payloads, [event.payload for event in events])
+        self.assertEqual('2018-03-04 10:11:09',
+                         str(events[-1].collector_timestamp))
+        self.assertEqual(10, endpoint.persisted_count)
+        self.assertEqual(1, endpoint.batch_count)
+        self.assertGreater(endpoint.max_sample_lag, 0)
+
+        endpoint.info([_message(end_message)])
+        self.assertEqual(1, endpoint.batch_count)
+
+    def test_invalid_sample_date_drops_only_its_event(self):
+        endpoint = VitragePersistorEndpoint(self.conf, self.db_connection)
+        payloads = [{'id': '1', DSProps.SAMPLE_DATE: '2018-03-04 10:11:01'},
+                    {'id': '2', DSProps.SAMPLE_DATE: 'not a date'},
+                    {'id': '3', DSProps.SAMPLE_DATE: '2018-03-04 10:11:03'}]
+
+        endpoint.info([_message(p) for p in payloads])
+
+        events = self.db_connection.events.query()
+        self.assertEqual(['1', '3'],
+                         sorted(event.payload['id'] for event in events))
+        self.assertEqual(2, endpoint.persisted_count)
+        self.assertEqual(1, endpoint.dropped_count)
+
+    def test_failed_write_is_retried(self):
+        bulk_create = self.db_connection.events.bulk_create
+        errors = [Exception('DB error')]
+
+        def fail_once(events):
+            if errors:
+                raise errors.pop()
+            bulk_create(events)
+
+        with mock.patch.object(self.db_connection.events, 'bulk_create',
+                               side_effect=fail_once) as mock_create:
+            endpoint = VitragePersistorEndpoint(self.conf,
+                                                self.db_connection)
+            payload = {'id': '1', DSProps.SAMPLE_DATE: '2018-03-04 10:11:01'}
+
+            endpoint.info([_message(payload)])
+
+        self.assertEqual(2, mock_create.call_count)
+        self.assertEqual([payload], [event.payload for event in
+                                     self.db_connection.events.query()])
+        self.assertEqual(1, endpoint.persisted_count)
+        self.assertEqual(0, endpoint.dropped_count)
+
+    def test_failed_retries_drop_the_batch(self):
+        with mock.patch.object(self.db_connection.events, 'bulk_create',
+                               side_effect=Exception('DB error')) \
+                as mock_create:
+            endpoint = VitragePersistorEndpoint(self.conf,
+                                                self.db_connection)
+            payloads = [{'id': str(i),
+                         DSProps.SAMPLE_DATE: '2018-03-04 10:11:%02d' % i}
+                        for i in range(3)]
+
+            endpoint.info([_message(p) for p in payloads])
+
+        self.assertEqual(2, mock_create.call_count)
+        self.assertEqual(0, endpoint.persisted_count)
+        self.assertEqual(0, endpoint.batch_count)
+        self.assertEqual(3, endpoint.dropped_count)
+
+    def test_stats_are_logged_per_interval(self):
+        endpoint = VitragePersistorEndpoint(self.conf, self.db_connection)
+        sent_time = str(utcnow(False) - timedelta(seconds=30))
+        payloads = [{'id': str(i), DSProps.SAMPLE_DATE: str(utcnow())}
+                    for i in range(3)]
+
+        endpoint.info([_message(p, sent_time) for p in payloads] +
+                      [_message({'id': '4', DSProps.SAMPLE_DATE: 'bad'},
+                                'not a time')])
+        self.assertGreaterEqual(endpoint.max_queue_delay, 30)
+        self.assertLess(endpoint.max_sample_lag, 30)
+
+        with mock.patch.object(service.LOG, 'info') as log_info:
+            endpoint.log_stats()
+            endpoint.log_stats()
+
+        self.assertEqual([(3, 1, 1), (0, 0, 0)],
+                         [call[0][1:4] for call in log_info.call_args_list])
+        self.assertGreaterEqual(log_info.call_args_list[0][0][5], 30)
+        self.assertEqual(0, log_info.call_args_list[1][0][5])
+        self.assertEqual(3, endpoint.persisted_count)
@@ -0,0 +1,93 @@
+# Copyright 2018 - Nokia
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from datetime import datetime
+from datetime import timedelta
+import os
+
+import fixtures
+from oslo_config import cfg
+from oslo_db.options import database_opts
+
+from vitrage import storage
+from vitrage.storage.sqlalchemy import models
+from vitrage.tests import base
+
+START_TIME = datetime(2018, 3, 4, 10, 0, 0)
+
+
+class EventsConnectionTest(base.BaseTest):
+
+    def setUp(self):
+        super(EventsConnectionTest, self).setUp()
+        conf = cfg.ConfigOpts()
+        conf.register_opts(database_opts, group='database')
+        db_path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                               'vitrage.db')
+        conf.set_override('connection', 'sqlite:///' + db_path,
+                          group='database')
+        db_connection = storage.get_connection_from_config(conf)
+        engine = db_connection._engine_facade.get_engine()
+        models.Base.metadata.create_all(engine)
+        self.addCleanup(db_connection.disconnect)
+        self.events = db_connection.events
+
+        # 25 events, in pairs of the same collector timestamp, inserted in
+        # reversed order
+        self.events.bulk_create([
+            models.Event(payload={'id': i},
+                         collector_timestamp=self._timestamp(i // 2))
+            for i in reversed(range(25))])
+
+    @staticmethod
+    def _timestamp(minutes):
+        return START_TIME + timedelta(minutes=minutes)
+
+    def test_query_chunks(self):
+        chunks = list(self.events.query_chunks(chunk_size=10))
+
+        self.assertEqual([10, 10, 5], [len(chunk) for chunk in chunks])
+        events = [event for chunk in chunks for event in chunk]
+        self.assertEqual(
+            sorted((e.collector_timestamp, e.event_id) for e in events),
+            [(e.collector_timestamp, e.event_id) for e in events])
+        self.assertEqual(set(range(25)),
+                         set(event.payload['id'] for event in events))
+
+    def test_query_chunks_of_range(self):
+        chunks = self.events.query_chunks(
+            gt_collector_timestamp=self._timestamp(3),
+            lt_collector_timestamp=self._timestamp(6),
+            chunk_size=4)
+
+        ids = [event.payload['id'] for chunk in chunks for event in chunk]
+        self.assertEqual({6, 7, 8, 9, 10, 11, 12, 13}, set(ids))
+        self.assertEqual(8, len(ids))
+
+    def test_delete_in_chunks(self):
+        deleted = self.events.delete(
+            lt_collector_timestamp=self._timestamp(4), chunk_size=4)
+
+        self.assertEqual(10, deleted)
+        remaining = [event.payload['id'] for event in self.events.query()]
+        self.assertEqual(set(range(10, 25)), set(remaining))
+        self.assertEqual(15, self.events.delete(chunk_size=4))
+        self.assertEqual([], self.events.query())
+
+    def test_default_chunk_size(self):
+        chunks = list(self.events.query_chunks(chunk_size=None))
+
+        self.assertEqual([25], [len(chunk) for chunk in chunks])
+        self.assertEqual(25, self.events.delete(chunk_size=None))
+        self.assertEqual([], self.events.query())
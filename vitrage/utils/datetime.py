@@ -17,10 +17,23 @@ from __future__ import absolute_import
 from datetime import datetime
 from datetime import timedelta
 from dateutil import parser
+from dateutil import tz
 from oslo_utils import timeutils
+import re
+
+from vitrage.common.utils import LRUCache
 
 
 TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+PARSED_TIMESTAMPS_CACHE_SIZE = 4096
+
+# str(datetime) and ISO 8601 formats, e.g. '2018-01-01 10:00:00.123+00:00'
+_TIMESTAMP_REGEX = re.compile(
+    r'^(\d{4})-(\d\d)-(\d\d)[ T](\d\d):(\d\d):(\d\d)(?:\.(\d{1,6}))?'
+    r'(Z|([+-])(\d\d):?(\d\d))?$')
+_UTC = tz.tzutc()
+
+_parsed_timestamps = LRUCache(PARSED_TIMESTAMPS_CACHE_SIZE)
 
 
 def utcnow(with_timezone=True):
@@ -28,6 +41,43 @@ def utcnow(with_timezone=True):
     return timeutils.utcnow(with_timezone)
 
 
+def parse_timestamp(timestamp_str):
+    """Parse a timestamp string, like dateutil.parser.parse
+
+    The formats used by vitrage are parsed without dateutil, and the results
+    are cached, since the same timestamps are parsed again and again.
+    """
+    timestamp = _parsed_timestamps.get(timestamp_str)
+    if timestamp is None:
+        timestamp = _parse_known_format(timestamp_str) or \
+            parser.parse(timestamp_str)
+        _parsed_timestamps.put(timestamp_str, timestamp)
+    return timestamp
+
+
+def _parse_known_format(timestamp_str):
+    match = _TIMESTAMP_REGEX.match(timestamp_str)
+    if not match:
+        return None
+    (year, month, day, hour, minute, second, fraction,
+     tz_str, tz_sign, tz_hours, tz_minutes) = match.groups()
+    if not tz_str:
+        tzinfo = None
+    elif tz_str == 'Z':
+        tzinfo = _UTC
+    else:
+        offset = int(tz_hours) * 3600 + int(tz_minutes) * 60
+        offset = -offset if tz_sign == '-' else offset
+        tzinfo = tz.tzoffset(None, offset) if offset else _UTC
+    try:
+        return datetime(int(year), int(month), int(day),
+                        int(hour), int(minute), int(second),
+                        int(fraction.ljust(6, '0')) if fraction else 0,
+                        tzinfo)
+    except ValueError:
+        return None
+
+
 def change_time_str_format(timestamp_str, old_format, new_format):
     utc = datetime.strptime(timestamp_str, old_format)
     return utc.strftime(new_format)